@@ -41,7 +41,8 @@ def deutsch_jozsa(oracle):
 
     # QHACK #
 
-    if np.sum(sample)/2 == 0.5:
+    # the inputs come back to |00> only for a constant function
+    if np.any(sample):
         return "balanced"
     
     return "constant"
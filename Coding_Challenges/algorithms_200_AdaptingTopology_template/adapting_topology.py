@@ -29,46 +29,48 @@ def n_swaps(cnot):
     """
 
     # QHACK #
-    
-    # cnot.wires returns wires used in CNOT object
-        # cnot.wires[0] returns control qubit
-        # cnot.wires[1] returns target qubit
-    
-    # recursively iterates to find all paths from control qubit to target qubit
-        # adds 2 swaps per iteration since we'd want to swap back to original qubit order
-        # graph_val is the previous value for the graph dictionary in this iteration
-        # curr_graph_key is the current key list for the graph dictionary in this iteration    
-    
-    def one_swap(graph_val, graph_key, num_swaps):
-        temp_list = np.empty(0)
-        
-        # base case if it gets stuck in an endless loop (i.e. 4 -> 7 -> 6 -> 5 -> 4)
-        if num_swaps > 16:
-            return temp_list
-        
-        # base case if target is in current dictionary key
-        if cnot.wires[1] in graph_key:
-            return np.append(temp_list, num_swaps)
-   
-        for i in range(len(graph_key)):
-            next_graph = graph[graph_key[i]]
-            
-            # if the next dictionary key is only one value
-                # and that value is the current dictionary value
-                # then ignore this iteration
-            if not((len(next_graph) == 1) and (graph_val in next_graph)):
-                new_val = one_swap(i, next_graph, num_swaps + 2)
-                temp_list = np.append(temp_list, new_val)
-        
-        return temp_list
-    
-    # creates list of possible number of swaps needed to make connection
-        # between control and target qubit
-    nSwap_list = one_swap(cnot.wires[0], graph[cnot.wires[0]], 0)
-    
-    # returns minimum value of that list (as an integer)
-    return int(np.amin(nSwap_list))
-    
+
+    def hop_distances(graph):
+        """All-pairs hop distances of a coupling map.
+
+        Breadth-first search runs from every qubit at once: each step advances all the
+        frontiers through the adjacency matrix. Disconnected pairs get -1.
+        """
+
+        index = {node: i for i, node in enumerate(graph)}
+        adjacency = np.zeros((len(index), len(index)))
+        for node, neighbours in graph.items():
+            for neighbour in neighbours:
+                adjacency[index[node], index[neighbour]] = 1
+                adjacency[index[neighbour], index[node]] = 1
+
+        distances = np.full(adjacency.shape, -1, dtype=int)
+        frontier = np.eye(len(index), dtype=bool)
+        visited = frontier.copy()
+        hops = 0
+        while frontier.any():
+            distances[frontier] = hops
+            frontier = (frontier @ adjacency > 0) & ~visited
+            visited |= frontier
+            hops += 1
+
+        return index, distances
+
+    # the table is built once per coupling map and reused by later calls; it is keyed
+    # by the map's contents, so an edited graph can never be answered from a stale table
+    key = tuple((node, tuple(neighbours)) for node, neighbours in graph.items())
+    if getattr(n_swaps, "graph_key", None) != key:
+        n_swaps.graph_key = key
+        n_swaps.index, n_swaps.distances = hop_distances(graph)
+
+    distance = n_swaps.distances[n_swaps.index[cnot.wires[0]], n_swaps.index[cnot.wires[1]]]
+    if distance < 0:
+        raise ValueError(f"qubits {cnot.wires[0]} and {cnot.wires[1]} are not connected")
+
+    # moving the control next to the target takes distance - 1 swaps, and as many
+    # swaps restore the original qubit order afterwards
+    return 2 * (int(distance) - 1)
+
     # QHACK #
 
 
@@ -16,14 +16,14 @@ def qfunc_adder(m, wires):
     qml.QFT(wires=wires)
 
     # QHACK #
-    
-    m_binary = np.binary_repr(m, width=len(wires))[::-1]
-    
-    for i in range(len(m_binary)):
-        for j in range(i, len(wires)):
-            if int(m_binary[i]) == 1:
-                qml.U1(2*np.pi/(2**(j - i + 1)), wires=j)   
-    
+
+    # Bit i of m rotates wire j >= i by 2*pi / 2**(j - i + 1). Summed over the bits,
+    # wire j turns by 2*pi * m / 2**(j + 1); the bits above j only add multiples of
+    # 2*pi, so a single phase of 2*pi * (m mod 2**(j + 1)) / 2**(j + 1) per wire does
+    # the same as the n(n+1)/2 gates of the bitwise construction.
+    for j in range(len(wires)):
+        qml.U1(2 * np.pi * ((m % 2 ** (j + 1)) / 2 ** (j + 1)), wires=wires[j])
+
     # QHACK #
 
     qml.QFT(wires=wires).inv()
@@ -19,15 +19,14 @@ def oracle_matrix(indices):
     """
 
     # QHACK #
-    
+
     dim = 2 ** 4
-    
-    my_array = np.eye(dim)
-    
-    for i in range(dim):
-        if i in indices:
-            my_array[i][i] *= -1
-    
+
+    # the oracle is diagonal: -1 on the marked elements, selected by a boolean mask
+    marked = np.zeros(dim, dtype=bool)
+    marked[np.asarray(indices, dtype=int)] = True
+    my_array = np.diag(np.where(marked, -1.0, 1.0))
+
     # QHACK #
 
     return my_array
@@ -96,10 +95,11 @@ def number_of_solutions(indices):
     
     # find the state with the max probability and calculate theta
     state_with_max_prob = np.argmax(all_state_probabilites)
-    theta = state_with_max_prob * np.pi / 8
+    # (the readout j of t estimation wires stands for the phase 2 pi j / 2**t)
+    theta = 2 * np.pi * state_with_max_prob / len(all_state_probabilites)
     
     # return the approximate number of solutions
-    M_solns = 16 * (np.sin(theta/2)**2)
+    M_solns = 2 ** 4 * (np.sin(theta/2)**2)
     
     return M_solns
     
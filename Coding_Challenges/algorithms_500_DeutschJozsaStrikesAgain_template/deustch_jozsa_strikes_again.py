@@ -17,33 +17,64 @@ def deutsch_jozsa(fs):
     """
 
     # QHACK #
-    
+
+    def truth_table(f):
+        """Outputs f(x) of an oracle made of X-type gates, None if it has another gate.
+
+        The gates are applied to the basis states |x>|0> as integers, wire 0 being the
+        most significant of the 3 bits.
+        """
+        with qml.tape.QuantumTape() as tape:
+            f([0, 1, 2])
+
+        states = np.arange(4) << 1
+        for op in tape.operations:
+            if op.name not in ("PauliX", "CNOT", "Toffoli"):
+                return None
+            bits = [2 - wire for wire in op.wires.tolist()]
+            controls = sum(1 << bit for bit in bits[:-1])
+            states = states ^ np.where(states & controls == controls, 1 << bits[-1], 0)
+
+        if np.any(states >> 1 != np.arange(4)):
+            return None
+        return states & 1
+
+    tables = [truth_table(f) for f in fs]
+    if all(table is not None for table in tables):
+        # constant functions have a single output value
+        n_constant = sum(len(set(table.tolist())) == 1 for table in tables)
+        if n_constant in (0, len(fs)):
+            return "4 same"
+        return "2 and 2" if n_constant == len(fs) / 2 else "bad input"
+
+    # other oracles run through one Deutsch-Jozsa round each, recording on an auxiliary
+    # qubit whether the inputs came back to |00>, i.e. whether f is constant
+
     def sub_oracle(oracle_num):
-        # apply function
+        # phase (-1)^f(x) on the |++> inputs, back to the Z basis
         fs[oracle_num]([0, 1, 2])
-        
-        # return to Z basis for the 3 qubits
-        for i in range(3):
+        for i in range(2):
             qml.Hadamard(wires=i)
-       
-        # apply the two CCX gates to one of the auxiliary qubits
-            # the aux qb should save whether it's constant (1) or balanced (0)
-        qml.Toffoli(wires=[0, 2, oracle_num+3])
-        qml.Toffoli(wires=[1, 2, oracle_num+3])
-        
-        # return back to X basis for the next oracle
-        for i in range(3):
+
+        # flip the auxiliary qubit when the inputs are |00>
+        for i in range(2):
+            qml.PauliX(wires=i)
+        qml.Toffoli(wires=[0, 1, oracle_num + 3])
+        for i in range(2):
+            qml.PauliX(wires=i)
+
+        # undo the phase, leaving the inputs in |++> for the next oracle
+        for i in range(2):
             qml.Hadamard(wires=i)
-    
+        fs[oracle_num]([0, 1, 2])
+
     nWires = 7
     dev = qml.device("default.qubit", wires=nWires, shots=1)
-    
+
     @qml.qnode(dev)
     def circuit():
-        # state prep
-        for i in range(2, nWires):
-            qml.PauliX(wires=i)
-        
+        # state prep: inputs in |++>, output in |->
+        qml.PauliX(wires=2)
         for i in range(3):
             qml.Hadamard(wires=i)
 
@@ -58,12 +89,12 @@ def deutsch_jozsa(fs):
 
     if np.sum(sample) == len(fs)/2:
         return "2 and 2"
-    
-    elif np.sum(sample) == (len(fs) or 0):
+
+    elif np.sum(sample) in (0, len(fs)):
         return "4 same"
-    
+
     return "bad input"
-    
+
     # QHACK #
 
 
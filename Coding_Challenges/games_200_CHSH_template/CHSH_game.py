@@ -83,21 +83,33 @@ def winning_prob(params, alpha, beta):
     """
 
     # QHACK #
-    
-    prob_of_winning = 0;
-    
-    for x in range(2):
-        for y in range(2):
-            probs = chsh_circuit(params[0], params[1], params[2], params[3], x, y, alpha, beta)
-            
-            if (x*y == 0):
-                prob_of_winning += (probs[0] + probs[3])
-            
-            elif (x*y == 1):
-                prob_of_winning += (probs[1] + probs[2])
-    
-    return (prob_of_winning / len(probs))
-    
+
+    # the entangled state prepare_entangled makes from |00>, i.e. the first column of
+    # its unitary, as a 2x2 array of amplitudes indexed by the bits of wires 0 and 1
+    unitary = qml.transforms.get_unitary_matrix(prepare_entangled, wire_order=[0, 1])
+    state = np.reshape(unitary(alpha, beta)[:, 0], (2, 2))
+
+    # V(theta) = [[cos, -sin], [sin, cos]] for the four angles, shape (..., 4, 2, 2);
+    # params may also be a batch of parameter sets of shape (..., 4)
+    c, s = np.cos(params), np.sin(params)
+    rotations = np.stack([np.stack([c, -s], axis=-1), np.stack([s, c], axis=-1)], axis=-2)
+
+    # amplitudes[..., x, y, a, b] of outcome (a, b) with Alice's rotation x and Bob's y,
+    # for all four settings in one contraction
+    amplitudes = np.einsum(
+        "...xai,...ybj,ij->...xyab",
+        rotations[..., :2, :, :],
+        rotations[..., 2:, :, :],
+        state,
+    )
+    probs = np.abs(amplitudes) ** 2
+
+    # they win with a == b unless x = y = 1, where they win with a != b
+    same = np.eye(2)
+    wins = np.array([[same, same], [same, 1 - same]])
+
+    return np.sum(wins * probs, axis=(-4, -3, -2, -1)) / 4
+
     # QHACK #
     
 
@@ -118,14 +130,28 @@ def optimize(alpha, beta):
 
     # QHACK #
 
-    #Initialize parameters, choose an optimization method and number of steps
+    # several random starts descend together as one batch of shape (n_starts, 4); the
+    # first one is the single start used before, the others guard against poor local optima
     np.random.seed(0)
-    
-    init_params = np.random.normal(0, np.pi, 4, requires_grad = True)
+    n_starts = 8
+
+    starts = np.random.normal(0, np.pi, (n_starts, 4), requires_grad=True)
+    init_params = starts[0]
     opt = qml.GradientDescentOptimizer(stepsize=0.4)
     steps = 100
-    
+
     conv_tol = 1e-6
+    active = np.ones(n_starts, dtype=bool, requires_grad=False)
+    run_costs = np.full(n_starts, np.inf, requires_grad=False)
+
+    step_costs = []
+
+    def total_cost(batch):
+        """Sum of the costs of the starts, each of which only moves along its own gradient"""
+        costs = cost(batch)
+        # the cost of every start is kept from the same forward pass
+        step_costs.append(qml.math.stop_gradient(costs))
+        return np.sum(costs)
 
     # QHACK #
     
@@ -135,13 +161,20 @@ def optimize(alpha, beta):
     for i in range(steps):
         # update the circuit parameters 
         # QHACK #
-        params, prev_prob =  opt.step_and_cost(cost, params)
-        
-        prob = cost(params)
-        
-        conv = np.abs(prob - prev_prob)
-        
-        if (conv <= conv_tol):
+        # step_and_cost evaluates the costs before the step in its forward pass, so
+        # nothing is re-evaluated; the starts that have stalled stay where they are
+        moved, _ = opt.step_and_cost(total_cost, starts[active])
+        costs = step_costs.pop()
+        indices = np.flatnonzero(active)
+        starts[indices] = moved
+
+        stalled = np.abs(costs - run_costs[indices]) <= conv_tol
+        run_costs[indices] = costs
+        active[indices[stalled]] = False
+
+        if not np.any(active) or i == steps - 1:
+            # the best start, judged by the winning probability of its final parameters
+            params = starts[np.argmax(winning_prob(starts, alpha, beta))]
             break
 
         # QHACK #
@@ -61,41 +61,40 @@ def simulate(angle, n):
     """
 
     # QHACK #
-    
-    n_shots = 10000
-    C_beeps = 0
-    D_beeps = 0
-    explosions = 0
-    
-    def n_bomb_circ(i):
-    
-        if (i == n):
-            final_test = bomb_tester(angle)
-          
-            if (final_test == 1):
-                return [0, 1, 0]
-            
-            return [0, 0, 1]
-        
-        bomb_pot = is_bomb(angle)
-        
-        if (bomb_pot == 1):
-            return [1, 0, 0]
-        
-        return n_bomb_circ(i+1)
-    
 
-    for j in range(n_shots):
-        results = n_bomb_circ(0)
+    n_shots = 10000
 
-        explosions += results[0]
-        D_beeps += results[1]
-        C_beeps += results[2]
-    
-    print(D_beeps)
-    print(n_shots - explosions)
-    
-    return D_beeps / (n_shots - explosions)
+    def probability_of_one(one_shot):
+        """Probability that a one-shot circuit samples +1, from its operations run exactly."""
+        # the quantum function is recorded on a tape of its own, whatever wraps the QNode
+        with qml.tape.QuantumTape() as tape:
+            one_shot.func(angle)
+        operations = tape.operations
+
+        @qml.qnode(qml.device("default.qubit", wires=1))
+        def exact():
+            for op in operations:
+                qml.apply(op)
+            return qml.expval(qml.PauliZ(0))
+
+        return (1 + float(exact())) / 2
+
+    # every stage explodes the bomb with the same probability, so the number of trials
+    # surviving all n stages is binomial with the product of the survival probabilities;
+    # the survivors make D beep with the probability of the final one-shot measurement
+    p_explode = probability_of_one(is_bomb)
+    p_beep = probability_of_one(bomb_tester)
+
+    # fixed seed, so that runs are reproducible
+    rng = np.random.default_rng(0)
+    survivors = rng.binomial(n_shots, (1 - p_explode) ** n)
+    D_beeps = rng.binomial(survivors, p_beep)
+
+    # no ratio is measured when every bomb exploded
+    if survivors == 0:
+        return float("nan")
+
+    return D_beeps / survivors
 
     # QHACK #
 
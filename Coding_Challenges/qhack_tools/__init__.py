@@ -0,0 +1,38 @@
+"""Local tooling for running and checking the Coding Challenge solutions.
+
+The solution scripts themselves stay self-contained (they are submitted as single
+files), so everything that works across challenges lives in this package and is
+run from the ``Coding_Challenges`` directory, e.g.::
+
+    python -m qhack_tools.grader
+
+Modules:
+    - challenges: discovery of the ``*_template/`` directories, in-process loading of the
+      solution scripts and comparison of their output against the ``#.ans`` files
+    - grader: runs every ``#.in`` case through a process pool and reports the results
+    - daemon / client: resident solver serving stdin payloads over a Unix socket, and the
+      thin client standing in for ``python <solution>.py < #.in``
+    - batch: one-case-per-line stdin mode streaming each case's output from one process
+    - bench: timing / circuit-execution / peak-memory benchmarks with baseline gating
+    - startup: lazy imports for the tools and a cold-start / import-time report per script
+    - cache: on-disk result cache for the entry functions, keyed by input and source hash
+    - qnode_cache: shared devices and QNodes for functions that rebuild them on every call
+    - statevector: vectorized statevector kernels and the device built on them
+    - broadcast: batches of structurally identical circuits run as one kernel pass
+    - routing: SWAP-inserting router for whole circuits on a coupling map, with a report
+    - adder: compiled phase forms of the QFT adder, its analytic basis-state path and the
+      batched modular-addition engine
+    - chsh: fused evaluation of the four CHSH settings and the analytic gradient of the
+      winning probability, the batched multi-start optimizer and the closed-form optimum
+    - counting: matrix-free Grover operator, closed-form phase estimation distribution and
+      per-size counting circuits of quantum counting, with a maximum-likelihood estimate
+    - elitzur: stage probabilities of the bomb tester circuits, the seeded Monte Carlo
+      engine drawing all its trials at once, and exact / adaptive estimates of the ratio
+    - oracles: truth tables of classical reversible oracles and the Deutsch-Jozsa answers
+      from bit operations on them, with a statevector fallback, batched classification of
+      CNOT oracles, and the N-oracle engine with a single measured-and-reset ancilla
+    - coupling: coupling maps from edge-list / JSON files in CSR form, and their distance /
+      next-hop tables persisted per map
+    - options: the ``--cache`` / ``--reuse-qnodes`` / ``--statevector`` harness flags
+    - profiler: per-QNode execution, gradient and timing counters with a folded-stack summary
+"""
@@ -0,0 +1,271 @@
+#! /usr/bin/python3
+"""Compiled forms of the QFT adder of ``adder_QFT.qfunc_adder`` (algorithms_300).
+
+Between its QFT and inverse QFT, the adder rotates wire ``j`` by ``2*pi / 2**(j - i + 1)``
+for every set bit ``i <= j`` of ``m`` (bit 0 least significant). Those phases add up to
+one angle per wire, ``2*pi * (m mod 2**(j + 1)) / 2**(j + 1)``: the bits above ``j``
+only contribute multiples of ``2*pi``. :func:`qfunc_adder` emits the rotations in one
+of three forms:
+
+    - ``"bitwise"``: the original ``n(n+1)/2`` U1 gates, kept as the reference
+    - ``"phases"``: one U1 per wire (:func:`phase_angles`), what the solution now emits
+    - ``"diagonal"``: a single ``DiagonalQubitUnitary`` (:func:`phase_diagonal`), whose
+      size grows as ``2**n``
+
+On a computational basis state the whole QFT / phases / inverse QFT circuit is the
+modular addition ``|k> -> |k + m mod 2**n>``, with wire 0 the most significant bit.
+:func:`add_basis_state` computes it directly, in time linear in the number of wires,
+without building the circuit.
+
+:func:`batched_adder` does the same for whole arrays of offsets and inputs. In the QFT
+basis wire ``j`` of ``|k>`` carries the phase ``2*pi * (k mod 2**(j + 1)) / 2**(j + 1)``;
+the adder adds ``m mod 2**(j + 1)`` to that counter, and the inverse QFT reads bit ``j``
+of the result back. The counters of all wires are the low bits of a single integer, so
+each addition is one vectorized integer operation. The report checks the engine against
+the solution's sampled ``shots=1`` circuit and measures its throughput.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.adder
+    python -m qhack_tools.adder --additions 1000000 --wires 40
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from qhack_tools import challenges as ch
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+MODES = ("bitwise", "phases", "diagonal")
+
+
+def phase_angles(m, n_wires):
+    """Combined rotation angle of every wire.
+
+    Args:
+        - m (int): units to add
+        - n_wires (int): number of wires
+
+    Returns:
+        - (np.ndarray): angle of wire ``j`` at index ``j``, in ``[0, 2*pi)``
+    """
+
+    return np.array(
+        [2 * np.pi * ((m % 2 ** (j + 1)) / 2 ** (j + 1)) for j in range(n_wires)]
+    )
+
+
+def phase_diagonal(m, n_wires):
+    """Diagonal of the product of the per-wire rotations, in PennyLane's basis order."""
+
+    # bit of wire j in basis state b, wire 0 being the most significant
+    states = np.arange(2 ** n_wires)[:, None] >> np.arange(n_wires - 1, -1, -1) & 1
+    return np.exp(1j * (states @ phase_angles(m, n_wires)))
+
+
+def qfunc_adder(m, wires, mode="phases"):
+    """Adds ``m`` to the basis state on ``wires``, like ``adder_QFT.qfunc_adder``.
+
+    Args:
+        - m (int): units to add
+        - wires (list(int)): wires the function is executed on
+        - mode (str): form of the phase rotations, one of :data:`MODES`
+    """
+
+    wires = list(wires)
+    qml.QFT(wires=wires)
+
+    if mode == "bitwise":
+        for i in range(len(wires)):
+            if (m >> i) & 1:
+                for j in range(i, len(wires)):
+                    qml.U1(2 * np.pi / 2 ** (j - i + 1), wires=wires[j])
+    elif mode == "phases":
+        for wire, angle in zip(wires, phase_angles(m, len(wires))):
+            qml.U1(angle, wires=wire)
+    elif mode == "diagonal":
+        qml.DiagonalQubitUnitary(phase_diagonal(m, len(wires)), wires=wires)
+    else:
+        raise ValueError(f"unknown mode {mode!r}, expected one of {MODES}")
+
+    qml.QFT(wires=wires).inv()
+
+
+def to_bits(value, n_wires):
+    """Bits of ``value`` on ``n_wires`` wires, wire 0 first (most significant)."""
+
+    return [int(bit) for bit in format(value % 2 ** n_wires, f"0{n_wires}b")]
+
+
+def add_basis_state(bits, m):
+    """Output of the adder on a basis state, computed without a circuit.
+
+    Args:
+        - bits (list(int)): input basis state, wire 0 first (most significant)
+        - m (int): units to add
+
+    Returns:
+        - (list(int)): the bits of ``(k + m) mod 2**n``, where ``k`` is the input
+    """
+
+    value = int("".join(str(int(bit)) for bit in bits) or "0", 2)
+    return to_bits(value + m, len(bits))
+
+
+def batched_adder(m, inputs, n_wires):
+    """Outputs of the adder for arrays of offsets and basis-state inputs.
+
+    Args:
+        - m (array(int)): units to add, broadcast against ``inputs``
+        - inputs (array(int)): input basis states as integers, wire 0 most significant
+        - n_wires (int): number of wires
+
+    Returns:
+        - (np.ndarray): ``(inputs + m) mod 2**n_wires``, with the broadcast shape; of
+          dtype ``int64`` up to 62 wires, of Python integers beyond
+    """
+
+    m, inputs = np.broadcast_arrays(np.asarray(m), np.asarray(inputs))
+    if n_wires <= 62 and m.dtype.kind in "iu" and inputs.dtype.kind in "iu":
+        # both terms are reduced first, so that their sum cannot overflow
+        mask = np.int64((1 << n_wires) - 1)
+        return ((inputs.astype(np.int64) & mask) + (m.astype(np.int64) & mask)) & mask
+
+    modulus = 2 ** n_wires
+    return (inputs.astype(object) % modulus + m.astype(object) % modulus) % modulus
+
+
+def output_bits(values, n_wires):
+    """Bits of integer outputs, wire 0 first, as the sampled circuit returns them.
+
+    Returns:
+        - (np.ndarray): array of shape ``values.shape + (n_wires,)``
+    """
+
+    # the values are unpacked through their big-endian bytes
+    values = np.asarray(values)
+    if values.dtype != object:
+        n_bytes = 8
+        data = np.ascontiguousarray(values.ravel(), dtype=">u8").view(np.uint8)
+    else:
+        n_bytes = (n_wires + 7) // 8
+        data = np.frombuffer(
+            b"".join(int(value).to_bytes(n_bytes, "big") for value in values.ravel()),
+            dtype=np.uint8,
+        )
+
+    bits = np.unpackbits(data.reshape(-1, n_bytes), axis=1)[:, 8 * n_bytes - n_wires :]
+    return bits.astype(np.int8).reshape(values.shape + (n_wires,))
+
+
+def sampled_adder(qfunc, m, value, n_wires):
+    """Output bits of an adder quantum function, sampled once like the judge's circuit.
+
+    Args:
+        - qfunc (callable): ``qfunc(m, wires)``, e.g. the solution's ``qfunc_adder``
+        - m (int): units to add
+        - value (int): input basis state
+        - n_wires (int): number of wires
+    """
+
+    dev = qml.device("default.qubit", wires=range(n_wires), shots=1)
+
+    @qml.qnode(dev)
+    def circuit():
+        qml.BasisState(np.array(to_bits(value, n_wires)), wires=range(n_wires))
+        qfunc(m, range(n_wires))
+        return qml.sample()
+
+    return [int(bit) for bit in np.ravel(circuit())]
+
+
+def validate(qfunc, cases, max_wires=6, seed=0):
+    """Compares :func:`batched_adder` with sampled circuits on random cases.
+
+    Returns:
+        - (list(tuple)): the ``(m, input, n_wires)`` cases that disagree
+    """
+
+    rng = random.Random(seed)
+    m, inputs, wires = [], [], []
+    for _ in range(cases):
+        n_wires = rng.randint(1, max_wires)
+        wires.append(n_wires)
+        m.append(rng.randrange(4 * 2 ** n_wires))
+        inputs.append(rng.randrange(2 ** n_wires))
+
+    mismatches = []
+    for n_wires in set(wires):
+        selected = [i for i, n in enumerate(wires) if n == n_wires]
+        outputs = batched_adder([m[i] for i in selected], [inputs[i] for i in selected], n_wires)
+        for i, bits in zip(selected, output_bits(outputs, n_wires).tolist()):
+            if sampled_adder(qfunc, m[i], inputs[i], n_wires) != bits:
+                mismatches.append((m[i], inputs[i], n_wires))
+
+    return mismatches
+
+
+def _random_additions(additions, n_wires, seed=0):
+    rng = np.random.default_rng(seed)
+    if n_wires <= 62:
+        high = 2 ** n_wires
+        return rng.integers(0, high, additions), rng.integers(0, high, additions)
+
+    def draw():
+        # Python integers assembled from 62-bit words
+        values = np.zeros(additions, dtype=object)
+        for _ in range((n_wires + 61) // 62):
+            values = values * 2 ** 62 + rng.integers(0, 2 ** 62, additions).astype(object)
+        return values % 2 ** n_wires
+
+    return draw(), draw()
+
+
+def benchmark_workloads():
+    """Batched additions benchmarked by :mod:`.bench`, as ``(label, callable)`` pairs."""
+
+    def workload(additions, n_wires):
+        m, inputs = _random_additions(additions, n_wires)
+        return lambda: output_bits(batched_adder(m, inputs, n_wires), n_wires)
+
+    return [
+        ("1e5_additions_12_wires", workload(10 ** 5, 12)),
+        ("1e5_additions_200_wires", workload(10 ** 5, 200)),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--additions", type=int, default=10 ** 5, help="size of the batch")
+    parser.add_argument("--wires", type=int, nargs="+", default=[12, 62, 200])
+    parser.add_argument("--cases", type=int, default=50, help="cases checked against circuits")
+    args = parser.parse_args(argv)
+
+    solution = ch.load_solution(ch.get_challenge("algorithms_300_AdderQFT"))
+    mismatches = validate(solution.module.qfunc_adder, args.cases)
+    print(f"{args.cases - len(mismatches)}/{args.cases} cases match the sampled circuit")
+    for m, value, n_wires in mismatches:
+        print(f"MISMATCH m={m} input={value} wires={n_wires}")
+
+    start = time.perf_counter()
+    sampled_adder(solution.module.qfunc_adder, 5, 3, 6)
+    circuit_seconds = time.perf_counter() - start
+    print(f"sampled circuit, 6 wires: {1 / circuit_seconds:12.0f} additions/s")
+
+    for n_wires in args.wires:
+        m, inputs = _random_additions(args.additions, n_wires)
+        start = time.perf_counter()
+        output_bits(batched_adder(m, inputs, n_wires), n_wires)
+        seconds = time.perf_counter() - start
+        print(f"batched, {n_wires:4d} wires:     {args.additions / seconds:12.0f} additions/s")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
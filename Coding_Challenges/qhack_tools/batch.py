@@ -0,0 +1,99 @@
+#! /usr/bin/python3
+"""Runs many stdin cases of one challenge in a single process.
+
+Every non-blank line read from stdin is one case, i.e. what would otherwise be piped
+into ``python <solution>.py``. It is fed through the solution's unmodified ``__main__``
+block, and the block's output is written to stdout as soon as it is available, in input
+order. The output of every case is byte-identical to a single-case run, so it can be
+compared with ``#.ans`` files as is.
+
+If a case raises, its traceback goes to stderr, an empty line takes the place of its
+output and the command exits with status 1 after the remaining cases.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.batch qchem_500_MindTheGap < bond_lengths.txt
+    python -m qhack_tools.batch order_matters -j 4 --reuse-qnodes < angles.txt
+"""
+import argparse
+import multiprocessing
+import sys
+import traceback
+
+from qhack_tools import cache as result_cache
+from qhack_tools import challenges as ch
+from qhack_tools import options
+
+# Solution loaded by the parent before the pool is forked.
+_SOLUTION = []
+
+
+def _run_case(payload):
+    try:
+        return True, ch.run_solution(_SOLUTION[0], payload)
+    except Exception:  # pylint: disable=broad-except
+        return False, traceback.format_exc()
+
+
+def run_batch(solution, payloads, jobs=1):
+    """Runs a solution on a sequence of stdin payloads.
+
+    Args:
+        - solution (Solution): loaded solution, see :func:`challenges.load_solution`
+        - payloads (iterable(str)): stdin payloads, consumed lazily
+        - jobs (int): number of forked worker processes
+
+    Yields:
+        - (bool): whether the case ran successfully
+        - (str): the stdout of the case, or the traceback if it raised
+    """
+
+    _SOLUTION[:] = [solution]
+    if jobs == 1:
+        for payload in payloads:
+            yield _run_case(payload)
+        return
+
+    pool = multiprocessing.get_context("fork").Pool(jobs)
+    try:
+        yield from pool.imap(_run_case, payloads)
+    finally:
+        # closed rather than terminated, so that the workers run their exit hooks
+        pool.close()
+        pool.join()
+
+
+def _read_cases(stream):
+    for line in stream:
+        line = line.rstrip("\n")
+        if line.strip():
+            yield line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("challenge", help="challenge, directory or script name")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes")
+    options.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    cache = options.configure(args)
+    solution = ch.load_solution(ch.get_challenge(args.challenge))
+    if cache is not None:
+        result_cache.install(solution, cache)
+
+    status = 0
+    for number, (ok, output) in enumerate(run_batch(solution, _read_cases(sys.stdin), args.jobs), 1):
+        if ok:
+            sys.stdout.write(output)
+        else:
+            sys.stderr.write(f"case {number}:\n{output}")
+            sys.stdout.write("\n")
+            status = 1
+        sys.stdout.flush()
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
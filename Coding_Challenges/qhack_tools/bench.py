@@ -0,0 +1,404 @@
+#! /usr/bin/python3
+"""Benchmarks every solution and gates changes against a stored JSON baseline.
+
+Each challenge is run on its sample ``#.in`` files and on a few scaled-up synthetic
+inputs, followed by the library workloads of :data:`WORKLOADS` (e.g. routing random
+circuits, batched QFT additions). Every solution or workload module is loaded in a child
+process of its own, and every entry runs in a process forked from that child, so that
+what one challenge loads never shows in another's metrics. Each entry records:
+
+    - seconds: wall time of the ``__main__`` block (or of the workload)
+    - executions: number of circuit executions on any PennyLane qubit device, including
+      the extra executions made by gradient rules
+    - peak_rss_kb: peak resident set size of the process
+
+``--save`` stores the results as the new baseline. Otherwise the run is compared with
+the baseline and the command fails if any entry regresses by more than ``--threshold``
+(relative), ignoring timing differences below ``--min-seconds``.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.bench --save                 # record a baseline
+    python -m qhack_tools.bench                        # compare against it
+    python -m qhack_tools.bench games_300_Elitzur_Vaidman --no-synthetic
+    python -m qhack_tools.bench routing                # only the routing workloads
+    python -m qhack_tools.bench --reuse-qnodes         # with the device / QNode cache
+    python -m qhack_tools.bench --statevector          # on the kernel device
+"""
+import argparse
+import functools
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import traceback
+
+from qhack_tools import challenges as ch
+from qhack_tools import options
+from qhack_tools.profiler import Profiler
+
+DEFAULT_BASELINE = os.path.join(ch.ROOT, "bench_baseline.json")
+METRICS = ("seconds", "executions", "peak_rss_kb")
+
+
+def _floats(rng, n, low, high):
+    return ",".join(repr(rng.uniform(low, high)) for _ in range(n))
+
+
+def _ints(rng, n, low, high):
+    return ",".join(str(rng.randint(low, high)) for _ in range(n))
+
+
+def _ising_configs(rng):
+    rows = []
+    for _ in range(250):
+        spins = [rng.randint(0, 1) for _ in range(4)]
+        label = 1 if abs(sum(2 * s - 1 for s in spins)) >= 2 else -1
+        rows.append(",".join(map(str, spins + [label])))
+    return ",".join(rows)
+
+
+def _beatles_dataset(rng, rows):
+    data = [str(rng.randint(10, 70)), str(rng.randint(0, 300)), "3"]
+    for _ in range(rows):
+        data += [str(rng.randint(10, 70)), str(rng.randint(0, 300)), rng.choice(["YES", "NO"])]
+    return ",".join(data)
+
+
+def _pauli_words(rng, n_wires, n_words):
+    words = [rng.choice("IXYZ") for _ in range(n_wires * n_words)]
+    return f"{n_wires}," + ",".join(words)
+
+
+def _givens_amplitudes(rng):
+    amplitudes = [rng.uniform(-1, 1) for _ in range(4)]
+    norm = sum(a ** 2 for a in amplitudes) ** 0.5
+    return ",".join(repr(a / norm) for a in amplitudes)
+
+
+# Scaled-up inputs in each problem's stdin format, as {challenge: [(label, generator)]}.
+# Generators receive a seeded ``random.Random`` so that the inputs never change.
+SYNTHETIC_INPUTS = {
+    "algorithms_100_DeutschJozsa": [("64_cnots", lambda rng: _ints(rng, 64, 0, 1))],
+    "algorithms_200_AdaptingTopology": [("far_pair", lambda rng: "0,6")],
+    "algorithms_300_AdderQFT": [("12_wires", lambda rng: f"{rng.randint(0, 4095)},12")],
+    "algorithms_400_QuantumCounting": [("8_solutions", lambda rng: "0,2,4,6,8,10,12,14")],
+    "algorithms_500_DeutschJozsaStrikesAgain": [("random", lambda rng: _ints(rng, 8, 0, 1))],
+    "games_100_TardigradeMasquerade": [("random", lambda rng: _floats(rng, 1, 0, 6.28))],
+    "games_200_CHSH": [("random", lambda rng: _floats(rng, 2, 0.1, 1))],
+    "games_300_Elitzur_Vaidman": [("10_bombs", lambda rng: "1.0,10")],
+    "games_400_FindTheCar": [("door_3", lambda rng: "1,1")],
+    "games_500_switches": [("12_switch_flips", lambda rng: _ints(rng, 12, 0, 2))],
+    "pennylane101_100_OrderMatters": [("random", lambda rng: _floats(rng, 2, 0, 6.28))],
+    "pennylane101_200_KnowYourDevices": [
+        ("8_wires", lambda rng: "8," + _floats(rng, 16, 0, 6.28)),
+    ],
+    "pennylane101_300_superdense_coding": [
+        ("random", lambda rng: f"{rng.randint(0, 3)},{rng.uniform(0, 1.57)!r}"),
+    ],
+    "pennylane101_400_FiniteDifferenceGradient": [("random", lambda rng: _floats(rng, 6, 0.1, 1))],
+    "pennylane101_500_BitflipErrorCode": [
+        ("random", lambda rng: f"{rng.uniform(0, 1)!r},{rng.uniform(0, 1)!r},{rng.randint(0, 2)}"),
+    ],
+    "qchem_100_IsParticlePreserving": [
+        (
+            "6_wires",
+            lambda rng: "6;DoubleExcitation;0,1,2,3;0.5;SingleExcitation;4,5;0.3;"
+            "DoubleExcitation;2,3,4,5;1.1;SingleExcitation;0,5;0.7",
+        ),
+    ],
+    "qchem_200_OptimizingMeasurements": [("6x40_words", lambda rng: _pauli_words(rng, 6, 40))],
+    "qchem_300_Universality_Givens": [("random", _givens_amplitudes)],
+    "qchem_400_TripleGivens": [("random", lambda rng: _floats(rng, 3, 0, 6.28))],
+    "qchem_500_MindTheGap": [("random", lambda rng: _floats(rng, 1, 0.4, 1.0))],
+    "qml_100_GeneratingFourierState": [("4_qubits", lambda rng: "4,5")],
+    "qml_200_WhoLikesTheBeatles": [("30_rows", lambda rng: _beatles_dataset(rng, 30))],
+    "qml_300_IsingOnTheCake": [("random", _ising_configs)],
+    "qml_400_BuildingQRAM": [("random", lambda rng: _floats(rng, 8, 0, 6.28))],
+    "qml_500_UDMIS": [("8_vertices", lambda rng: _floats(rng, 16, 0, 3))],
+}
+
+# Library workloads benchmarked next to the solutions, as {name: module}. Every module has
+# a ``benchmark_workloads()`` function returning ``(label, callable)`` pairs; its entries
+# are named ``<name>/<label>``.
+WORKLOADS = {
+    "adder": "qhack_tools.adder",
+    "chsh": "qhack_tools.chsh",
+    "counting": "qhack_tools.counting",
+    "elitzur": "qhack_tools.elitzur",
+    "oracles": "qhack_tools.oracles",
+    "routing": "qhack_tools.routing",
+}
+
+
+def benchmark_entries(challenge, synthetic=True):
+    """Lists the inputs a challenge is benchmarked on.
+
+    Args:
+        - challenge (Challenge): the challenge
+        - synthetic (bool): whether to include the scaled-up synthetic inputs
+
+    Returns:
+        - (list(tuple(str, str))): ``(entry name, stdin payload)`` pairs
+    """
+
+    entries = []
+    for case in challenge.cases:
+        payload, _ = ch.read_case(case)
+        entries.append((f"{challenge.name}/{case.name}", payload))
+
+    if synthetic:
+        for label, generator in SYNTHETIC_INPUTS.get(challenge.name, []):
+            rng = random.Random(f"{challenge.name}/{label}")
+            entries.append((f"{challenge.name}/{label}", generator(rng)))
+
+    return entries
+
+
+def _measure(function, connection):
+    try:
+        with Profiler() as profiler:
+            start = time.perf_counter()
+            function()
+            seconds = time.perf_counter() - start
+        result = {
+            "seconds": seconds,
+            "executions": profiler.executions,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+    except Exception:  # pylint: disable=broad-except
+        result = {"error": traceback.format_exc().strip().splitlines()[-1]}
+
+    connection.send(result)
+    connection.close()
+
+
+def run_entry(solution, payload):
+    """Runs one benchmark entry in a forked child process.
+
+    Args:
+        - solution (Solution): loaded solution, see :func:`challenges.load_solution`
+        - payload (str): stdin payload
+
+    Returns:
+        - (dict): the measured metrics, or ``{"error": message}`` if the solution raised
+    """
+
+    return _run_forked(functools.partial(ch.run_solution, solution, payload))
+
+
+def _run_forked(function):
+    return _forked(_measure, function)
+
+
+def _forked(target, *args):
+    """Runs ``target(*args, connection)`` in a forked child and returns what it sends."""
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=target, args=args + (sender,))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": "benchmark process died"}
+    process.join()
+
+    return result
+
+
+def _run_isolated(load, names, report, connection):
+    # everything the entries need is loaded here, in a child of its own: a forked entry
+    # inherits the memory of its parent, so its peak RSS must not depend on what else
+    # was loaded before it
+    try:
+        runners = load()
+    except Exception:  # pylint: disable=broad-except
+        error = {"error": traceback.format_exc().strip().splitlines()[-1]}
+        runners = dict.fromkeys(names)
+
+    results = {}
+    for name, runner in runners.items():
+        results[name] = error if runner is None else _run_forked(runner)
+        if report is not None:
+            report(name, results[name])
+
+    connection.send(results)
+    connection.close()
+
+
+def _run_group(load, names, report):
+    """Runs the ``{name: callable}`` entries returned by ``load`` in a child process.
+
+    ``names`` are the entries reported as failed if ``load`` raises or the child dies.
+    """
+
+    results = _forked(_run_isolated, load, names, report)
+    if "error" in results:
+        return {name: results for name in names}
+    return results
+
+
+def run_benchmarks(selected, synthetic=True, report=None):
+    """Benchmarks the selected challenges.
+
+    Every challenge's solution is loaded in a child process of its own, which forks one
+    process per entry, so the metrics of an entry do not depend on the other challenges.
+
+    Args:
+        - selected (list(Challenge)): challenges to benchmark
+        - synthetic (bool): whether to include the scaled-up synthetic inputs
+        - report (callable): called with ``(entry name, result)`` after every entry, in
+          the child process of the challenge
+
+    Returns:
+        - (dict(str, dict)): metrics for every entry, keyed by entry name
+    """
+
+    results = {}
+    for challenge in selected:
+        entries = dict(benchmark_entries(challenge, synthetic))
+
+        def load(challenge=challenge, entries=entries):
+            solution = ch.load_solution(challenge)
+            return {
+                name: functools.partial(ch.run_solution, solution, payload)
+                for name, payload in entries.items()
+            }
+
+        results.update(_run_group(load, list(entries), report))
+
+    return results
+
+
+def run_workloads(names, report=None):
+    """Benchmarks library workloads.
+
+    As for the challenges, every workload module is imported, and its workloads built, in
+    a child process of its own.
+
+    Args:
+        - names (list(str)): keys of :data:`WORKLOADS`
+        - report (callable): called with ``(entry name, result)`` after every entry, in
+          the child process of the module
+
+    Returns:
+        - (dict(str, dict)): metrics for every entry, keyed by entry name
+    """
+
+    results = {}
+    for name in names:
+
+        def load(name=name):
+            module = importlib.import_module(WORKLOADS[name])
+            return {f"{name}/{label}": work for label, work in module.benchmark_workloads()}
+
+        # the workload labels are only known in the child, a failure is reported by module
+        results.update(_run_group(load, [name], report))
+
+    return results
+
+
+def find_regressions(results, baseline, threshold, min_seconds):
+    """Compares benchmark results with a baseline.
+
+    Args:
+        - results (dict(str, dict)): output of :func:`run_benchmarks`
+        - baseline (dict(str, dict)): previously saved results
+        - threshold (float): allowed relative increase of every metric
+        - min_seconds (float): timing differences below this are never regressions
+
+    Returns:
+        - (list(str)): one description per regressed entry and metric
+    """
+
+    regressions = []
+    for name, result in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None or "error" in reference:
+            continue
+        if "error" in result:
+            regressions.append(f"{name}: {result['error']}")
+            continue
+
+        for metric in METRICS:
+            new, old = result[metric], reference[metric]
+            if new <= old * (1 + threshold):
+                continue
+            if metric == "seconds" and new - old < min_seconds:
+                continue
+            regressions.append(f"{name}: {metric} {old:g} -> {new:g}")
+
+    return regressions
+
+
+def _print_result(name, result):
+    if "error" in result:
+        print(f"{name:60s} ERROR {result['error']}", flush=True)
+        return
+
+    print(
+        f"{name:60s} {result['seconds']:9.3f}s {result['executions']:9d} exec "
+        f"{result['peak_rss_kb'] / 1024:8.1f} MB",
+        flush=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "challenges", nargs="*", help="challenges or workloads to benchmark (default: all)"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignored timing noise")
+    parser.add_argument("--no-synthetic", action="store_true", help="only run the sample inputs")
+    options.add_arguments(parser, cache=False)
+    args = parser.parse_args(argv)
+
+    options.configure(args)
+
+    workloads = [name for name in args.challenges if name in WORKLOADS]
+    names = [name for name in args.challenges if name not in WORKLOADS]
+    results = {}
+    if names or not workloads:
+        selected = ch.select_challenges(names)
+        results.update(run_benchmarks(selected, not args.no_synthetic, report=_print_result))
+    if not args.challenges:
+        workloads = list(WORKLOADS)
+    results.update(run_workloads(workloads, report=_print_result))
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"saved {len(results)} entries to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = find_regressions(results, baseline, args.threshold, args.min_seconds)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions against {args.baseline}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+#! /usr/bin/python3
+"""Parameter broadcasting: many executions of one circuit structure in one kernel pass.
+
+The variational challenges evaluate the same circuit many times with different numbers:
+the 250 Ising configurations (qml_300), the four ``(x, y)`` settings of the CHSH game
+(games_200), or the shifted copies of a tape that the parameter-shift rule runs. PennyLane
+0.21 has no parameter broadcasting, so each of those is a separate Python-level execution.
+
+Here the tapes of such a batch are grouped by structure (operations, wires, parameter
+shapes and measurements). The parameters of every group are stacked along a leading batch
+dimension and the group is run as a single pass of the :mod:`.statevector` kernels.
+Everything goes through ``autograd.numpy``, so results can be differentiated by
+backpropagation:
+
+    - :class:`BroadcastQNode` evaluates a quantum function on a batch of arguments
+    - :func:`execute_tapes` runs a list of tapes and returns one result per tape, in the
+      same format as a PennyLane device
+    - :func:`param_shift_jacobian` runs all the shifted tapes of the parameter-shift rule
+      in one pass
+
+The solution scripts must stay self-contained, so they batch inline instead of importing
+this module: qml_300 reads all its configurations off one unitary of its layers, and
+games_200 contracts the four settings at once. qml_500 and qchem_500 optimize a single
+parameter vector step after step, with backpropagated gradients, so they have no batch to
+broadcast. This module is the general path, for the harness and for experiments.
+
+Results are exact (no shots). Measurements may be ``expval``, ``var``, ``probs`` or
+``state``. The circuits may start with ``BasisState`` or ``QubitStateVector``.
+
+Example (from the ``Coding_Challenges`` directory)::
+
+    from qhack_tools.broadcast import BroadcastQNode
+
+    def circuit(weights, x):
+        qml.BasisState(x, wires=[0, 1, 2, 3])
+        ...
+        return qml.expval(qml.PauliZ(0))
+
+    predictions = BroadcastQNode(circuit, wires=4, batch_argnums=(1,))(weights, configs)
+"""
+from collections import OrderedDict
+
+import autograd.numpy as anp
+import numpy as onp
+
+from qhack_tools import statevector
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+
+class BroadcastQNode:
+    """Quantum function evaluated on a batch of arguments in one kernel pass.
+
+    Args:
+        - func (callable): quantum function, or a QNode whose quantum function is used
+        - wires (int or Iterable): number or labels of the wires, by default those of the
+          QNode's device
+        - batch_argnums (tuple(int)): positional arguments carrying a leading batch
+          dimension; the others are shared by the whole batch
+
+    Calling it returns an array with a leading batch dimension, with the shape the
+    QNode's output would have for every batch entry.
+    """
+
+    def __init__(self, func, wires=None, batch_argnums=(0,)):
+        if wires is None:
+            device = getattr(func, "device", None)
+            if device is None:
+                raise ValueError("wires are required unless func is a QNode")
+            wires = device.wires
+
+        self.func = getattr(func, "func", func)
+        self.wires = qml.wires.Wires(range(wires) if isinstance(wires, int) else wires)
+        self.batch_argnums = tuple(batch_argnums)
+        self.tapes = []
+        self._output = None
+
+    def __call__(self, *args, **kwargs):
+        sizes = {len(args[argnum]) for argnum in self.batch_argnums}
+        if len(sizes) != 1:
+            raise ValueError(f"batched arguments have different lengths {sorted(sizes)}")
+
+        self.tapes = []
+        for index in range(sizes.pop()):
+            entry = [
+                arg[index] if argnum in self.batch_argnums else arg
+                for argnum, arg in enumerate(args)
+            ]
+            self.tapes.append(self.construct(entry, kwargs))
+
+        groups = _group(self.tapes)
+        if len(groups) == 1:
+            results = _execute_group(self.tapes, self.wires)
+        else:
+            results = anp.stack(execute_tapes(self.tapes, self.wires))
+
+        if isinstance(self._output, qml.measure.MeasurementProcess):
+            return results[:, 0]
+        return results
+
+    def construct(self, args, kwargs):
+        """Records the tape of one batch entry."""
+
+        with qml.tape.QuantumTape() as tape:
+            self._output = self.func(*args, **kwargs)
+
+        return tape
+
+
+def execute_tapes(tapes, wires):
+    """Executes tapes, running every group of structurally identical tapes in one pass.
+
+    Args:
+        - tapes (list(qml.tape.QuantumTape)): the tapes
+        - wires (int or Iterable): number or labels of the wires
+
+    Returns:
+        - (list(array)): result of every tape, as a PennyLane device returns it
+    """
+
+    wires = qml.wires.Wires(range(wires) if isinstance(wires, int) else wires)
+    results = [None] * len(tapes)
+    for indices in _group(tapes).values():
+        group_results = _execute_group([tapes[i] for i in indices], wires)
+        for position, index in enumerate(indices):
+            results[index] = group_results[position]
+
+    return results
+
+
+def param_shift_jacobian(tape, wires, **kwargs):
+    """Parameter-shift Jacobian of a tape, with all shifted tapes run in one pass.
+
+    Args:
+        - tape (qml.tape.JacobianTape): the tape, with its trainable parameters set
+        - wires (int or Iterable): number or labels of the wires
+        - kwargs: passed on to ``qml.gradients.param_shift``, e.g. ``shift``
+
+    Returns:
+        - (array): Jacobian of shape ``(outputs, trainable parameters)``
+    """
+
+    tapes, processing_fn = qml.gradients.param_shift(tape, **kwargs)
+    return processing_fn(execute_tapes(tapes, wires))
+
+
+def _signature(tape):
+    operations = tuple(
+        (
+            op.name,
+            tuple(op.wires),
+            tuple(anp.shape(param) for param in op.parameters),
+        )
+        for op in tape.operations
+    )
+    measurements = tuple(
+        (m.return_type, tuple(m.wires), _observable_signature(m.obs)) for m in tape.measurements
+    )
+    return operations, measurements
+
+
+def _observable_signature(observable):
+    """Structure of an observable: the name, wires and parameter shapes of every term."""
+
+    if observable is None:
+        return None
+    if isinstance(observable, qml.Hamiltonian):
+        return ("Hamiltonian", len(observable.data)) + tuple(
+            _observable_signature(term) for term in observable.ops
+        )
+    if isinstance(observable, qml.operation.Tensor):
+        return ("Tensor",) + tuple(_observable_signature(factor) for factor in observable.obs)
+
+    shapes = tuple(anp.shape(param) for param in observable.parameters)
+    return observable.name, tuple(observable.wires), shapes
+
+
+def _observable_data(observable):
+    """Numbers of an observable, including the coefficients and terms of a Hamiltonian."""
+
+    if isinstance(observable, qml.Hamiltonian):
+        return list(observable.data) + [
+            value for term in observable.ops for value in _observable_data(term)
+        ]
+    if isinstance(observable, qml.operation.Tensor):
+        return [value for factor in observable.obs for value in _observable_data(factor)]
+    return list(observable.parameters)
+
+
+def _group(tapes):
+    groups = OrderedDict()
+    for index, tape in enumerate(tapes):
+        # tapes measuring observables with different numbers (e.g. Hamiltonian
+        # coefficients) share the structure but not the measurement: they form
+        # groups of their own, told apart by a counter
+        signature, variant = _signature(tape), 0
+        while (signature, variant) in groups and not _same_observables(
+            tapes[groups[signature, variant][0]], tape
+        ):
+            variant += 1
+        groups.setdefault((signature, variant), []).append(index)
+    return groups
+
+
+def _same_observables(first, second):
+    for a, b in zip(first.measurements, second.measurements):
+        if a.obs is not None and not all(
+            _same(column) for column in zip(_observable_data(a.obs), _observable_data(b.obs))
+        ):
+            return False
+    return True
+
+
+def _is_box(value):
+    return hasattr(value, "_value") and hasattr(value, "_node")
+
+
+def _same(values):
+    first = values[0]
+    if all(value is first for value in values):
+        return True
+    if any(_is_box(value) for value in values):
+        return False
+    return all(onp.array_equal(value, first) for value in values[1:])
+
+
+def _batched_parameters(operations):
+    """Stacks the parameters of the same operation across a batch of tapes.
+
+    Returns ``None`` if the parameters are shared by the whole batch.
+    """
+
+    columns = list(zip(*(op.parameters for op in operations)))
+    if all(_same(column) for column in columns):
+        return None
+
+    return [
+        column[0] if _same(column) else anp.stack([statevector.plain(v) for v in column])
+        for column in columns
+    ]
+
+
+def _initial_state(operations, wires):
+    """Batched state prepared by a leading ``BasisState`` / ``QubitStateVector``."""
+
+    batch, n_wires = len(operations), len(wires)
+    first = operations[0]
+    axes = wires.indices(first.wires)
+
+    if isinstance(first, qml.BasisState):
+        bits = onp.array([onp.asarray(op.parameters[0]) for op in operations], dtype=int)
+        powers = 2 ** (n_wires - 1 - onp.array(axes))
+        state = onp.zeros((batch, 2 ** n_wires), dtype=complex)
+        state[onp.arange(batch), bits @ powers] = 1
+        return onp.reshape(state, (batch,) + (2,) * n_wires)
+
+    vectors = [op.parameters[0] for op in operations]
+    vectors = statevector.plain(vectors[0]) if _same(vectors) else anp.stack(vectors)
+    vectors = anp.reshape(vectors, (-1, 2 ** len(axes), 1)) + 0j
+    # |vector> (x) |0...0>, with a shared vector broadcast to the whole batch
+    zeros = onp.zeros((batch, 2 ** len(axes), 2 ** (n_wires - len(axes))), dtype=complex)
+    state = anp.concatenate([vectors + zeros[..., :1], zeros[..., 1:]], axis=-1)
+    state = anp.reshape(state, (batch,) + (2,) * n_wires)
+
+    # the prepared wires come first, the others keep their order
+    order = list(axes) + [axis for axis in range(n_wires) if axis not in axes]
+    return anp.transpose(state, [0] + [1 + order.index(axis) for axis in range(n_wires)])
+
+
+def _measure(state, measurement, wires):
+    return_type = measurement.return_type
+    batch = state.shape[0]
+
+    if return_type is qml.measure.State:
+        return anp.reshape(state, (batch, -1))
+
+    if return_type is qml.measure.Probability:
+        axes = wires.indices(measurement.wires) if measurement.wires else range(len(wires))
+        flat, _ = statevector._moved(anp.abs(state) ** 2, list(axes))
+        return anp.sum(flat, axis=1)
+
+    observable = measurement.obs
+    expvals = statevector.observable_expvals(state, observable, wires)
+    if return_type is qml.measure.Expectation:
+        return expvals
+
+    if return_type is qml.measure.Variance and observable.name != "Hamiltonian":
+        factors = (
+            observable.obs if isinstance(observable, qml.operation.Tensor) else [observable]
+        )
+        applied = state
+        for factor in factors:
+            applied = statevector.apply_operation(applied, factor, wires.indices(factor.wires))
+        squares = anp.sum(anp.reshape(anp.abs(applied) ** 2, (batch, -1)), axis=1)
+        return squares - expvals ** 2
+
+    raise ValueError(f"{return_type} of {observable.name} cannot be broadcast")
+
+
+def _execute_group(tapes, wires):
+    """Runs structurally identical tapes as one batch.
+
+    Returns:
+        - (array): results with a leading batch dimension, each in device format
+    """
+
+    batch, n_wires = len(tapes), len(wires)
+    columns = list(zip(*(tape.operations for tape in tapes)))
+
+    if columns and isinstance(columns[0][0], (qml.BasisState, qml.QubitStateVector)):
+        state = _initial_state(columns.pop(0), wires)
+    else:
+        state = onp.zeros((batch,) + (2,) * n_wires, dtype=complex)
+        state[(slice(None),) + (0,) * n_wires] = 1
+
+    for operations in columns:
+        operation = operations[0]
+        axes = wires.indices(operation.wires)
+        params = _batched_parameters(operations)
+
+        name = getattr(operation, "base_name", operation.name)
+        if params is None or statevector.has_kernel(name):
+            state = statevector.apply_operation(state, operation, axes, params=params)
+        else:
+            matrices = anp.stack([op.matrix for op in operations])
+            state = statevector.apply_matrix(state, matrices, axes)
+
+    # the group shares its observables' structure (see _signature); their numbers must
+    # match as well, since every tape is measured with the observables of the first
+    for measurements in zip(*(tape.measurements for tape in tapes)):
+        observables = [measurement.obs for measurement in measurements]
+        if observables[0] is not None and not all(
+            _same(column) for column in zip(*(_observable_data(obs) for obs in observables))
+        ):
+            raise ValueError(f"{observables[0].name} differs across the batch")
+
+    results = [_measure(state, measurement, wires) for measurement in tapes[0].measurements]
+    if all(anp.ndim(result) == 1 for result in results) or len(results) == 1:
+        return anp.stack(results, axis=1)
+
+    return anp.concatenate([anp.reshape(result, (batch, -1)) for result in results], axis=1)
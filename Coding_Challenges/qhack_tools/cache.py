@@ -0,0 +1,337 @@
+#! /usr/bin/python3
+"""Content-addressed on-disk cache for the results of the solutions' entry functions.
+
+:func:`install` wraps the functions a solution's ``__main__`` block calls
+(``ground_state_VQE``, ``optimize``, ``classify_ising_data``, ...). A call is keyed by
+the sha256 of the challenge name, the solution's source, the PennyLane version, the
+function name and the canonicalized arguments (floating-point values rounded to
+``SIGNIFICANT_DIGITS``); a repeated call returns the stored value
+(and replays what the function printed) without running it again.
+
+Arguments that cannot be canonicalized (callables such as the Deutsch-Jozsa oracles,
+autograd boxes while differentiating) bypass the cache, as do calls made from inside
+another cached call. Entries are pickled under ``$QHACK_CACHE_DIR`` (default
+``~/.cache/qhack``) and the least recently used ones are evicted once the store
+exceeds its size bound (``$QHACK_CACHE_MAX_MB``, default 64).
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.grader --cache
+    python -m qhack_tools.cache            # size of the store
+    python -m qhack_tools.cache --clear
+"""
+import argparse
+import functools
+import hashlib
+import inspect
+import io
+import os
+import pickle
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+from qhack_tools.startup import lazy_import
+
+np = lazy_import("numpy")
+qml = lazy_import("pennylane")
+
+DEFAULT_MAX_MB = 64
+
+# Floating-point arguments are compared to this many significant digits, and values
+# smaller than ZERO_TOLERANCE count as zero, so that results of numerically noisy
+# preprocessing (e.g. Hamiltonian coefficients) map to the same key in every process.
+SIGNIFICANT_DIGITS = 9
+ZERO_TOLERANCE = 1e-10
+
+
+class Uncacheable(Exception):
+    """Raised when an argument has no stable canonical form."""
+
+
+def default_cache_dir():
+    """Cache directory used when none is given: ``$QHACK_CACHE_DIR`` or ``~/.cache/qhack``."""
+
+    if os.environ.get("QHACK_CACHE_DIR"):
+        return os.environ["QHACK_CACHE_DIR"]
+
+    return os.path.join(os.path.expanduser("~"), ".cache", "qhack")
+
+
+class ResultCache:
+    """Size-bounded store of pickled results, evicting the least recently used first.
+
+    Args:
+        - directory (str): cache directory, defaults to :func:`default_cache_dir`
+        - max_bytes (int): size bound, defaults to ``$QHACK_CACHE_MAX_MB`` or 64 MB
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = os.path.join(directory or default_cache_dir(), "results")
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("QHACK_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".pkl")
+
+    def get(self, key):
+        """Looks up an entry and marks it as recently used.
+
+        Returns:
+            - (bool): whether the key was found
+            - (object): the stored value, or ``None``
+        """
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+        os.utime(path)
+        return True, value
+
+    def put(self, key, value):
+        """Stores an entry atomically, then evicts old entries beyond the size bound.
+
+        Values that cannot be pickled are silently not stored.
+        """
+
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+        self.evict()
+
+    def entries(self):
+        """Lists the stored entries as ``(last use, size, path)``, oldest first."""
+
+        entries = []
+        for directory, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        return sorted(entries)
+
+    def evict(self):
+        """Removes the least recently used entries until the store fits its size bound."""
+
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes every entry."""
+
+        for _, _, path in self.entries():
+            os.unlink(path)
+
+
+def canonicalize(value):
+    """Stable textual form of an argument, equal for equal inputs across processes.
+
+    Args:
+        - value (object): argument of a cached call
+
+    Returns:
+        - (str): canonical form
+
+    Raises:
+        - Uncacheable: for values without a stable canonical form
+    """
+
+    if value is None or isinstance(value, (bool, int, str, bytes)):
+        return f"{type(value).__name__}:{value!r}"
+
+    if isinstance(value, (float, complex)):
+        return f"{type(value).__name__}:{_round_floats(np.asarray(value))}"
+
+    if isinstance(value, (list, tuple)):
+        items = ",".join(canonicalize(item) for item in value)
+        return f"{type(value).__name__}[{items}]"
+
+    if isinstance(value, dict):
+        items = sorted(f"{canonicalize(k)}={canonicalize(v)}" for k, v in value.items())
+        return "dict{" + ",".join(items) + "}"
+
+    if type(value).__module__.split(".")[0] == "autograd":
+        raise Uncacheable("autograd box")
+
+    if hasattr(value, "dtype") and hasattr(value, "tobytes") and hasattr(value, "shape"):
+        if value.dtype.kind == "O":
+            return f"array:object{tuple(value.shape)}:{canonicalize(value.tolist())}"
+        if value.dtype.kind in "fc":
+            data = _round_floats(np.asarray(value)).encode()
+        else:
+            data = value.tobytes()
+        digest = hashlib.sha256(data).hexdigest()
+        return f"array:{value.dtype}{tuple(value.shape)}:{digest}"
+
+    if type(value).__module__.split(".")[0] == "pennylane":
+        if isinstance(value, qml.Hamiltonian):
+            return f"Hamiltonian({canonicalize(list(value.coeffs))},{canonicalize(value.ops)})"
+        if isinstance(value, qml.operation.Tensor):
+            return f"Tensor({canonicalize(value.obs)})"
+        if isinstance(value, qml.operation.Operator):
+            wires = canonicalize(value.wires.tolist())
+            return f"{value.name}({canonicalize(value.parameters)},{wires})"
+
+    raise Uncacheable(type(value).__name__)
+
+
+def _round_floats(array):
+    if array.dtype.kind == "c":
+        array = np.stack([array.real, array.imag], axis=-1)
+    array = np.where(np.abs(array) < ZERO_TOLERANCE, 0.0, array)
+
+    return " ".join(np.char.mod(f"%.{SIGNIFICANT_DIGITS}g", array.ravel()))
+
+
+def source_hash(challenge):
+    """sha256 of the solution script, so that editing a solution invalidates its entries."""
+
+    with open(challenge.script, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def cache_key(namespace, name, args, kwargs):
+    """sha256 key of one call.
+
+    Args:
+        - namespace (str): challenge name, source hash and library versions
+        - name (str): function name
+        - args (tuple): positional arguments
+        - kwargs (dict): keyword arguments
+
+    Returns:
+        - (str): hex digest
+    """
+
+    text = f"{namespace}\n{name}\n{canonicalize(list(args))}\n{canonicalize(kwargs)}"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def entry_functions(solution):
+    """Names of the solution's own functions called from its ``__main__`` block."""
+
+    names = set()
+    codes = [solution.main_code]
+    while codes:
+        code = codes.pop()
+        names.update(code.co_names)
+        codes.extend(const for const in code.co_consts if inspect.iscode(const))
+
+    module = solution.module
+    return sorted(
+        name
+        for name in names
+        if inspect.isfunction(module.__dict__.get(name))
+        and module.__dict__[name].__module__ == module.__name__
+    )
+
+
+def install(solution, cache=None):
+    """Wraps the entry functions of a loaded solution with the result cache.
+
+    Args:
+        - solution (Solution): result of :func:`challenges.load_solution`
+        - cache (ResultCache): store to use, defaults to a :class:`ResultCache` in the
+          default directory
+
+    Returns:
+        - (list(str)): names of the wrapped functions
+    """
+
+    cache = cache or ResultCache()
+    namespace = f"{solution.challenge.name}\n{source_hash(solution.challenge)}"
+    if any(
+        inspect.ismodule(value) and value.__name__.split(".")[0] == "pennylane"
+        for value in solution.module.__dict__.values()
+    ):
+        namespace += f"\npennylane {qml.__version__}"
+
+    names = entry_functions(solution)
+    for name in names:
+        function = solution.module.__dict__[name]
+        solution.module.__dict__[name] = _cached(cache, namespace, function)
+
+    return names
+
+
+_depth = [0]
+
+
+def _cached(cache, namespace, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _depth[0]:
+            return function(*args, **kwargs)
+
+        try:
+            key = cache_key(namespace, function.__name__, args, kwargs)
+        except Uncacheable:
+            return function(*args, **kwargs)
+
+        hit, entry = cache.get(key)
+        if hit:
+            sys.stdout.write(entry["stdout"])
+            return entry["value"]
+
+        printed = io.StringIO()
+        _depth[0] += 1
+        try:
+            with redirect_stdout(printed):
+                value = function(*args, **kwargs)
+        finally:
+            _depth[0] -= 1
+            sys.stdout.write(printed.getvalue())
+
+        cache.put(key, {"value": value, "stdout": printed.getvalue()})
+        return value
+
+    return wrapper
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", help="cache directory (default: $QHACK_CACHE_DIR or ~/.cache/qhack)")
+    parser.add_argument("--clear", action="store_true", help="remove every entry")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.dir)
+    if args.clear:
+        cache.clear()
+
+    entries = cache.entries()
+    size = sum(size for _, size, _ in entries)
+    print(f"{len(entries)} entries, {size / 1024:.1f} kB in {cache.directory}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""Discovery and in-process execution of the Coding Challenge solutions.
+
+Every problem lives in a ``<category>_<points>_<problem>_template/`` directory holding
+the solution script, its ``<problem>_template.py`` starting point, the statement and
+the numbered ``#.in`` / ``#.ans`` sample pairs.
+
+A solution is loaded once: its module body is executed a single time and the body of
+its ``if __name__ == "__main__":`` block is compiled separately, so that any number of
+stdin payloads can be fed through the exact code the judge runs without paying the
+interpreter start-up and ``import pennylane`` cost again.
+"""
+import ast
+import glob
+import io
+import os
+import re
+import sys
+import types
+from collections import namedtuple
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_SUFFIX = "_template"
+
+# Relative tolerances listed in the "Specs" table of each problem.pdf. Problems that do
+# not list a tolerance require an exact match.
+TOLERANCES = {
+    "games_100_TardigradeMasquerade": 1e-4,
+    "games_200_CHSH": 1e-4,
+    "games_300_Elitzur_Vaidman": 0.05,
+    "pennylane101_100_OrderMatters": 1e-4,
+    "pennylane101_200_KnowYourDevices": 1e-4,
+    "pennylane101_300_superdense_coding": 1e-4,
+    "pennylane101_400_FiniteDifferenceGradient": 5e-3,
+    "pennylane101_500_BitflipErrorCode": 1e-4,
+    "qchem_200_OptimizingMeasurements": 1e-4,
+    "qchem_300_Universality_Givens": 1e-3,
+    "qchem_400_TripleGivens": 1e-4,
+    "qchem_500_MindTheGap": 1e-2,
+    "qml_100_GeneratingFourierState": 1e-3,
+    "qml_200_WhoLikesTheBeatles": 1e-3,
+    "qml_400_BuildingQRAM": 1e-3,
+    "qml_500_UDMIS": 1e-3,
+}
+
+# Problems judged on the fraction of matching outputs instead of value by value.
+ACCURACY_THRESHOLDS = {
+    "qml_300_IsingOnTheCake": 0.9,
+}
+
+Challenge = namedtuple("Challenge", ["name", "directory", "script", "cases"])
+Case = namedtuple("Case", ["name", "input_path", "answer_path"])
+Solution = namedtuple("Solution", ["challenge", "module", "main_code"])
+
+
+def find_challenges(root=ROOT):
+    """Finds every challenge directory below ``root``.
+
+    Args:
+        - root (str): directory containing the ``*_template/`` folders
+
+    Returns:
+        - (list(Challenge)): the challenges, sorted by name
+    """
+
+    challenges = []
+    for directory in sorted(glob.glob(os.path.join(root, "*" + TEMPLATE_SUFFIX))):
+        if not os.path.isdir(directory):
+            continue
+
+        scripts = [
+            path
+            for path in sorted(glob.glob(os.path.join(directory, "*.py")))
+            if not path.endswith(TEMPLATE_SUFFIX + ".py")
+        ]
+        if len(scripts) != 1:
+            continue
+
+        cases = []
+        for input_path in sorted(glob.glob(os.path.join(directory, "*.in")), key=_case_order):
+            answer_path = input_path[: -len(".in")] + ".ans"
+            if os.path.exists(answer_path):
+                cases.append(Case(os.path.basename(input_path), input_path, answer_path))
+
+        name = os.path.basename(directory)[: -len(TEMPLATE_SUFFIX)]
+        challenges.append(Challenge(name, directory, scripts[0], cases))
+
+    return challenges
+
+
+def get_challenge(name, root=ROOT):
+    """Looks up a single challenge.
+
+    Args:
+        - name (str): challenge name (``games_200_CHSH``), directory name or script name
+        (``CHSH_game`` / ``CHSH_game.py``)
+
+    Returns:
+        - (Challenge): the matching challenge
+    """
+
+    name = os.path.basename(os.path.normpath(name))
+    for challenge in find_challenges(root):
+        if name in aliases(challenge):
+            return challenge
+
+    raise KeyError(f"Unknown challenge '{name}'")
+
+
+def aliases(challenge):
+    """Returns every name a challenge can be referred to by."""
+
+    script = os.path.basename(challenge.script)
+    return (challenge.name, challenge.name + TEMPLATE_SUFFIX, script, script[: -len(".py")])
+
+
+def select_challenges(names=None, root=ROOT):
+    """Returns the challenges matching ``names``, or all of them if no names are given."""
+
+    if not names:
+        return find_challenges(root)
+
+    return [get_challenge(name, root) for name in names]
+
+
+def read_case(case):
+    """Reads the stdin payload and the expected output of a sample case.
+
+    Returns:
+        - (str): contents of the ``#.in`` file
+        - (str): contents of the ``#.ans`` file
+    """
+
+    with open(case.input_path) as f:
+        payload = f.read()
+    with open(case.answer_path) as f:
+        expected = f.read()
+
+    return payload, expected
+
+
+def load_solution(challenge):
+    """Executes the module body of a solution script once.
+
+    The ``__main__`` block is not run; it is compiled on its own so that it can be
+    executed for every stdin payload with :func:`run_solution`.
+
+    Args:
+        - challenge (Challenge): the challenge to load
+
+    Returns:
+        - (Solution): the loaded module together with its compiled ``__main__`` block
+    """
+
+    with open(challenge.script) as f:
+        source = f.read()
+
+    tree = ast.parse(source, filename=challenge.script)
+    body, main_body = [], []
+    for node in tree.body:
+        if _is_main_guard(node):
+            main_body.extend(node.body)
+        else:
+            body.append(node)
+
+    module = types.ModuleType(os.path.basename(challenge.script)[: -len(".py")])
+    module.__file__ = challenge.script
+
+    module_code = compile(ast.Module(body=body, type_ignores=[]), challenge.script, "exec")
+    main_code = compile(ast.Module(body=main_body, type_ignores=[]), challenge.script, "exec")
+    exec(module_code, module.__dict__)
+
+    return Solution(challenge, module, main_code)
+
+
+def run_solution(solution, payload):
+    """Feeds one stdin payload through the ``__main__`` block of a loaded solution.
+
+    Args:
+        - solution (Solution): result of :func:`load_solution`
+        - payload (str): what would be piped into ``python <solution>.py``
+
+    Returns:
+        - (str): everything the script printed to stdout
+    """
+
+    stdout = io.StringIO()
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(payload)
+    try:
+        with redirect_stdout(stdout):
+            exec(solution.main_code, solution.module.__dict__)
+    finally:
+        sys.stdin = saved_stdin
+
+    return stdout.getvalue()
+
+
+def compare_output(challenge, output, expected):
+    """Compares a solution's output with the expected answer the way the judge does.
+
+    Non-numeric values must match exactly; floating-point values must lie within the
+    problem's relative tolerance.
+
+    Args:
+        - challenge (Challenge): the challenge the output belongs to
+        - output (str): what the solution printed
+        - expected (str): contents of the ``#.ans`` file
+
+    Returns:
+        - (bool): whether the output is accepted
+        - (str): a short description of the first mismatch, or of the accuracy reached
+    """
+
+    actual, wanted = _tokens(output), _tokens(expected)
+    if len(actual) != len(wanted):
+        return False, f"expected {len(wanted)} values, got {len(actual)}"
+
+    threshold = ACCURACY_THRESHOLDS.get(challenge.name)
+    if threshold is not None:
+        matches = sum(_values_match(a, w, None) for a, w in zip(actual, wanted))
+        accuracy = matches / len(wanted)
+        return accuracy >= threshold, f"accuracy {accuracy:.3f}"
+
+    tolerance = TOLERANCES.get(challenge.name)
+    for i, (a, w) in enumerate(zip(actual, wanted)):
+        if not _values_match(a, w, tolerance):
+            return False, f"value {i}: expected {w}, got {a}"
+
+    return True, ""
+
+
+def _values_match(actual, wanted, tolerance):
+    try:
+        a, w = float(actual), float(wanted)
+    except ValueError:
+        return actual == wanted
+
+    if tolerance is None:
+        return a == w
+    if w == 0:
+        return abs(a) <= tolerance
+
+    return abs(a - w) <= tolerance * abs(w)
+
+
+def _tokens(text):
+    return [token for token in re.split(r"[,\s]+", text.strip()) if token]
+
+
+def _is_main_guard(node):
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+
+    test = node.test
+    names = [test.left] + test.comparators
+    return (
+        len(test.ops) == 1
+        and isinstance(test.ops[0], ast.Eq)
+        and any(isinstance(n, ast.Name) and n.id == "__name__" for n in names)
+        and any(isinstance(n, ast.Constant) and n.value == "__main__" for n in names)
+    )
+
+
+def _case_order(path):
+    stem = os.path.basename(path)[: -len(".in")]
+    return (0, int(stem), "") if stem.isdigit() else (1, 0, stem)
@@ -0,0 +1,306 @@
+#! /usr/bin/python3
+"""Fused evaluation of the CHSH game (games_200) and its analytic gradient.
+
+``winning_prob`` used to run ``chsh_circuit`` once per ``(x, y)`` setting, preparing the
+entangled state every time, and parameter-shift added 8 executions per optimizer step.
+The state and the measurement rotations are all real 2x2 objects:
+
+    - the state ``(alpha |00> + beta |11>) / norm`` is a 2x2 amplitude array ``psi``
+    - Alice's and Bob's rotations ``V(theta) = [[cos, -sin], [sin, cos]]`` are stacked
+      into an array of shape ``(4, 2, 2)``
+
+so the amplitudes of every setting are one contraction
+``amplitudes[x, y, a, b] = sum_ij A[x, a, i] B[y, b, j] psi[i, j]``. The derivative of
+``V`` is ``V(theta + pi / 2)``, so the gradient is the same contraction with one rotation
+replaced by its derivative. :func:`value_and_grad` returns both in one call, for one
+parameter set or a batch of them.
+
+``optimize`` descends from several random starts at once, as one batch: a single start
+can settle in a poor local optimum for some ``(alpha, beta)``. :func:`multistart` is the
+same driver on :func:`value_and_grad`; each start stops once its winning probability
+changes by less than the tolerance in one step, and the start with the best final
+parameters wins. The report compares the success rate of one and several starts against
+the optimum :func:`optimal_winning_prob` over random states.
+
+The optimum itself needs no optimizer. With ``sin(2 phi) = 2 alpha beta / norm**2``, the
+observable measured after ``V(theta)`` is ``cos(2 theta) Z - sin(2 theta) X``, and the
+state's only correlators are ``<ZZ> = 1`` and ``<XX> = sin(2 phi)``. Alice measuring
+``Z`` and ``X`` and Bob measuring between them at ``+-arctan(sin(2 phi))`` reaches the
+largest CHSH value. :func:`optimal_params` returns those angles for whole arrays of
+``(alpha, beta)`` at once, so a dense grid of states needs no table and no descent.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.chsh
+    python -m qhack_tools.chsh --states 200 --starts 1 8 32
+    python -m qhack_tools.chsh --grid 1000
+"""
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from qhack_tools import challenges as ch
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+# wins[x, y, a, b]: a == b wins unless x = y = 1, where a != b wins
+_SAME = np.eye(2)
+WINS = np.array([[_SAME, _SAME], [_SAME, 1 - _SAME]])
+
+
+def entangled_state(alpha, beta):
+    """Amplitudes of ``(alpha |00> + beta |11>) / norm``, indexed by the bits of wires 0, 1."""
+
+    return np.array([[alpha, 0.0], [0.0, beta]]) / np.sqrt(alpha ** 2 + beta ** 2)
+
+
+def rotations(params):
+    """``V(theta)`` of every angle, of shape ``params.shape + (2, 2)``."""
+
+    c, s = np.cos(params), np.sin(params)
+    return np.stack([np.stack([c, -s], axis=-1), np.stack([s, c], axis=-1)], axis=-2)
+
+
+def value_and_grad(params, alpha, beta):
+    """Winning probability and its gradient with respect to the four angles.
+
+    Args:
+        - params (np.ndarray): ``[theta_A0, theta_A1, theta_B0, theta_B1]``, or an array
+          of shape ``(batch, 4)``
+        - alpha (float): real coefficient of |00>
+        - beta (float): real coefficient of |11>
+
+    Returns:
+        - (float or np.ndarray): winning probability, of shape ``(batch,)`` for a batch
+        - (np.ndarray): gradient, of the shape of ``params``
+    """
+
+    params = np.asarray(params, dtype=float)
+    psi = entangled_state(alpha, beta)
+    v, dv = rotations(params), rotations(params + np.pi / 2)
+    alice, bob = v[..., :2, :, :], v[..., 2:, :, :]
+
+    amplitudes = np.einsum("...xai,...ybj,ij->...xyab", alice, bob, psi)
+    # d probs = 2 * amplitudes * d amplitudes, weighted by the winning outcomes
+    weighted = 2 * WINS * amplitudes / 4
+    d_alice = np.einsum("...xyab,...ybj,ij->...xai", weighted, bob, psi)
+    d_bob = np.einsum("...xyab,...xai,ij->...ybj", weighted, alice, psi)
+
+    grad = np.concatenate(
+        [
+            np.einsum("...xai,...xai->...x", d_alice, dv[..., :2, :, :]),
+            np.einsum("...ybj,...ybj->...y", d_bob, dv[..., 2:, :, :]),
+        ],
+        axis=-1,
+    )
+    value = np.sum(WINS * amplitudes ** 2, axis=(-4, -3, -2, -1)) / 4
+    return value, grad
+
+
+def optimal_winning_prob(alpha, beta):
+    """Best winning probability with the state ``cos(phi) |00> + sin(phi) |11>``.
+
+    The largest CHSH value of that state is ``2 * sqrt(1 + sin(2 * phi)**2)``, reached
+    with real rotations, and the winning probability is ``1/2 + CHSH / 8``.
+    """
+
+    sin_2phi = 2 * alpha * beta / (alpha ** 2 + beta ** 2)
+    return 0.5 + np.sqrt(1 + sin_2phi ** 2) / 4
+
+
+def optimal_params(alpha, beta):
+    """Angles reaching :func:`optimal_winning_prob`, without any optimization.
+
+    Args:
+        - alpha (float or np.ndarray): real coefficient of |00>
+        - beta (float or np.ndarray): real coefficient of |11>, broadcast against ``alpha``
+
+    Returns:
+        - (np.ndarray): ``[theta_A0, theta_A1, theta_B0, theta_B1]``, of shape
+          ``broadcast shape + (4,)``
+    """
+
+    alpha, beta = np.broadcast_arrays(np.asarray(alpha, dtype=float), np.asarray(beta, dtype=float))
+    # Bob's angle between Alice's Z and X, halved since V(theta) rotates the observable by 2 theta
+    half_mu = np.arctan(2 * alpha * beta / (alpha ** 2 + beta ** 2)) / 2
+    return np.stack(
+        [np.zeros_like(half_mu), np.full_like(half_mu, np.pi / 4), half_mu, -half_mu], axis=-1
+    )
+
+
+def multistart(alpha, beta, n_starts=8, steps=100, stepsize=0.4, conv_tol=1e-6, seed=0):
+    """Gradient ascent of the winning probability from several random starts at once.
+
+    The starts are drawn like the solution's, ``normal(0, pi)`` after ``seed``, so the
+    first one is the solution's former single start.
+
+    Args:
+        - alpha (float): real coefficient of |00>
+        - beta (float): real coefficient of |11>
+        - n_starts (int): number of random starts
+        - steps (int): maximum number of steps of every start
+        - stepsize (float): step size of the gradient descent on ``1 - P``
+        - conv_tol (float): a start stops once ``P`` changes by at most this in one step
+        - seed (int): seed of ``np.random.seed``
+
+    Returns:
+        - (float): best winning probability
+        - (np.ndarray): its parameters
+        - (int): number of steps, summed over the starts
+    """
+
+    np.random.seed(seed)
+    starts = np.random.normal(0, np.pi, (n_starts, 4))
+    values = np.full(n_starts, -np.inf)
+    active = np.arange(n_starts)
+    evaluations = 0
+
+    for _ in range(steps):
+        value, grad = value_and_grad(starts[active], alpha, beta)
+        evaluations += len(active)
+        starts[active] += stepsize * grad
+
+        stalled = np.abs(value - values[active]) <= conv_tol
+        values[active] = value
+        active = active[~stalled]
+        if not len(active):
+            break
+
+    # the best start, judged by its final parameters rather than by its last step's value
+    final = value_and_grad(starts, alpha, beta)[0]
+    best = np.argmax(final)
+    return final[best], starts[best], evaluations
+
+
+def circuit_winning_prob(module, params, alpha, beta):
+    """Winning probability from the solution's ``chsh_circuit``, one execution per setting."""
+
+    total = 0
+    for x in range(2):
+        for y in range(2):
+            probs = module.chsh_circuit(*params, x, y, alpha, beta)
+            total += probs[1] + probs[2] if x * y == 1 else probs[0] + probs[3]
+    return total / 4
+
+
+def benchmark_workloads():
+    """CHSH evaluations benchmarked by :mod:`.bench`, as ``(label, callable)`` pairs."""
+
+    params = np.random.default_rng(0).normal(0, np.pi, (10 ** 4, 4))
+
+    def single_calls():
+        for row in params[:1000]:
+            value_and_grad(row, 1.0, 1.0)
+
+    return [
+        ("value_and_grad_1e3_calls", single_calls),
+        ("value_and_grad_batch_1e4", lambda: value_and_grad(params, 1.0, 1.0)),
+        ("multistart_8_starts_100_states", lambda: [multistart(*row) for row in params[:100, :2]]),
+        ("optimal_params_1e4_states", lambda: optimal_params(params[:, 0], params[:, 1])),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=20, help="random parameter sets checked")
+    parser.add_argument("--states", type=int, default=500, help="random states optimized")
+    parser.add_argument("--starts", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--grid", type=int, default=1000, help="grid side of the lookup timing")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    module = ch.load_solution(ch.get_challenge("games_200_CHSH")).module
+    rng = np.random.default_rng(args.seed)
+    # backpropagating through the circuits' complex QubitUnitary matrices warns on every
+    # real parameter gradient
+    warnings.filterwarnings("ignore", category=np.ComplexWarning)
+
+    value_error = grad_error = 0.0
+    circuit_seconds = fused_seconds = 0.0
+    for _ in range(args.points):
+        params = rng.normal(0, np.pi, 4)
+        alpha, beta = rng.uniform(-1, 1, 2)
+
+        start = time.perf_counter()
+        expected = circuit_winning_prob(module, params, alpha, beta)
+        expected_grad = qml.grad(
+            lambda p: circuit_winning_prob(module, p, alpha, beta)
+        )(qml.numpy.array(params, requires_grad=True))
+        circuit_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        value, grad = value_and_grad(params, alpha, beta)
+        fused_seconds += time.perf_counter() - start
+
+        value_error = max(value_error, abs(value - expected))
+        grad_error = max(grad_error, np.max(np.abs(grad - expected_grad)))
+
+        # the solution's fused winning_prob agrees as well
+        value_error = max(value_error, abs(module.winning_prob(params, alpha, beta) - expected))
+
+    print(
+        f"{args.points} parameter sets: max |dP| {value_error:.1e}, max |dgrad| {grad_error:.1e}"
+    )
+    print(
+        f"value and gradient: circuits {circuit_seconds / args.points * 1e3:.2f} ms, "
+        f"fused {fused_seconds / args.points * 1e6:.1f} us per call"
+    )
+
+    batch = rng.normal(0, np.pi, (10 ** 5, 4))
+    start = time.perf_counter()
+    values, _ = value_and_grad(batch, 1.0, 1.0)
+    seconds = time.perf_counter() - start
+    print(f"batch of {len(batch)} parameter sets: {seconds * 1e3:.1f} ms, best {values.max():.6f}")
+
+    # reliability of the multi-start driver against the known optimum, with different
+    # random starts for every state
+    states = rng.uniform(-1, 1, (args.states, 2))
+    for n_starts in args.starts:
+        failures = evaluations = 0
+        start = time.perf_counter()
+        for index, (alpha, beta) in enumerate(states):
+            value, _, count = multistart(alpha, beta, n_starts, seed=index)
+            failures += abs(value - optimal_winning_prob(alpha, beta)) > 1e-4
+            evaluations += count
+        seconds = time.perf_counter() - start
+        print(
+            f"{n_starts:3d} starts: {failures}/{args.states} states off by more than 1e-4, "
+            f"{evaluations / args.states:.0f} steps and {seconds / args.states * 1e3:.2f} ms "
+            "per state"
+        )
+
+    start = time.perf_counter()
+    for alpha, beta in states[:10]:
+        module.optimize(alpha, beta)
+    print(f"solution optimize: {(time.perf_counter() - start) / 10 * 1e3:.1f} ms per state")
+
+    # the closed-form angles reach the optimum, with a vanishing gradient
+    optimum_error = 0.0
+    for (alpha, beta), params in zip(states, optimal_params(states[:, 0], states[:, 1])):
+        value, grad = value_and_grad(params, alpha, beta)
+        optimum_error = max(
+            optimum_error, abs(value - optimal_winning_prob(alpha, beta)), np.max(np.abs(grad))
+        )
+    print(f"closed-form angles: max |dP|, |grad| {optimum_error:.1e}")
+
+    axis = np.linspace(-1, 1, args.grid)
+    # (0, 0) is not a state
+    alpha, beta = np.meshgrid(axis, axis[axis != 0])
+    start = time.perf_counter()
+    optimal_params(alpha, beta)
+    optimal_winning_prob(alpha, beta)
+    seconds = time.perf_counter() - start
+    print(
+        f"grid of {alpha.size} states: {seconds * 1e3:.1f} ms, "
+        f"{seconds / alpha.size * 1e9:.0f} ns per state"
+    )
+
+    return 1 if max(value_error, grad_error, optimum_error) > 1e-10 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
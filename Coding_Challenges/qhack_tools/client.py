@@ -0,0 +1,59 @@
+#! /usr/bin/python3
+"""Thin client for the resident solver, standing in for ``python <solution>.py < #.in``.
+
+Usage (from the ``Coding_Challenges`` directory, with ``qhack_tools.daemon`` running)::
+
+    python -m qhack_tools.client qml_500_UDMIS < qml_500_UDMIS_template/1.in
+"""
+import argparse
+import socket
+import sys
+
+from qhack_tools.daemon import STATUS_OK, default_socket_path
+
+
+def request(challenge, payload, socket_path=None):
+    """Sends one stdin payload to the resident solver.
+
+    Args:
+        - challenge (str): challenge, directory or script name
+        - payload (str): what would be piped into the solution script
+        - socket_path (str): path of the daemon socket, defaults to :func:`default_socket_path`
+
+    Returns:
+        - (bool): whether the solution ran successfully
+        - (bytes): the stdout of the solution, or the error reported by the daemon
+    """
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(f"{challenge}\n{payload}".encode())
+        sock.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    response = b"".join(chunks)
+    return response[:1] == STATUS_OK, response[1:]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("challenge", help="challenge, directory or script name")
+    parser.add_argument("--socket", help="Unix socket path of the daemon")
+    args = parser.parse_args(argv)
+
+    ok, output = request(args.challenge, sys.stdin.read(), args.socket)
+    stream = sys.stdout if ok else sys.stderr
+    stream.buffer.write(output)
+    stream.flush()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
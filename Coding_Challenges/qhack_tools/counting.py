@@ -0,0 +1,365 @@
+#! /usr/bin/python3
+"""Matrix-free Grover operator and analytic phase estimation for quantum counting (algorithms_400).
+
+``quantum_counting.circuit`` builds the Grover operator ``G = D O`` as a dense
+``2**n x 2**n`` matrix and feeds it to ``QuantumPhaseEstimation``, which controls and
+powers it densely. That caps the challenge at 4 search qubits. Both factors have
+structure:
+
+    - the oracle ``O`` flips the sign of the marked elements, a boolean mask
+    - the diffusion ``D = 2|s><s| - I`` reflects about the uniform state ``|s>``, i.e.
+      ``psi -> 2 mean(psi) - psi``
+
+:func:`apply_grover` applies ``G`` in ``O(2**n)`` operations without any matrix, and
+:func:`simulate_counting` runs the whole phase estimation circuit on top of it.
+
+``G`` rotates the plane of the uniform superpositions of the marked and unmarked
+elements by the angle ``theta`` with ``sin(theta / 2)**2 = M / N``, for ``M`` marked
+elements out of ``N = 2**n``. Its eigenphases there are ``+theta`` and ``-theta``, and
+``|s>`` has weight 1/2 on each eigenvector. The output distribution of phase estimation
+therefore only depends on ``M``: :func:`counting_distribution` computes it in closed
+form from ``len(indices)``, in time independent of the number of search qubits.
+
+:func:`counting_qnode` is the PennyLane circuit for any number of search and estimation
+wires, with one device and QNode per size, and :func:`ml_estimate` reads a maximum
+likelihood number of solutions from the whole readout distribution instead of its
+argmax. The report sweeps the estimation wires to show precision against runtime.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.counting
+    python -m qhack_tools.counting --search-wires 24 32 --estimation-wires 10
+"""
+import argparse
+import functools
+import sys
+import time
+
+import numpy as np
+
+from qhack_tools import challenges as ch
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+
+def marked_mask(indices, n_search):
+    """Boolean mask of the marked elements among the ``2**n_search`` basis states."""
+
+    mask = np.zeros(2 ** n_search, dtype=bool)
+    mask[np.asarray(indices, dtype=np.int64)] = True
+    return mask
+
+
+def apply_grover(states, mask):
+    """Applies the Grover operator ``D O`` to one or more state vectors.
+
+    Args:
+        - states (np.ndarray): states along the last axis, of size ``2**n``
+        - mask (np.ndarray): marked elements, from :func:`marked_mask`
+
+    Returns:
+        - (np.ndarray): the new states
+    """
+
+    states = np.where(mask, -states, states)
+    return 2 * np.mean(states, axis=-1, keepdims=True) - states
+
+
+def grover_angle(n_solutions, n_search):
+    """Rotation angle ``theta`` of the Grover operator, with ``sin(theta / 2)**2 = M / N``."""
+
+    return 2 * np.arcsin(np.sqrt(n_solutions / 2 ** n_search))
+
+
+def phase_distribution(phase, n_estimation):
+    """Output distribution of phase estimation on an eigenvector.
+
+    Args:
+        - phase (float or np.ndarray): eigenphase, in turns (the eigenvalue is
+          ``exp(2j * pi * phase)``)
+        - n_estimation (int): number of estimation wires
+
+    Returns:
+        - (np.ndarray): probability of every readout ``j`` along the last axis, the first
+          estimation wire being the most significant bit
+    """
+
+    size = 2 ** n_estimation
+    # |sum_c exp(2j pi c delta)|**2 / size**2, with delta the distance to the grid point j
+    delta = np.asarray(phase, dtype=float)[..., None] - np.arange(size) / size
+    numerator = np.sin(np.pi * size * delta) ** 2
+    denominator = size ** 2 * np.sin(np.pi * delta) ** 2
+    exact = np.isclose(np.sin(np.pi * delta), 0, atol=1e-12)
+    return np.where(exact, 1.0, numerator / np.where(exact, 1.0, denominator))
+
+
+def counting_distribution(n_solutions, n_search, n_estimation):
+    """Output distribution of quantum counting, computed from the number of solutions.
+
+    Args:
+        - n_solutions (int or np.ndarray): number of marked elements ``M``
+        - n_search (int): number of search wires
+        - n_estimation (int): number of estimation wires
+
+    Returns:
+        - (np.ndarray): probability of every readout, as ``qml.probs(estimation_wires)``
+    """
+
+    phase = grover_angle(n_solutions, n_search) / (2 * np.pi)
+    return (
+        phase_distribution(phase, n_estimation) + phase_distribution(-phase, n_estimation)
+    ) / 2
+
+
+def simulate_counting(mask, n_estimation, chunk=2 ** 16):
+    """Output distribution of quantum counting, simulated with the matrix-free operator.
+
+    After the Hadamards and the controlled powers, the register holds
+    ``sum_c |c> G**c |s>`` (normalized); the inverse QFT of the estimation wires is a
+    Fourier transform over ``c``. ``G`` and ``|s>`` are real, so the ``2**n_estimation``
+    states take ``8 * 2**(n_search + n_estimation)`` bytes.
+
+    Args:
+        - mask (np.ndarray): marked elements, from :func:`marked_mask`
+        - n_estimation (int): number of estimation wires
+        - chunk (int): number of search basis states transformed at a time
+
+    Returns:
+        - (np.ndarray): probability of every readout, as :func:`counting_distribution`
+    """
+
+    size, dim = 2 ** n_estimation, len(mask)
+    powers = np.empty((size, dim))
+    powers[0] = 1 / np.sqrt(dim)
+    for c in range(1, size):
+        powers[c] = apply_grover(powers[c - 1], mask)
+
+    probabilities = np.zeros(size)
+    for start in range(0, dim, chunk):
+        amplitudes = np.fft.fft(powers[:, start : start + chunk], axis=0) / size
+        probabilities += np.sum(np.abs(amplitudes) ** 2, axis=1)
+
+    return probabilities
+
+
+def _controlled_grover(controlled_oracle, controlled_reflection, control, search_wires):
+    # the Hadamards around the reflection about |0...0> cancel when the control is off,
+    # so only the two diagonals need the control
+    wires = [control] + list(search_wires)
+    qml.DiagonalQubitUnitary(controlled_oracle, wires=wires)
+    for wire in search_wires:
+        qml.Hadamard(wires=wire)
+    qml.DiagonalQubitUnitary(controlled_reflection, wires=wires)
+    for wire in search_wires:
+        qml.Hadamard(wires=wire)
+
+
+@functools.lru_cache(maxsize=None)
+def counting_qnode(n_search, n_estimation, shots=None):
+    """Quantum counting circuit for one register size, built once per size.
+
+    The search wires come first, then the estimation wires. Each controlled power of
+    ``G`` is applied as repeated controlled Grover steps made of two diagonal gates and
+    Hadamards, so no ``2**n x 2**n`` matrix is formed or squared.
+
+    Args:
+        - n_search (int): number of search wires
+        - n_estimation (int): number of estimation wires, the bits of precision
+        - shots (int): shots of the device, ``None`` for exact probabilities
+
+    Returns:
+        - (qml.QNode): ``circuit(oracle)`` taking the diagonal of the oracle (``-1`` on the
+          marked elements) and returning ``qml.probs`` of the estimation wires
+    """
+
+    search_wires = list(range(n_search))
+    estimation_wires = list(range(n_search, n_search + n_estimation))
+    dev = qml.device("default.qubit", wires=n_search + n_estimation, shots=shots)
+
+    # 2|0><0| - I on the search wires, identity when the control is off
+    reflection = -np.ones(2 ** n_search)
+    reflection[0] = 1
+    controlled_reflection = np.concatenate([np.ones(2 ** n_search), reflection])
+
+    @qml.qnode(dev)
+    def circuit(oracle):
+        controlled_oracle = np.concatenate([np.ones(2 ** n_search), oracle])
+        for wire in search_wires:
+            qml.Hadamard(wires=wire)
+
+        for i, control in enumerate(estimation_wires):
+            qml.Hadamard(wires=control)
+            for _ in range(2 ** (n_estimation - 1 - i)):
+                _controlled_grover(
+                    controlled_oracle, controlled_reflection, control, search_wires
+                )
+
+        qml.QFT(wires=estimation_wires).inv()
+        return qml.probs(wires=estimation_wires)
+
+    return circuit
+
+
+def circuit_distribution(indices, n_search, n_estimation, shots=None):
+    """Output distribution of the counting circuit of :func:`counting_qnode`."""
+
+    oracle = np.where(marked_mask(indices, n_search), -1.0, 1.0)
+    return np.asarray(counting_qnode(n_search, n_estimation, shots)(oracle))
+
+
+def estimate_solutions(probabilities, n_search):
+    """Number of solutions read from the most likely outcome, as ``number_of_solutions``."""
+
+    theta = 2 * np.pi * np.argmax(probabilities) / len(probabilities)
+    return 2 ** n_search * np.sin(theta / 2) ** 2
+
+
+def ml_estimate(probabilities, n_search, max_candidates=4096):
+    """Maximum-likelihood number of solutions, given the whole readout distribution.
+
+    The candidates are the integers ``M`` whose phase lies within two readouts of the most
+    likely one; the one maximizing ``sum_j p_j log q_M(j)``, with ``q_M`` from
+    :func:`counting_distribution`, is returned. Wide ranges are searched on a grid of
+    at most ``max_candidates`` points, refined around the best point until it reaches integers.
+    With exact probabilities this is the true ``M``, as far as double precision resolves
+    the phase (from about 40 search wires on, ``M`` may be off by a few units); with
+    sampled frequencies, the maximum likelihood estimate of the sample.
+
+    Args:
+        - probabilities (np.ndarray): readout probabilities or frequencies
+        - n_search (int): number of search wires
+
+    Returns:
+        - (int): the estimate
+    """
+
+    probabilities = np.asarray(probabilities, dtype=float)
+    size, dim = len(probabilities), 2 ** n_search
+    n_estimation = size.bit_length() - 1
+
+    # readouts j and size - j come from the same pair of eigenphases
+    peak = np.argmax(probabilities)
+    peak = min(peak, size - peak)
+    phases = np.clip([(peak - 2) / size, (peak + 2) / size], 0, 0.5)
+    low, high = np.floor(dim * np.sin(np.pi * phases) ** 2)
+    high = min(high + 1, dim)
+
+    # the grid is kept to a few million evaluated probabilities
+    points = max(8, min(max_candidates, 2 ** 22 // size))
+    while True:
+        candidates = np.unique(np.round(np.linspace(low, high, points)))
+        expected = counting_distribution(candidates, n_search, n_estimation)
+        likelihood = np.log(np.maximum(expected, 1e-300)) @ probabilities
+        best = candidates[np.argmax(likelihood)]
+        if high - low + 1 <= points:
+            return int(best)
+
+        # zoom in on the neighbourhood of the best candidate of the coarse grid
+        step = (high - low) / (points - 1)
+        low, high = max(low, np.floor(best - 2 * step)), min(high, np.ceil(best + 2 * step))
+
+
+def count_solutions(indices, n_search, n_estimation, method="argmax"):
+    """Quantum counting estimate of the number of marked ``indices``, for any ``n_search``.
+
+    Args:
+        - indices (list(int)): the marked elements
+        - n_search (int): number of search wires
+        - n_estimation (int): number of estimation wires
+        - method (str): ``"argmax"`` (as ``number_of_solutions``) or ``"ml"``
+          (:func:`ml_estimate`)
+    """
+
+    n_solutions = np.count_nonzero(marked_mask(indices, n_search))
+    probabilities = counting_distribution(n_solutions, n_search, n_estimation)
+    if method == "argmax":
+        return estimate_solutions(probabilities, n_search)
+    if method == "ml":
+        return ml_estimate(probabilities, n_search)
+    raise ValueError(f"unknown method {method!r}, expected 'argmax' or 'ml'")
+
+
+def benchmark_workloads():
+    """Counting runs benchmarked by :mod:`.bench`, as ``(label, callable)`` pairs."""
+
+    mask = marked_mask(np.arange(0, 2 ** 16, 37), 16)
+    return [
+        ("matrix_free_16_search_6_estimation", lambda: simulate_counting(mask, 6)),
+        (
+            "analytic_40_search_16_estimation",
+            lambda: counting_distribution(2 ** 30 + 12345, 40, 16),
+        ),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--search-wires", type=int, nargs="+", default=[12, 20, 32])
+    parser.add_argument("--estimation-wires", type=int, default=6)
+    parser.add_argument(
+        "--simulate-up-to", type=int, default=18, help="largest matrix-free simulation"
+    )
+    parser.add_argument(
+        "--circuit-search-wires", type=int, default=6, help="search wires of the circuit sweep"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    rng = np.random.default_rng(args.seed)
+
+    # the solution's dense 4 + 4 wire circuit, for every number of solutions
+    solution = ch.load_solution(ch.get_challenge("algorithms_400_QuantumCounting"))
+    error = 0.0
+    for n_solutions in range(17):
+        indices = sorted(rng.choice(16, n_solutions, replace=False).tolist())
+        expected = np.asarray(solution.module.circuit(indices))
+        error = max(error, np.max(np.abs(counting_distribution(n_solutions, 4, 4) - expected)))
+    failures += error > 1e-8
+    print(f"4 search wires, M = 0..16: analytic vs circuit, max |dp| = {error:.1e}")
+
+    # precision against runtime of the structured PennyLane circuit
+    n_search = args.circuit_search_wires
+    n_solutions = int(rng.integers(1, 2 ** n_search // 2))
+    indices = rng.choice(2 ** n_search, n_solutions, replace=False)
+    for n_estimation in range(2, args.estimation_wires + 1):
+        start = time.perf_counter()
+        probabilities = circuit_distribution(indices, n_search, n_estimation)
+        seconds = time.perf_counter() - start
+        analytic = counting_distribution(n_solutions, n_search, n_estimation)
+        error = np.max(np.abs(analytic - probabilities))
+        failures += error > 1e-8
+        print(
+            f"circuit, {n_search} + {n_estimation} wires, M = {n_solutions}: "
+            f"argmax {estimate_solutions(probabilities, n_search):.4g}, "
+            f"ml {ml_estimate(probabilities, n_search)}, {seconds:.2f} s, max |dp| = {error:.1e}"
+        )
+
+    for n_search in args.search_wires:
+        n_solutions = int(rng.integers(1, 2 ** min(n_search, 62) // 8))
+        start = time.perf_counter()
+        analytic = counting_distribution(n_solutions, n_search, args.estimation_wires)
+        estimate = estimate_solutions(analytic, n_search)
+        seconds = time.perf_counter() - start
+        line = (
+            f"{n_search} search wires, M = {n_solutions}: argmax {estimate:.6g}, "
+            f"ml {ml_estimate(analytic, n_search)}, in {seconds * 1e3:.3f} ms"
+        )
+
+        if n_search <= args.simulate_up_to:
+            mask = marked_mask(rng.choice(2 ** n_search, n_solutions, replace=False), n_search)
+            start = time.perf_counter()
+            simulated = simulate_counting(mask, args.estimation_wires)
+            seconds = time.perf_counter() - start
+            error = np.max(np.abs(analytic - simulated))
+            failures += error > 1e-8
+            line += f"; matrix-free simulation {seconds:.2f} s, max |dp| = {error:.1e}"
+
+        print(line)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#! /usr/bin/python3
+"""Coupling maps loaded from files, and their persisted distance / next-hop tables.
+
+A :class:`CouplingMap` stores an undirected hardware graph as a CSR adjacency structure
+(``indptr`` / ``indices`` arrays over qubit indices), next to the qubit labels. It is built
+from a ``{qubit: [neighbours]}`` dictionary such as ``adapting_topology.graph`` or loaded
+with :func:`load` from
+
+    - an edge list: one ``a b`` (or ``a,b``) pair per line, ``#`` starts a comment
+    - a JSON file: a ``{qubit: [neighbours]}`` object, a list of ``[a, b]`` pairs, or an
+      object with such a list under ``"edges"``
+
+Numeric labels are read as integers.
+
+:func:`distance_tables` returns the all-pairs hop distances and the next hop along a
+shortest path between any two qubits. They are computed once per map (breadth-first
+search through ``scipy.sparse.csgraph``) and stored as ``.npz`` files under
+``$QHACK_CACHE_DIR/coupling`` (default ``~/.cache/qhack``), keyed by the sha256 of the
+map. Later queries in the same process, or in any other process, skip the graph
+preprocessing entirely.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.coupling heavy_hex.json      # summary; computes and stores tables
+    python -m qhack_tools.routing --coupling-map heavy_hex.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+from qhack_tools.cache import default_cache_dir
+
+# Bumped whenever the layout of the stored tables changes.
+TABLE_VERSION = 1
+
+DistanceTables = namedtuple("DistanceTables", ["distances", "next_hop"])
+
+_tables = {}
+
+
+class CouplingMap:
+    """Undirected coupling map in CSR form.
+
+    Qubit ``i`` of the arrays is ``nodes[i]``; its neighbours are
+    ``indices[indptr[i]:indptr[i + 1]]``, sorted.
+
+    Args:
+        - nodes (list): qubit labels
+        - indptr (np.ndarray): row offsets, of length ``len(nodes) + 1``
+        - indices (np.ndarray): neighbour indices of all qubits, concatenated
+    """
+
+    def __init__(self, nodes, indptr, indices):
+        self.nodes = list(nodes)
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self._key = None
+
+    @classmethod
+    def from_edges(cls, edges, nodes=None):
+        """Builds a map from ``(a, b)`` label pairs.
+
+        Args:
+            - edges (iterable(tuple)): the couplings, in either direction
+            - nodes (list): all qubit labels, in order; by default the labels in order of
+              first appearance (isolated qubits must then be listed here)
+        """
+
+        nodes = list(nodes or [])
+        index = {node: i for i, node in enumerate(nodes)}
+        pairs = set()
+        for a, b in edges:
+            for node in (a, b):
+                if node not in index:
+                    index[node] = len(nodes)
+                    nodes.append(node)
+            if a != b:
+                pairs.add((index[a], index[b]))
+                pairs.add((index[b], index[a]))
+
+        pairs = np.array(sorted(pairs), dtype=np.int32).reshape(-1, 2)
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=len(nodes)), out=indptr[1:])
+        return cls(nodes, indptr, pairs[:, 1])
+
+    @classmethod
+    def from_dict(cls, graph):
+        """Builds a map from a ``{qubit: [neighbours]}`` dictionary."""
+
+        edges = [(node, neighbour) for node, neighbours in graph.items() for neighbour in neighbours]
+        return cls.from_edges(edges, nodes=list(graph))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def neighbours(self, qubit):
+        """Neighbour indices of the qubit with index ``qubit``."""
+
+        return self.indices[self.indptr[qubit] : self.indptr[qubit + 1]]
+
+    def to_dict(self):
+        """The map as a ``{qubit: [neighbours]}`` dictionary."""
+
+        return {
+            node: [self.nodes[j] for j in self.neighbours(i)] for i, node in enumerate(self.nodes)
+        }
+
+    @property
+    def key(self):
+        """sha256 of the labels and the adjacency structure."""
+
+        if self._key is None:
+            digest = hashlib.sha256()
+            digest.update(f"{TABLE_VERSION}:{self.nodes!r}".encode())
+            digest.update(self.indptr.tobytes())
+            digest.update(self.indices.tobytes())
+            self._key = digest.hexdigest()
+        return self._key
+
+
+def _label(text):
+    text = str(text).strip()
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def load(path):
+    """Loads a coupling map from an edge-list or JSON file (by the ``.json`` extension).
+
+    Returns:
+        - (CouplingMap): the map
+    """
+
+    with open(path) as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+        else:
+            data = [
+                line.split("#", 1)[0].replace(",", " ").split() for line in f
+            ]
+            data = [fields for fields in data if fields]
+            for fields in data:
+                if len(fields) != 2:
+                    raise ValueError(f"{path}: expected two qubits per line, got {fields}")
+
+    if isinstance(data, dict) and "edges" in data:
+        data = data["edges"]
+    if isinstance(data, dict):
+        return CouplingMap.from_dict(
+            {_label(node): [_label(n) for n in neighbours] for node, neighbours in data.items()}
+        )
+
+    return CouplingMap.from_edges((_label(a), _label(b)) for a, b in data)
+
+
+def tables_path(coupling_map, directory=None):
+    """Where the tables of a map are stored."""
+
+    return os.path.join(directory or default_cache_dir(), "coupling", coupling_map.key + ".npz")
+
+
+def compute_tables(coupling_map):
+    """Computes the distance and next-hop tables of a map.
+
+    Returns:
+        - (DistanceTables): ``distances[i, j]`` is the number of hops from qubit ``i`` to
+          ``j`` and ``next_hop[i, j]`` the neighbour of ``i`` on a shortest path to ``j``;
+          both are -1 for disconnected pairs, and ``next_hop[i, i]`` is -1
+    """
+
+    # scipy is only needed to fill a missing table
+    from scipy.sparse import csr_matrix  # pylint: disable=import-outside-toplevel
+    from scipy.sparse.csgraph import shortest_path  # pylint: disable=import-outside-toplevel
+
+    n = len(coupling_map)
+    adjacency = csr_matrix(
+        (np.ones(len(coupling_map.indices)), coupling_map.indices, coupling_map.indptr),
+        shape=(n, n),
+    )
+    distances, predecessors = shortest_path(
+        adjacency, directed=False, unweighted=True, return_predecessors=True
+    )
+
+    # predecessors[j, i] is the qubit before i on the path from j, i.e. i's next hop to j
+    next_hop = predecessors.T.astype(np.int32)
+    next_hop[next_hop < 0] = -1
+    distances[np.isinf(distances)] = -1
+
+    return DistanceTables(distances.astype(np.int32), next_hop)
+
+
+def distance_tables(coupling_map, directory=None):
+    """Distance and next-hop tables of a map, from memory, disk or computed and stored.
+
+    Args:
+        - coupling_map (CouplingMap or dict): the map
+        - directory (str): cache directory, defaults to :func:`cache.default_cache_dir`
+
+    Returns:
+        - (DistanceTables): see :func:`compute_tables`
+    """
+
+    if not isinstance(coupling_map, CouplingMap):
+        coupling_map = CouplingMap.from_dict(coupling_map)
+
+    key = coupling_map.key
+    if key in _tables:
+        return _tables[key]
+
+    path = tables_path(coupling_map, directory)
+    try:
+        with np.load(path) as stored:
+            tables = DistanceTables(stored["distances"], stored["next_hop"])
+    except (OSError, KeyError, ValueError):
+        tables = compute_tables(coupling_map)
+        _store(path, tables)
+
+    _tables[key] = tables
+    return tables
+
+
+def _store(path, tables):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **tables._asdict())
+        os.replace(temporary, path)
+    except OSError:
+        # a read-only cache only costs the recomputation
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="edge-list or JSON coupling map files")
+    parser.add_argument("--dir", help="cache directory")
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        coupling_map = load(path)
+        stored = os.path.exists(tables_path(coupling_map, args.dir))
+        tables = distance_tables(coupling_map, args.dir)
+        print(
+            f"{path}: {len(coupling_map)} qubits, {len(coupling_map.indices) // 2} couplings, "
+            f"diameter {tables.distances.max()}, "
+            f"tables {'loaded from' if stored else 'stored to'} "
+            f"{tables_path(coupling_map, args.dir)}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
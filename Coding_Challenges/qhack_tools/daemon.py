@@ -0,0 +1,144 @@
+#! /usr/bin/python3
+"""Resident solver that keeps PennyLane and every solution module imported.
+
+The server loads all solutions once and then answers ``(challenge, stdin payload)``
+requests over a Unix socket with the exact stdout the script would have printed, so a
+request only costs the computation itself. Requests are served one at a time, in the
+order they arrive, so two requests never share a device mid-execution.
+
+A request is not a fresh ``python <solution>.py`` run: the module body ran once, so
+whatever a call leaves on module-level objects (globals, attributes of functions, device
+state, the global ``np.random`` state) is still there for the next request. The
+solutions keep no state of their own between calls, and those that seed ``np.random``
+do so inside the call, so their answers match a fresh run; those that draw unseeded
+numbers (qml_500_UDMIS) vary from request to request as they do from run to run. A
+solution that memoizes on module objects would not get that guarantee.
+
+Wire format: the client sends the challenge name on the first line followed by the
+payload, then shuts down its write side. The server answers with a single status byte
+(``0`` for success, ``1`` for an error) followed by the captured stdout, or by the
+traceback if the solution raised.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.daemon &
+    python -m qhack_tools.client games_200_CHSH < games_200_CHSH_template/1.in
+
+With ``QHACK_PROFILE`` set, the daemon profiles every QNode it runs and dumps the summary
+when it is stopped (see :mod:`qhack_tools.profiler`).
+"""
+import argparse
+import os
+import socketserver
+import sys
+import tempfile
+import traceback
+
+from qhack_tools import cache as result_cache
+from qhack_tools import challenges as ch
+from qhack_tools import options
+
+STATUS_OK = b"0"
+STATUS_ERROR = b"1"
+
+
+def default_socket_path():
+    """Socket path used when none is given: ``$QHACK_SOCKET`` or a per-user temp file."""
+
+    if os.environ.get("QHACK_SOCKET"):
+        return os.environ["QHACK_SOCKET"]
+
+    return os.path.join(tempfile.gettempdir(), f"qhack-{os.getuid()}.sock")
+
+
+def load_solutions(selected, cache=None):
+    """Loads the selected solutions and indexes them by every alias of their challenge.
+
+    Args:
+        - selected (list(Challenge)): challenges to keep warm
+        - cache (ResultCache): if given, entry functions are served from this result cache
+
+    Returns:
+        - (dict(str, Solution)): loaded solutions keyed by name, directory and script name
+    """
+
+    solutions = {}
+    for challenge in selected:
+        solution = ch.load_solution(challenge)
+        if cache is not None:
+            result_cache.install(solution, cache)
+        for alias in ch.aliases(challenge):
+            solutions[alias] = solution
+
+    return solutions
+
+
+def handle_request(solutions, request):
+    """Runs a single request.
+
+    Args:
+        - solutions (dict(str, Solution)): result of :func:`load_solutions`
+        - request (bytes): challenge name, newline, stdin payload
+
+    Returns:
+        - (bytes): status byte followed by the stdout of the solution or an error message
+    """
+
+    name, _, payload = request.decode().partition("\n")
+    solution = solutions.get(name.strip())
+    if solution is None:
+        return STATUS_ERROR + f"Unknown challenge '{name.strip()}'\n".encode()
+
+    try:
+        output = ch.run_solution(solution, payload)
+    except (Exception, SystemExit):  # pylint: disable=broad-except
+        return STATUS_ERROR + traceback.format_exc().encode()
+
+    return STATUS_OK + output.encode()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = self.rfile.read()
+        self.wfile.write(handle_request(self.server.solutions, request))
+
+
+def serve(socket_path, selected, cache=None):
+    """Loads the solutions and serves requests until interrupted.
+
+    Args:
+        - socket_path (str): path of the Unix socket to listen on
+        - selected (list(Challenge)): challenges to serve
+        - cache (ResultCache): optional result cache for the entry functions
+    """
+
+    solutions = load_solutions(selected, cache)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    with socketserver.UnixStreamServer(socket_path, _Handler) as server:
+        server.solutions = solutions
+        print(f"serving {len(selected)} solutions on {socket_path}", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("challenges", nargs="*", help="challenges to serve (default: all)")
+    parser.add_argument("--socket", default=default_socket_path(), help="Unix socket path")
+    options.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    cache = options.configure(args)
+    serve(args.socket, ch.select_challenges(args.challenges), cache)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#! /usr/bin/python3
+"""Monte Carlo engine for the Elitzur-Vaidman bomb tester (games_300).
+
+``Elitzur_Vaidman.simulate`` chains ``n`` one-shot ``is_bomb`` circuits and a final
+``bomb_tester`` circuit, and used to execute them trial by trial: up to ``n + 1``
+PennyLane executions per trial, 10,000 trials, through a recursion as deep as ``n``.
+Every stage is the same ``RY(2 * angle)`` circuit, so a trial is fully described by two
+probabilities, computed once by running the circuits exactly (:func:`stage_probabilities`):
+
+    - ``p_explode``: ``is_bomb`` samples +1, the bomb explodes at that stage
+    - ``p_beep``: ``bomb_tester`` samples +1, detector D beeps
+
+The trials are then drawn with NumPy, from a seeded generator:
+
+    - :func:`sample_counts`: the number of trials surviving all stages is binomial with
+      probability ``(1 - p_explode)**n`` (thinning a binomial stage after stage gives the
+      same distribution), and the D beeps are binomial among them; two draws in total
+    - :func:`sample_trials`: the outcome of every trial, from one uniform draw per trial
+      against the cumulative probabilities of the three outcomes
+
+Both run in constant time in ``n``.
+
+A single 10,000-trial ratio is noisy, and often the expected ratio is what is wanted.
+:func:`simulate` has three modes:
+
+    - ``"sample"``: one realization, as the solution returns it
+    - ``"exact"``: the expected ratio in closed form; given any number of survivors,
+      each of them beeps in D with probability ``p_beep``, so the ratio's expectation
+      (over the runs with at least one survivor) is ``p_beep`` itself
+    - ``"adaptive"``: trials drawn in doubling batches until the Wilson confidence
+      interval of the ratio is narrower than a requested tolerance
+
+:func:`confidence_interval` bounds the ratio of observed counts, and :func:`ratio_std`
+gives the exact standard deviation of the ``trials``-trial estimator.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.elitzur
+    python -m qhack_tools.elitzur --angle 1.2 --bombs 1000 --trials 10000000
+"""
+import argparse
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from qhack_tools import challenges as ch
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+# outcome codes of sample_trials
+EXPLOSION, D_BEEP, C_BEEP = 0, 1, 2
+
+MODES = ("sample", "exact", "adaptive")
+
+StageProbabilities = namedtuple("StageProbabilities", ["p_explode", "p_beep"])
+Counts = namedtuple("Counts", ["explosions", "d_beeps", "c_beeps"])
+Estimate = namedtuple("Estimate", ["ratio", "low", "high", "trials"])
+
+
+def probability_of_one(one_shot, *args):
+    """Probability that a one-shot single-wire ``qml.sample(qml.PauliZ(0))`` QNode gives +1.
+
+    The operations of the QNode's quantum function, recorded on a tape of their own so
+    that no QNode internals are needed, are run on an exact ``default.qubit`` device.
+    """
+
+    with qml.tape.QuantumTape() as tape:
+        one_shot.func(*args)
+    operations = tape.operations
+
+    @qml.qnode(qml.device("default.qubit", wires=1))
+    def exact():
+        for op in operations:
+            qml.apply(op)
+        return qml.expval(qml.PauliZ(0))
+
+    return (1 + float(exact())) / 2
+
+
+def stage_probabilities(angle, module=None):
+    """Probabilities of one stage, from the circuits of the solution (or of ``module``).
+
+    Returns:
+        - (StageProbabilities): the explosion probability of every ``is_bomb`` stage and
+          the probability that ``bomb_tester`` makes D beep
+    """
+
+    if module is None:
+        module = ch.load_solution(ch.get_challenge("games_300_Elitzur_Vaidman")).module
+    return StageProbabilities(
+        probability_of_one(module.is_bomb, angle), probability_of_one(module.bomb_tester, angle)
+    )
+
+
+def _rng(seed):
+    return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+
+def sample_counts(probabilities, n, trials, seed=None):
+    """Outcome counts of ``trials`` bombs sent through ``n`` stages.
+
+    Args:
+        - probabilities (StageProbabilities): see :func:`stage_probabilities`
+        - n (int): number of ``is_bomb`` stages
+        - trials (int): number of bombs
+        - seed (int or np.random.Generator): seed of the draws
+
+    Returns:
+        - (Counts): explosions, D beeps and C beeps
+    """
+
+    rng = _rng(seed)
+    survivors = int(rng.binomial(trials, (1 - probabilities.p_explode) ** n))
+    d_beeps = int(rng.binomial(survivors, probabilities.p_beep))
+    return Counts(trials - survivors, d_beeps, survivors - d_beeps)
+
+
+def sample_trials(probabilities, n, trials, seed=None):
+    """Outcome of every trial, as :data:`EXPLOSION`, :data:`D_BEEP` or :data:`C_BEEP`.
+
+    Returns:
+        - (np.ndarray): array of ``trials`` outcome codes, of dtype ``int8``
+    """
+
+    # one uniform draw per trial, split into explosion / D beep / C beep intervals
+    survival = (1 - probabilities.p_explode) ** n
+    uniform = _rng(seed).random(trials)
+    outcomes = (uniform >= 1 - survival).astype(np.int8)
+    outcomes += uniform >= 1 - survival + survival * probabilities.p_beep
+    return outcomes
+
+
+def ratio(counts):
+    """D beeps over the bombs that did not explode, ``nan`` when none survived."""
+
+    survivors = counts.d_beeps + counts.c_beeps
+    return counts.d_beeps / survivors if survivors else float("nan")
+
+
+def exact_ratio(probabilities, n):
+    """Expected ratio, over the runs where some bomb survives; ``nan`` if none can."""
+
+    if (1 - probabilities.p_explode) ** n == 0:
+        return float("nan")
+    return probabilities.p_beep
+
+
+def ratio_std(probabilities, n, trials):
+    """Standard deviation of the ratio of ``trials`` trials, over the runs with survivors.
+
+    Given ``S`` survivors the ratio has variance ``p_beep (1 - p_beep) / S``; the
+    expectation of ``1 / S`` is summed over the binomial distribution of ``S``, within
+    12 standard deviations of its mean.
+    """
+
+    # scipy is only needed for the binomial probabilities
+    from scipy.stats import binom  # pylint: disable=import-outside-toplevel
+
+    survival = (1 - probabilities.p_explode) ** n
+    mean, spread = trials * survival, 12 * np.sqrt(trials * survival * (1 - survival)) + 12
+    survivors = np.arange(max(1, int(mean - spread)), min(trials, int(mean + spread)) + 1)
+    weights = binom.pmf(survivors, trials, survival)
+    if weights.sum() == 0:
+        return float("nan")
+
+    inverse = np.sum(weights / survivors) / weights.sum()
+    return float(np.sqrt(probabilities.p_beep * (1 - probabilities.p_beep) * inverse))
+
+
+def confidence_interval(counts, confidence=0.95):
+    """Wilson score interval of the ratio of observed counts.
+
+    Returns:
+        - (tuple(float)): the lower and upper bounds, ``nan`` when no bomb survived
+    """
+
+    survivors = counts.d_beeps + counts.c_beeps
+    if survivors == 0:
+        return float("nan"), float("nan")
+
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    p = counts.d_beeps / survivors
+    center = (p + z ** 2 / (2 * survivors)) / (1 + z ** 2 / survivors)
+    half = z * np.sqrt(p * (1 - p) / survivors + z ** 2 / (4 * survivors ** 2))
+    half /= 1 + z ** 2 / survivors
+    return center - half, center + half
+
+
+def adaptive_estimate(
+    probabilities, n, tolerance, confidence=0.95, seed=None, batch=1000, max_trials=10 ** 10
+):
+    """Samples until the confidence interval of the ratio is within ``tolerance``.
+
+    Args:
+        - probabilities (StageProbabilities): see :func:`stage_probabilities`
+        - n (int): number of ``is_bomb`` stages
+        - tolerance (float): largest half-width of the interval
+        - confidence (float): confidence level of the interval
+        - seed (int or np.random.Generator): seed of the draws
+        - batch (int): trials of the first batch; every batch doubles the total
+        - max_trials (int): trials after which sampling stops regardless
+
+    Returns:
+        - (Estimate): the ratio, its interval and the number of trials drawn
+    """
+
+    rng = _rng(seed)
+    total = Counts(0, 0, 0)
+    while True:
+        counts = sample_counts(probabilities, n, batch, rng)
+        total = Counts(*(a + b for a, b in zip(total, counts)))
+        trials = sum(total)
+        low, high = confidence_interval(total, confidence)
+        if (high - low) / 2 <= tolerance or trials >= max_trials:
+            return Estimate(ratio(total), low, high, trials)
+        batch = min(trials, max_trials - trials)
+
+
+def simulate(angle, n, trials=10000, seed=None, module=None, mode="sample", tolerance=1e-3):
+    """Ratio of ``Elitzur_Vaidman.simulate``, for any number of stages and trials.
+
+    Args:
+        - angle (float): transmissivity of the beam splitters
+        - n (int): number of ``is_bomb`` stages
+        - trials (int): number of bombs of the ``"sample"`` mode
+        - seed (int or np.random.Generator): seed of the draws
+        - module: solution module providing the circuits, loaded by default
+        - mode (str): one of :data:`MODES`
+        - tolerance (float): half-width of the 95% interval of the ``"adaptive"`` mode
+
+    Returns:
+        - (float): D beeps over the bombs that did not explode
+    """
+
+    probabilities = stage_probabilities(angle, module)
+    if mode == "sample":
+        return ratio(sample_counts(probabilities, n, trials, seed))
+    if mode == "exact":
+        return exact_ratio(probabilities, n)
+    if mode == "adaptive":
+        return adaptive_estimate(probabilities, n, tolerance, seed=seed).ratio
+    raise ValueError(f"unknown mode {mode!r}, expected one of {MODES}")
+
+
+def one_shot_counts(module, angle, n, trials):
+    """Counts from the one-shot QNodes, trial by trial, as the solution used to run them."""
+
+    explosions = d_beeps = 0
+    for _ in range(trials):
+        for _ in range(n):
+            if module.is_bomb(angle) == 1:
+                explosions += 1
+                break
+        else:
+            d_beeps += int(module.bomb_tester(angle) == 1)
+
+    return Counts(explosions, d_beeps, trials - explosions - d_beeps)
+
+
+def benchmark_workloads():
+    """Bomb tester runs benchmarked by :mod:`.bench`, as ``(label, callable)`` pairs."""
+
+    probabilities = StageProbabilities(np.cos(0.1) ** 2, np.sin(0.1) ** 2)
+    return [
+        ("counts_1e7_trials_1e6_bombs", lambda: sample_counts(probabilities, 10 ** 6, 10 ** 7, 0)),
+        ("trials_1e6_trials_100_bombs", lambda: sample_trials(probabilities, 100, 10 ** 6, 0)),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--angle", type=float, default=1.256637)
+    parser.add_argument("--bombs", type=int, default=5, help="number n of is_bomb stages")
+    parser.add_argument("--trials", type=int, default=10 ** 7)
+    parser.add_argument("--one-shot-trials", type=int, default=300, help="trials of the QNodes")
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="of the adaptive mode")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    module = ch.load_solution(ch.get_challenge("games_300_Elitzur_Vaidman")).module
+    probabilities = stage_probabilities(args.angle, module)
+    print(
+        f"angle {args.angle}: p_explode {probabilities.p_explode:.6f}, "
+        f"p_beep {probabilities.p_beep:.6f}"
+    )
+
+    # the one-shot QNodes against the engine, within 4 standard deviations per outcome
+    start = time.perf_counter()
+    reference = one_shot_counts(module, args.angle, args.bombs, args.one_shot_trials)
+    one_shot_seconds = time.perf_counter() - start
+    survival = (1 - probabilities.p_explode) ** args.bombs
+    expected = np.array([1 - survival, survival * probabilities.p_beep, 0])
+    expected[2] = 1 - expected[0] - expected[1]
+    sigma = np.sqrt(args.one_shot_trials * expected * (1 - expected))
+    deviation = np.abs(np.array(reference) - args.one_shot_trials * expected)
+    failures = int(np.any(deviation > 4 * sigma + 1))
+    print(
+        f"one-shot QNodes, {args.one_shot_trials} trials: {tuple(reference)} "
+        f"({args.one_shot_trials / one_shot_seconds:.0f} trials/s), "
+        f"{'consistent' if not failures else 'INCONSISTENT'} with the stage probabilities"
+    )
+
+    for function in (sample_counts, sample_trials):
+        start = time.perf_counter()
+        result = function(probabilities, args.bombs, args.trials, args.seed)
+        seconds = time.perf_counter() - start
+        if function is sample_trials:
+            result = Counts(*np.bincount(result, minlength=3).tolist())
+        print(
+            f"{function.__name__}: {args.trials} trials, {args.bombs} bombs in "
+            f"{seconds * 1e3:.1f} ms, ratio {ratio(result):.6f}"
+        )
+
+    # the 10,000-trial ratio of the solution against the 5% tolerance of the .ans files
+    exact = exact_ratio(probabilities, args.bombs)
+    std = ratio_std(probabilities, args.bombs, 10000)
+    outside = 2 * statistics.NormalDist(exact, std).cdf(0.95 * exact) if std > 0 else 0.0
+    print(
+        f"exact ratio {exact:.6f}; 10000 trials: std {std:.2e}, "
+        f"outside 5% of the exact ratio with probability {outside:.1e}"
+    )
+
+    start = time.perf_counter()
+    estimate = adaptive_estimate(probabilities, args.bombs, args.tolerance, seed=args.seed)
+    seconds = time.perf_counter() - start
+    failures += not estimate.low <= exact <= estimate.high
+    print(
+        f"adaptive, tolerance {args.tolerance}: {estimate.ratio:.6f} "
+        f"in [{estimate.low:.6f}, {estimate.high:.6f}] after {estimate.trials} trials, "
+        f"{seconds * 1e3:.1f} ms"
+    )
+
+    again = sample_counts(probabilities, args.bombs, args.trials, args.seed)
+    failures += again != sample_counts(probabilities, args.bombs, args.trials, args.seed)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#! /usr/bin/python3
+"""Grades every challenge solution against its sample ``#.in`` / ``#.ans`` pairs.
+
+Instead of piping each ``#.in`` file into a fresh ``python <solution>.py`` (and paying
+for ``import pennylane`` every time), every solution module is loaded once in the parent
+process and the cases are fanned out over a forked process pool, so that the workers
+start with all imports already warm.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.grader                      # every challenge
+    python -m qhack_tools.grader games_200_CHSH udmis -j 4
+    python -m qhack_tools.grader --cache              # reuse results of repeated inputs
+    python -m qhack_tools.grader --reuse-qnodes       # share devices and QNodes between calls
+    python -m qhack_tools.grader --statevector        # run circuits on the kernel device
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from collections import namedtuple
+
+from qhack_tools import cache as result_cache
+from qhack_tools import challenges as ch
+from qhack_tools import options
+
+Result = namedtuple("Result", ["challenge", "case", "passed", "detail", "seconds"])
+
+# Solutions loaded by the parent before the pool is forked; spawned workers fill it lazily.
+_SOLUTIONS = {}
+
+
+def grade(selected, jobs=None, cache=None):
+    """Runs every sample case of the selected challenges.
+
+    Args:
+        - selected (list(Challenge)): challenges to grade
+        - jobs (int): number of worker processes, defaults to the number of CPUs
+        - cache (ResultCache): if given, the solutions' entry functions are served from
+          this result cache, see :mod:`qhack_tools.cache`
+
+    Returns:
+        - (list(Result)): one result per case, in challenge and case order
+    """
+
+    tasks = [(challenge, case) for challenge in selected for case in challenge.cases]
+    if not tasks:
+        return []
+
+    for challenge in selected:
+        solution = _load(challenge)
+        if cache is not None:
+            result_cache.install(solution, cache)
+
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if jobs == 1:
+        results = [_grade_case(task) for task in tasks]
+    else:
+        pool = _pool_context().Pool(jobs)
+        try:
+            results = pool.map(_grade_case, tasks, chunksize=1)
+        finally:
+            # closed rather than terminated, so that the workers run their exit hooks
+            pool.close()
+            pool.join()
+
+    return results
+
+
+def _grade_case(task):
+    challenge, case = task
+    payload, expected = ch.read_case(case)
+
+    start = time.perf_counter()
+    try:
+        output = ch.run_solution(_load(challenge), payload)
+    except Exception:  # pylint: disable=broad-except
+        error = traceback.format_exc().strip().splitlines()[-1]
+        return Result(challenge.name, case.name, False, error, time.perf_counter() - start)
+    seconds = time.perf_counter() - start
+
+    passed, detail = ch.compare_output(challenge, output, expected)
+    return Result(challenge.name, case.name, passed, detail, seconds)
+
+
+def _load(challenge):
+    if challenge.name not in _SOLUTIONS:
+        _SOLUTIONS[challenge.name] = ch.load_solution(challenge)
+
+    return _SOLUTIONS[challenge.name]
+
+
+def _pool_context():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+
+    return multiprocessing.get_context()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("challenges", nargs="*", help="challenges to grade (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, help="number of worker processes")
+    options.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    cache = options.configure(args)
+    start = time.perf_counter()
+    results = grade(ch.select_challenges(args.challenges), args.jobs, cache)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = "PASS" if result.passed else "FAIL"
+        line = f"{status} {result.challenge} {result.case} ({result.seconds:.2f}s)"
+        if result.detail:
+            line += f": {result.detail}"
+        print(line)
+
+    passed = sum(result.passed for result in results)
+    print(f"{passed}/{len(results)} cases passed in {elapsed:.2f}s")
+
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
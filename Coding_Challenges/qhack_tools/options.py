@@ -0,0 +1,57 @@
+"""Command-line options shared by the grader, resident solver, batch mode and benchmarks.
+
+    - ``--cache``: serve repeated inputs from the on-disk result cache (:mod:`.cache`)
+    - ``--reuse-qnodes``: share devices and QNodes between calls (:mod:`.qnode_cache`)
+    - ``--statevector``: run ``default.qubit`` circuits on the kernel device
+      (:mod:`.statevector`)
+
+:func:`configure` also installs the QNode profiler when ``QHACK_PROFILE`` is set
+(:mod:`.profiler`), so every entry point taking these options honours the variable.
+"""
+from qhack_tools import cache as result_cache
+from qhack_tools import qnode_cache, statevector
+from qhack_tools.profiler import install_from_env
+
+
+def add_arguments(parser, cache=True):
+    """Adds the shared options to an argument parser.
+
+    Args:
+        - parser (argparse.ArgumentParser): parser of the entry point
+        - cache (bool): whether the entry point supports ``--cache``
+    """
+
+    if cache:
+        parser.add_argument(
+            "--cache", action="store_true", help="reuse cached results of repeated inputs"
+        )
+    parser.add_argument(
+        "--reuse-qnodes", action="store_true", help="share devices and QNodes between calls"
+    )
+    parser.add_argument(
+        "--statevector", action="store_true", help="run default.qubit circuits on the kernel device"
+    )
+
+
+def configure(args):
+    """Installs the hooks selected on the command line.
+
+    Must run before the solutions are loaded, so that module-level devices and QNodes
+    are created through the hooks too. The profiler of ``QHACK_PROFILE`` is installed
+    last, so that it measures the QNodes the other hooks produce.
+
+    Args:
+        - args (argparse.Namespace): parsed arguments
+
+    Returns:
+        - (ResultCache): the result cache to install on the solutions, or ``None``
+    """
+
+    # installed first so that the QNode cache also shares the kernel devices
+    if args.statevector:
+        statevector.install()
+    if args.reuse_qnodes:
+        qnode_cache.install()
+    install_from_env()
+
+    return result_cache.ResultCache() if getattr(args, "cache", False) else None
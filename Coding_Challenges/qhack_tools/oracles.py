@@ -0,0 +1,529 @@
+#! /usr/bin/python3
+"""Truth tables of classical reversible oracles, for the Deutsch-Jozsa family.
+
+The oracles of ``deutsch_jozsa`` (algorithms_100) and ``deutsch_jozsa_strikes_again``
+(algorithms_500) are sequences of X-type gates (``PauliX``, ``CNOT``, ``Toffoli``, ...),
+i.e. classical reversible circuits: they permute the computational basis states. Each
+call of those solutions still simulates a 3- or 7-qubit statevector.
+
+Here an oracle is traced once into a tape, and its gates are applied to integers, one
+bit per wire (:func:`apply_classical`). :func:`truth_table` packs ``f(x)`` for every
+input into one integer (bit ``x`` is ``f(x)``), and the Deutsch-Jozsa questions become
+bit operations on it:
+
+    - :func:`classify`: constant when no bit or every bit is set, balanced when half are
+    - :func:`compare_oracles`: the "4 same" / "2 and 2" question of algorithms_500
+    - :func:`classify_oracles`: whole batches of CNOT oracles given as control lists, like
+      the algorithms_100 inputs, in one vectorized pass
+
+:func:`oracle_types` generalizes the algorithms_500 circuit to any number of oracles on
+any number of inputs. Instead of one ancilla per oracle, whose statevector doubles with
+every oracle, it can reuse a single ancilla, measured and reset after each round; the
+report compares the memory and time of both layouts.
+
+An oracle with any other gate, or one that is not of the form
+``|x>|y> -> |x>|y XOR f(x)>``, has no truth table; :func:`deutsch_jozsa` then falls back
+to the Deutsch-Jozsa circuit on a statevector.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.oracles
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from qhack_tools import challenges as ch
+from qhack_tools import statevector
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+LAYOUTS = ("ancillas", "reset")
+
+_HADAMARD = np.array([[1, 1], [1, -1]]) / np.sqrt(2)
+
+# gates permuting the basis states; all of them are their own inverse
+CLASSICAL_GATES = frozenset(
+    ["Identity", "PauliX", "CNOT", "Toffoli", "MultiControlledX", "SWAP", "CSWAP"]
+)
+
+
+def trace(oracle, *args, **kwargs):
+    """Operations queued by a quantum function."""
+
+    with qml.tape.QuantumTape() as tape:
+        oracle(*args, **kwargs)
+    return tape.operations
+
+
+def is_classical(operations):
+    """Whether every operation permutes the computational basis states."""
+
+    return all(getattr(op, "base_name", op.name) in CLASSICAL_GATES for op in operations)
+
+
+def apply_classical(operations, states, wires):
+    """Applies X-type gates to basis states.
+
+    Args:
+        - operations (list(qml.operation.Operation)): gates of :data:`CLASSICAL_GATES`
+        - states (np.ndarray): basis states as integers, the first wire most significant
+        - wires (list): wire labels of the bits, at most 62
+
+    Returns:
+        - (np.ndarray): the images of the states
+    """
+
+    states = np.array(states, dtype=np.int64)
+    position = {wire: len(wires) - 1 - i for i, wire in enumerate(wires)}
+
+    for op in operations:
+        name = getattr(op, "base_name", op.name)
+        if name not in CLASSICAL_GATES:
+            raise ValueError(f"{name} is not a classical reversible gate")
+        if name == "Identity":
+            continue
+
+        op_wires = list(op.wires)
+        n_targets = 2 if name in ("SWAP", "CSWAP") else 1
+        controls, targets = op_wires[:-n_targets], op_wires[-n_targets:]
+        values = getattr(op, "control_values", None) or "1" * len(controls)
+
+        # the gate acts on the states whose controls hold the control values
+        control_mask = sum(1 << position[wire] for wire in controls)
+        control_bits = sum(1 << position[wire] for wire, v in zip(controls, values) if v == "1")
+        active = (states & control_mask) == control_bits
+
+        if n_targets == 1:
+            flip = 1 << position[targets[0]]
+        else:
+            # a swap flips both bits when they differ
+            a, b = (position[wire] for wire in targets)
+            active &= ((states >> a) ^ (states >> b)) & 1 == 1
+            flip = (1 << a) | (1 << b)
+
+        states ^= np.where(active, flip, 0)
+
+    return states
+
+
+def truth_table(operations, input_wires, output_wire):
+    """Truth table of an oracle ``|x>|y> -> |x>|y XOR f(x)>`` made of X-type gates.
+
+    Any other wire the oracle touches is an ancilla, which must start and end in ``|0>``.
+
+    Args:
+        - operations (list(qml.operation.Operation)): the oracle, e.g. from :func:`trace`
+        - input_wires (list): wires of ``x``, the first one its most significant bit
+        - output_wire: wire of ``y``
+
+    Returns:
+        - (int): bit ``x`` is ``f(x)``; ``None`` if the oracle has another gate or form
+    """
+
+    if not is_classical(operations):
+        return None
+
+    wires = list(input_wires) + [output_wire]
+    wires += sorted({w for op in operations for w in op.wires} - set(wires), key=str)
+
+    # every input x, with y = 0 and y = 1 and the ancillas in |0>
+    shift = len(wires) - len(input_wires)
+    inputs = np.arange(2 ** len(input_wires), dtype=np.int64) << shift
+    y = np.int64(1) << (shift - 1)
+    images = apply_classical(operations, np.concatenate([inputs, inputs | y]), wires)
+
+    outputs = images[: len(inputs)] ^ inputs
+    if np.any(outputs & ~y) or np.any(images[len(inputs) :] ^ images[: len(inputs)] ^ y):
+        return None
+
+    bits = (outputs >> (shift - 1)).astype(np.uint8)
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def classify(table, n_inputs):
+    """Type of a packed truth table: ``"constant"``, ``"balanced"`` or ``"neither"``."""
+
+    full = (1 << 2 ** n_inputs) - 1
+    if table in (0, full):
+        return "constant"
+    if bin(table).count("1") == 2 ** (n_inputs - 1):
+        return "balanced"
+    return "neither"
+
+
+def statevector_type(operations, input_wires, output_wire):
+    """Type of any oracle, from the exact output state of the Deutsch-Jozsa circuit."""
+
+    wires = list(input_wires) + [output_wire]
+    wires += sorted({w for op in operations for w in op.wires} - set(wires), key=str)
+    dev = qml.device("default.qubit", wires=wires)
+
+    @qml.qnode(dev)
+    def circuit():
+        qml.PauliX(wires=output_wire)
+        for wire in list(input_wires) + [output_wire]:
+            qml.Hadamard(wires=wire)
+        for op in operations:
+            qml.apply(op)
+        for wire in input_wires:
+            qml.Hadamard(wires=wire)
+        return qml.probs(wires=input_wires)
+
+    # the input register returns to |0...0> exactly when f is constant
+    zeros = float(circuit()[0])
+    if np.isclose(zeros, 1):
+        return "constant"
+    if np.isclose(zeros, 0):
+        return "balanced"
+    return "neither"
+
+
+def deutsch_jozsa(oracle, input_wires, output_wire, *args, **kwargs):
+    """Type of an oracle, by its truth table when it is classical.
+
+    Args:
+        - oracle (callable): quantum function of the oracle, called with ``args`` and
+          ``kwargs``
+        - input_wires (list): wires of ``x``
+        - output_wire: wire of ``y``
+
+    Returns:
+        - (str): ``"constant"``, ``"balanced"`` or ``"neither"``
+    """
+
+    operations = trace(oracle, *args, **kwargs)
+    table = truth_table(operations, input_wires, output_wire)
+    if table is None:
+        return statevector_type(operations, input_wires, output_wire)
+    return classify(table, len(input_wires))
+
+
+def compare_oracles(fs, wires=(0, 1, 2)):
+    """Answers the algorithms_500 question on oracles ``f(wires)``.
+
+    Returns:
+        - (str): ``"4 same"`` when all the oracles have the same type, ``"2 and 2"`` when
+          half of them are constant, ``"bad input"`` otherwise
+    """
+
+    wires = list(wires)
+    return _compare([deutsch_jozsa(f, wires[:-1], wires[-1], wires) for f in fs])
+
+
+def _compare(types):
+    if len(set(types)) == 1:
+        return "4 same"
+    if types.count("constant") * 2 == len(types):
+        return "2 and 2"
+    return "bad input"
+
+
+def parse_spec(spec):
+    """CNOT control list of an oracle spec, a sequence of wires or a stdin line ``"0,1"``."""
+
+    if isinstance(spec, str):
+        return [int(i) for i in spec.split(",") if i.strip()]
+    return [int(i) for i in spec]
+
+
+def classify_oracles(specs, n_inputs=2):
+    """Types of many CNOT oracles, as ``deutsch_jozsa`` of algorithms_100 reads them.
+
+    Spec ``[i, j, ...]`` stands for ``CNOT(i, n_inputs)``, ``CNOT(j, n_inputs)``, ...:
+    ``f(x)`` is the parity of the input bits selected by the XOR of ``1 << i`` over the
+    controls, constant when that mask is zero and balanced otherwise. The masks of all
+    the specs come from one ``bitwise_xor.reduceat`` over their concatenated controls.
+
+    Args:
+        - specs (list or np.ndarray): control lists or stdin lines, see :func:`parse_spec`,
+          or a 2-D integer array of control lists of the same length
+        - n_inputs (int): number of input wires, at most 62
+
+    Returns:
+        - (list(str)): ``"constant"`` or ``"balanced"`` for every spec, in order
+    """
+
+    if isinstance(specs, np.ndarray) and specs.ndim == 2:
+        flat = specs.astype(np.int64).ravel()
+        lengths = np.full(len(specs), specs.shape[1], dtype=np.int64)
+    else:
+        controls = [parse_spec(spec) if isinstance(spec, str) else spec for spec in specs]
+        lengths = np.fromiter(map(len, controls), dtype=np.int64, count=len(controls))
+        flat = np.fromiter(
+            itertools.chain.from_iterable(controls), dtype=np.int64, count=int(lengths.sum())
+        )
+    if np.any((flat < 0) | (flat >= n_inputs)):
+        raise ValueError(f"control wires must be input wires 0..{n_inputs - 1}")
+
+    # a leading 0 in every segment, so that empty control lists reduce to 0
+    starts = np.cumsum(lengths) - lengths
+    bits = np.insert(np.int64(1) << flat, starts, 0)
+    masks = np.bitwise_xor.reduceat(bits, starts + np.arange(len(starts)))
+
+    labels = np.array(["balanced", "constant"])
+    return labels[(masks == 0).astype(int)].tolist()
+
+
+def layout_wires(n_oracles, n_inputs, layout):
+    """Number of wires of the statevector of :func:`oracle_types`."""
+
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout {layout!r}, expected one of {LAYOUTS}")
+    return n_inputs + 1 + (n_oracles if layout == "ancillas" else 1)
+
+
+def _flag_constant(state, n_inputs, ancilla):
+    # flips the ancilla on the component where the inputs are |0...0>
+    state = np.array(state)
+    index = (slice(None),) + (0,) * n_inputs
+    state[index] = np.flip(state[index], axis=1 + ancilla - n_inputs).copy()
+    return state
+
+
+def _round(state, operations, n_inputs, ancilla):
+    """One Deutsch-Jozsa round, leaving the inputs and output as they were."""
+
+    for op in operations:
+        state = statevector.apply_operation(state, op, list(op.wires))
+    for wire in range(n_inputs):
+        state = statevector.apply_matrix(state, _HADAMARD, [wire])
+
+    state = _flag_constant(state, n_inputs, ancilla)
+
+    # the inputs back in the X basis and the phase (-1)^f(x) undone
+    for wire in range(n_inputs):
+        state = statevector.apply_matrix(state, _HADAMARD, [wire])
+    for op in operations:
+        state = statevector.apply_operation(state, op, list(op.wires))
+    return state
+
+
+def oracle_types(fs, n_inputs, layout="reset", seed=None):
+    """Types of any number of oracles, from Deutsch-Jozsa rounds on one statevector.
+
+    Oracle ``f(wires)`` acts on inputs ``wires[:-1]`` and output ``wires[-1]``, which are
+    wires ``0 .. n_inputs``. Each round flips an ancilla when the inputs come back to
+    ``|0...0>``, i.e. when the oracle is constant, then uncomputes the oracle's phase so
+    the next round starts from the same inputs. The ancillas are placed by ``layout``:
+
+        - ``"ancillas"``: one per oracle, all sampled at the end, as in algorithms_500
+          (``n_inputs + 1 + len(fs)`` wires)
+        - ``"reset"``: a single one, measured after every round and reset to ``|0>``, the
+          outcomes being accumulated classically (``n_inputs + 2`` wires)
+
+    PennyLane 0.21 has no mid-circuit measurements, so the circuit is run on the
+    :mod:`.statevector` kernels, which measure and reset between rounds.
+
+    Args:
+        - fs (list(callable)): the oracles
+        - n_inputs (int): number of input wires
+        - layout (str): one of :data:`LAYOUTS`
+        - seed (int): seed of the samples, which are only random for oracles that are
+          neither constant nor balanced
+
+    Returns:
+        - (list(str)): ``"constant"`` or ``"balanced"`` for every oracle
+    """
+
+    n_wires = layout_wires(len(fs), n_inputs, layout)
+    rng = np.random.default_rng(seed)
+    wires = list(range(n_inputs + 1))
+
+    # inputs in |+...+>, output in |->, ancillas in |0>
+    state = np.zeros((1,) + (2,) * n_wires, dtype=complex)
+    state[(0,) + (0,) * n_inputs + (1,) + (0,) * (n_wires - n_inputs - 1)] = 1
+    for wire in wires:
+        state = statevector.apply_matrix(state, _HADAMARD, [wire])
+
+    flags = []
+    for i, f in enumerate(fs):
+        operations = trace(f, wires)
+        if layout == "ancillas":
+            state = _round(state, operations, n_inputs, n_inputs + 1 + i)
+            continue
+
+        ancilla = n_inputs + 1
+        state = _round(state, operations, n_inputs, ancilla)
+        # measurement of the ancilla, then reset of the collapsed state to |0>
+        ones = np.take(state, 1, axis=1 + ancilla)
+        outcome = int(rng.random() < np.sum(np.abs(ones) ** 2))
+        kept = ones if outcome else np.take(state, 0, axis=1 + ancilla)
+        kept = kept / np.linalg.norm(kept)
+        state = np.stack([kept, np.zeros_like(kept)], axis=1 + ancilla)
+        flags.append(outcome)
+
+    if layout == "ancillas":
+        # one sample of all the ancillas
+        probabilities = np.sum(
+            np.reshape(np.abs(state) ** 2, (2 ** (n_inputs + 1), -1)), axis=0
+        )
+        outcome = rng.choice(len(probabilities), p=probabilities / probabilities.sum())
+        flags = [int(bit) for bit in format(outcome, f"0{len(fs)}b")]
+
+    return ["constant" if flag else "balanced" for flag in flags]
+
+
+def _parity_oracle(controls, flip=False):
+    # f(x) = XOR of the control bits, negated by flip
+    def oracle(wires):
+        for control in controls:
+            qml.CNOT(wires=[wires[control], wires[-1]])
+        if flip:
+            qml.PauliX(wires=wires[-1])
+
+    return oracle
+
+
+def _random_specs(n_specs, n_inputs=2, max_controls=8, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(0, max_controls + 1, n_specs)
+    flat = rng.integers(0, n_inputs, int(lengths.sum())).tolist()
+    ends = np.cumsum(lengths).tolist()
+    return [flat[end - length : end] for end, length in zip(ends, lengths.tolist())]
+
+
+def benchmark_workloads():
+    """Oracle batches benchmarked by :mod:`.bench`, as ``(label, callable)`` pairs."""
+
+    def workload(n_specs):
+        specs = _random_specs(n_specs)
+        return lambda: classify_oracles(specs)
+
+    return [("1e4_cnot_oracles", workload(10 ** 4)), ("1e5_cnot_oracles", workload(10 ** 5))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inputs", type=int, default=6, help="input wires of the random oracles")
+    parser.add_argument("--oracles", type=int, default=200, help="random oracles checked")
+    parser.add_argument(
+        "--layout-oracles",
+        type=int,
+        nargs="+",
+        default=[4, 8, 12, 16],
+        help="numbers of oracles of the layout scaling report",
+    )
+    parser.add_argument("--layout-inputs", type=int, default=2, help="inputs of those oracles")
+    parser.add_argument("--specs", type=int, default=10 ** 5, help="oracles classified at once")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failures = 0
+
+    # the CNOT oracles of algorithms_100, against the solution
+    solution = ch.load_solution(ch.get_challenge("algorithms_100_DeutschJozsa"))
+    cases = [c for length in range(1, 5) for c in itertools.product([0, 1], repeat=length)]
+    for numbers in cases:
+
+        def oracle(numbers=numbers):
+            for i in numbers:
+                qml.CNOT(wires=[i, 2])
+
+        compiled = deutsch_jozsa(oracle, [0, 1], 2)
+        if compiled != solution.module.deutsch_jozsa(oracle):
+            failures += 1
+            print(f"MISMATCH {numbers}: compiled {compiled}")
+    expected = [deutsch_jozsa(_parity_oracle(c), [0, 1], 2, [0, 1, 2]) for c in cases]
+    if classify_oracles(cases) != expected:
+        failures += 1
+        print("MISMATCH between classify_oracles and the truth tables")
+    print(f"algorithms_100: {len(cases)} inputs checked, {failures} mismatches")
+
+    # throughput of the batched classification against one solution call per oracle
+    specs = _random_specs(args.specs, seed=args.seed)
+    start = time.perf_counter()
+    classify_oracles(specs)
+    batched_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for numbers in specs[:20]:
+
+        def oracle(numbers=numbers):
+            for i in numbers:
+                qml.CNOT(wires=[i, 2])
+
+        solution.module.deutsch_jozsa(oracle)
+    solution_seconds = (time.perf_counter() - start) / 20
+    print(
+        f"{len(specs)} oracles classified in {batched_seconds:.3f} s "
+        f"({len(specs) / batched_seconds:.0f} oracles/s, solution {1 / solution_seconds:.0f}/s)"
+    )
+
+    # every input of algorithms_500, against the statevector fallback
+    solution = ch.load_solution(ch.get_challenge("algorithms_500_DeutschJozsaStrikesAgain"))
+    for numbers in itertools.product([0, 1], repeat=8):
+        fs = [_parity_oracle(numbers[2 * i : 2 * i + 2], flip=i >= 2) for i in range(4)]
+        compiled = compare_oracles(fs)
+        types = [statevector_type(trace(f, [0, 1, 2]), [0, 1], 2) for f in fs]
+        reference = _compare(types)
+        answers = [compiled, solution.module.deutsch_jozsa(fs)]
+        answers += [_compare(oracle_types(fs, 2, layout)) for layout in LAYOUTS]
+        if set(answers) != {reference}:
+            failures += 1
+            print(f"MISMATCH {numbers}: {answers}, statevector {reference}")
+    print(f"algorithms_500: 256 inputs checked, {failures} mismatches in total")
+
+    # random Toffoli / CNOT oracles, of any type
+    rng = np.random.default_rng(args.seed)
+    n = args.inputs
+    input_wires, output_wire = list(range(n)), n
+    checked = 0
+    compiled_seconds = statevector_seconds = 0.0
+    for _ in range(args.oracles):
+        controls = rng.choice(n, int(rng.integers(0, 3)), replace=False).tolist()
+        pairs = [rng.choice(n, 2, replace=False).tolist() for _ in range(int(rng.integers(0, 3)))]
+
+        def oracle():
+            # x_i XOR ..., optionally scrambled by reversible gates on the inputs
+            for a, b in pairs:
+                qml.Toffoli(wires=[a, b, n + 1])
+                qml.CNOT(wires=[n + 1, output_wire])
+                qml.Toffoli(wires=[a, b, n + 1])
+            for control in controls:
+                qml.CNOT(wires=[control, output_wire])
+
+        start = time.perf_counter()
+        compiled = deutsch_jozsa(oracle, input_wires, output_wire)
+        compiled_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        reference = statevector_type(trace(oracle), input_wires, output_wire)
+        statevector_seconds += time.perf_counter() - start
+
+        checked += 1
+        if compiled != reference:
+            failures += 1
+            print(f"MISMATCH controls={controls} pairs={pairs}: {compiled} != {reference}")
+
+    print(
+        f"{checked} random oracles on {n} inputs: truth tables {compiled_seconds:.3f} s, "
+        f"statevectors {statevector_seconds:.3f} s"
+    )
+
+    # memory and time of the two ancilla layouts; 4 oracles on 2 inputs is algorithms_500
+    n = args.layout_inputs
+    for n_oracles in args.layout_oracles:
+        controls = [
+            rng.choice(n, int(rng.integers(0, n + 1)), replace=False) for _ in range(n_oracles)
+        ]
+        fs = [_parity_oracle(c.tolist(), flip=bool(rng.integers(2))) for c in controls]
+        expected = ["constant" if len(c) == 0 else "balanced" for c in controls]
+        line = f"{n_oracles:3d} oracles on {n} inputs:"
+        for layout in LAYOUTS:
+            n_wires = layout_wires(n_oracles, n, layout)
+            start = time.perf_counter()
+            types = oracle_types(fs, n, layout, seed=args.seed)
+            seconds = time.perf_counter() - start
+            failures += types != expected
+            kib = 16 * 2 ** n_wires / 1024
+            line += f"  {layout} {n_wires:2d} wires {kib:9.1f} KiB {seconds:7.3f} s"
+        print(line)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
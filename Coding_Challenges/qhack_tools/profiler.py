@@ -0,0 +1,337 @@
+#! /usr/bin/python3
+"""QNode execution counter and per-call profiler.
+
+Installing a :class:`Profiler` wraps ``qml.QNode.__call__`` and
+``qml.QubitDevice.execute``, so every QNode built by the solutions (at module level or
+inside functions) is measured without touching the scripts. For every QNode function it
+records:
+
+    - calls, and how many of them were made while being differentiated (their arguments
+      carry autograd boxes, e.g. inside ``qml.grad`` or an optimizer step)
+    - circuit executions triggered by those calls
+    - gradient executions, i.e. the executions run during the backward pass by rules like
+      the parameter-shift; they happen outside any QNode call and are attributed to the
+      QNode that was differentiated last
+    - device short name, wire count and the time spent in the calls
+
+The summary lists these per QNode, followed by the time per call stack in the folded
+``frame;frame;qnode microseconds`` format understood by flame graph tools.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.profiler games_200_CHSH < games_200_CHSH_template/1.in
+    python -m qhack_tools.profiler games_200_CHSH --folded chsh.folded < games_200_CHSH_template/1.in
+
+Setting ``QHACK_PROFILE`` makes :func:`install_from_env` (called by every entry point
+that takes the shared options, see :mod:`.options`) dump the summary at exit, to stderr
+for ``QHACK_PROFILE=1`` or to the file it names. QNodes run in forked workers (grader and
+batch pools, benchmark entries) are included: every worker spools its statistics when it
+exits, and the parent merges them into its summary.
+"""
+import argparse
+import atexit
+import glob
+import multiprocessing.util
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from qhack_tools import challenges as ch
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class QNodeStats:
+    """Counters for all QNodes sharing one quantum function."""
+
+    def __init__(self, name, device, num_wires):
+        self.name = name
+        self.device = device
+        self.num_wires = num_wires
+        self.calls = 0
+        self.gradient_calls = 0
+        self.executions = 0
+        self.gradient_executions = 0
+        self.seconds = 0.0
+        self.gradient_seconds = 0.0
+
+
+class Profiler:
+    """Collects QNode statistics while installed.
+
+    Can be used as a context manager::
+
+        with Profiler() as profiler:
+            ch.run_solution(solution, payload)
+        print(profiler.summary())
+    """
+
+    def __init__(self):
+        self._originals = None
+        self.reset()
+
+    def reset(self):
+        """Drops the statistics collected so far."""
+
+        self.stats = {}
+        self.stacks = Counter()
+        self.executions = 0
+        self._active = []
+        self._last_differentiated = None
+
+    def snapshot(self):
+        """Picklable copy of the statistics, see :meth:`merge`.
+
+        Returns:
+            - (list(QNodeStats)): statistics of every QNode function
+            - (Counter): time per call stack
+            - (int): total circuit executions
+        """
+
+        return list(self.stats.values()), Counter(self.stacks), self.executions
+
+    def merge(self, snapshot):
+        """Adds the statistics of a :meth:`snapshot`, e.g. one taken in another process."""
+
+        stats, stacks, executions = snapshot
+        by_name = {existing.name: existing for existing in self.stats.values()}
+        for other in stats:
+            if other.name not in by_name:
+                self.stats[other.name] = by_name[other.name] = other
+                continue
+            mine = by_name[other.name]
+            for field in ("calls", "gradient_calls", "executions", "gradient_executions"):
+                setattr(mine, field, getattr(mine, field) + getattr(other, field))
+            mine.seconds += other.seconds
+            mine.gradient_seconds += other.gradient_seconds
+
+        self.stacks.update(stacks)
+        self.executions += executions
+
+    def install(self):
+        """Wraps ``QNode.__call__`` and ``QubitDevice.execute``."""
+
+        if self._originals is not None:
+            return
+
+        self._originals = (qml.QNode.__call__, qml.QubitDevice.execute)
+        original_call, original_execute = self._originals
+        profiler = self
+
+        def call(qnode, *args, **kwargs):
+            return profiler._profile_call(original_call, qnode, args, kwargs)
+
+        def execute(device, circuit, **kwargs):
+            return profiler._profile_execute(original_execute, device, circuit, kwargs)
+
+        qml.QNode.__call__ = call
+        qml.QubitDevice.execute = execute
+
+    def uninstall(self):
+        """Restores the original PennyLane methods."""
+
+        if self._originals is None:
+            return
+
+        qml.QNode.__call__, qml.QubitDevice.execute = self._originals
+        self._originals = None
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def _profile_call(self, original, qnode, args, kwargs):
+        stats = self._stats_for(qnode)
+        differentiated = _has_boxes(args) or _has_boxes(kwargs.values())
+        executions = self.executions
+
+        self._active.append(stats)
+        start = time.perf_counter()
+        try:
+            return original(qnode, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._active.pop()
+
+            stats.calls += 1
+            stats.seconds += elapsed
+            stats.executions += self.executions - executions
+            if differentiated:
+                stats.gradient_calls += 1
+                self._last_differentiated = stats
+
+            self.stacks[_call_stack() + (stats.name,)] += elapsed
+
+    def _profile_execute(self, original, device, circuit, kwargs):
+        self.executions += 1
+        if self._active or self._last_differentiated is None:
+            return original(device, circuit, **kwargs)
+
+        stats = self._last_differentiated
+        start = time.perf_counter()
+        try:
+            return original(device, circuit, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.gradient_executions += 1
+            stats.gradient_seconds += elapsed
+            self.stacks[_call_stack() + (stats.name, "gradient")] += elapsed
+
+    def _stats_for(self, qnode):
+        code = getattr(qnode.func, "__code__", qnode.func)
+        if code not in self.stats:
+            device = getattr(qnode, "_original_device", qnode.device)
+            name = f"{_script_name(code.co_filename)}.{qnode.func.__qualname__}"
+            self.stats[code] = QNodeStats(name, device.short_name, len(device.wires))
+
+        return self.stats[code]
+
+    def summary(self):
+        """Per-QNode table followed by the folded call stacks.
+
+        Returns:
+            - (str): the report
+        """
+
+        header = (
+            f"{'QNode':55s} {'device':22s} {'wires':>5s} {'calls':>7s} {'grad':>6s} "
+            f"{'exec':>7s} {'grad exec':>9s} {'seconds':>9s} {'ms/call':>8s}"
+        )
+        lines = [header, "-" * len(header)]
+        for stats in sorted(self.stats.values(), key=lambda s: -(s.seconds + s.gradient_seconds)):
+            per_call = 1000 * stats.seconds / stats.calls if stats.calls else 0.0
+            lines.append(
+                f"{stats.name:55s} {stats.device:22s} {stats.num_wires:5d} {stats.calls:7d} "
+                f"{stats.gradient_calls:6d} {stats.executions:7d} {stats.gradient_executions:9d} "
+                f"{stats.seconds + stats.gradient_seconds:9.3f} {per_call:8.3f}"
+            )
+        lines.append(f"total circuit executions: {self.executions}")
+        lines.append("")
+        lines.extend(self.folded())
+
+        return "\n".join(lines) + "\n"
+
+    def folded(self):
+        """Time per call stack, one ``frame;frame;qnode microseconds`` line each."""
+
+        return [
+            f"{';'.join(stack)} {int(round(seconds * 1e6))}"
+            for stack, seconds in sorted(self.stacks.items())
+        ]
+
+
+def install_from_env():
+    """Installs a profiler that dumps its summary at exit if ``QHACK_PROFILE`` is set.
+
+    Returns:
+        - (Profiler): the installed profiler, or ``None`` if the variable is not set
+    """
+
+    target = os.environ.get("QHACK_PROFILE")
+    if not target:
+        return None
+
+    profiler = Profiler()
+    profiler.install()
+
+    spool = tempfile.mkdtemp(prefix="qhack-profile-")
+    multiprocessing.util.register_after_fork(profiler, lambda p: _spool_at_exit(p, spool))
+    atexit.register(_dump, profiler, target, spool)
+
+    return profiler
+
+
+def _spool_at_exit(profiler, spool):
+    # runs in every forked multiprocessing child: the child starts from empty counters
+    # and writes them to the spool when it exits normally (atexit hooks do not run there)
+    profiler.reset()
+    multiprocessing.util.Finalize(None, _spool, args=(profiler, spool), exitpriority=0)
+
+
+def _spool(profiler, spool):
+    fd, path = tempfile.mkstemp(suffix=".pickle", dir=spool)
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(profiler.snapshot(), f)
+
+
+def _dump(profiler, target, spool):
+    for path in glob.glob(os.path.join(spool, "*.pickle")):
+        with open(path, "rb") as f:
+            profiler.merge(pickle.load(f))
+    shutil.rmtree(spool, ignore_errors=True)
+
+    if target in ("1", "stderr"):
+        sys.stderr.write(profiler.summary())
+        return
+
+    with open(target, "w") as f:
+        f.write(profiler.summary())
+
+
+def _has_boxes(values):
+    from autograd.tracer import Box  # pylint: disable=import-outside-toplevel
+
+    for value in values:
+        if isinstance(value, Box):
+            return True
+        if isinstance(value, (list, tuple)) and _has_boxes(value):
+            return True
+
+    return False
+
+
+def _call_stack():
+    frames = []
+    frame = sys._getframe(3)  # pylint: disable=protected-access
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if _is_user_code(filename):
+            frames.append(f"{_script_name(filename)}.{frame.f_code.co_name}")
+        frame = frame.f_back
+
+    return tuple(reversed(frames))
+
+
+def _is_user_code(filename):
+    return (
+        filename.startswith(ch.ROOT)
+        and not filename.startswith(PACKAGE_DIR)
+        and "site-packages" not in filename
+    )
+
+
+def _script_name(filename):
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("challenge", help="challenge to run on the payload read from stdin")
+    parser.add_argument("--folded", help="also write the folded call stacks to this file")
+    args = parser.parse_args(argv)
+
+    solution = ch.load_solution(ch.get_challenge(args.challenge))
+    with Profiler() as profiler:
+        output = ch.run_solution(solution, sys.stdin.read())
+
+    sys.stdout.write(output)
+    sys.stderr.write(profiler.summary())
+    if args.folded:
+        with open(args.folded, "w") as f:
+            f.write("\n".join(profiler.folded()) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
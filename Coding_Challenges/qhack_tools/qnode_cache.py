@@ -0,0 +1,164 @@
+#! /usr/bin/python3
+"""Structural cache for the devices and QNodes the solutions rebuild on every call.
+
+Functions such as ``deutsch_jozsa``, ``distance`` (qml_200) or ``compare_circuits``
+create a fresh ``qml.device`` and decorate a fresh QNode each time they run. Once
+:func:`install` is called, ``qml.device`` returns a shared device for every
+``(name, wires, shots, options)`` configuration, and ``qml.qnode`` returns a
+:class:`CachedQNode` backed by a shared QNode for every ``(device, quantum function
+code, QNode options)`` combination. Constructing devices and QNodes (gradient method
+selection, device capability checks) is then paid once per circuit structure.
+
+Each :class:`CachedQNode` installs its own quantum function on the shared QNode before
+calling it, so closures over the caller's arguments stay correct, and remembers the tape
+of its last call or :meth:`~CachedQNode.construct`. Tapes are still traced on every
+call, since the operations a quantum function queues may depend on its arguments;
+executions are never shared, so sampling with shots and autograd traces behave as
+without the cache.
+
+Devices are reset before every execution, so sharing them between QNodes is safe for
+the solutions, which never read device state outside a QNode call.
+"""
+import functools
+from collections import OrderedDict, namedtuple
+
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+MAX_ENTRIES = 256
+
+CacheInfo = namedtuple("CacheInfo", ["devices", "qnodes", "hits", "misses"])
+
+_devices = OrderedDict()
+_qnodes = OrderedDict()
+_counts = {"hits": 0, "misses": 0}
+_originals = {}
+
+
+class CachedQNode:
+    """Callable standing in for a QNode whose construction is shared.
+
+    Attribute access is forwarded to the shared QNode, except for the tape, which is the
+    one built by the last call of this instance.
+
+    Args:
+        - qnode (qml.QNode): the shared QNode
+        - func (callable): the quantum function this instance was decorated with
+    """
+
+    def __init__(self, qnode, func):
+        self._qnode = qnode
+        self._tape = None
+        self.func = func
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        self._qnode.func = self.func
+        try:
+            return self._qnode(*args, **kwargs)
+        finally:
+            self._tape = self._qnode.tape
+
+    def construct(self, args, kwargs):
+        """Builds the tape of this instance's quantum function without executing it."""
+
+        self._qnode.func = self.func
+        try:
+            return self._qnode.construct(args, kwargs)
+        finally:
+            self._tape = self._qnode.tape
+
+    @property
+    def tape(self):
+        return self._tape
+
+    @property
+    def qtape(self):
+        return self._tape
+
+    def __getattr__(self, name):
+        return getattr(self._qnode, name)
+
+
+def install():
+    """Routes ``qml.device`` and ``qml.qnode`` through the cache."""
+
+    if _originals:
+        return
+
+    _originals["device"] = qml.device
+    _originals["qnode"] = qml.qnode
+    qml.device = _device
+    qml.qnode = _qnode
+
+
+def uninstall():
+    """Restores ``qml.device`` and ``qml.qnode`` and empties the cache."""
+
+    if not _originals:
+        return
+
+    qml.device = _originals.pop("device")
+    qml.qnode = _originals.pop("qnode")
+    _devices.clear()
+    _qnodes.clear()
+
+
+def cache_info():
+    """Number of cached devices and QNodes, and the hits / misses so far."""
+
+    return CacheInfo(len(_devices), len(_qnodes), _counts["hits"], _counts["misses"])
+
+
+def _lookup(cache, key, build):
+    if key is None:
+        return build()
+
+    if key in cache:
+        _counts["hits"] += 1
+        cache.move_to_end(key)
+        return cache[key]
+
+    _counts["misses"] += 1
+    cache[key] = build()
+    if len(cache) > MAX_ENTRIES:
+        cache.popitem(last=False)
+
+    return cache[key]
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, range)):
+        return (type(value).__name__,) + tuple(_freeze(v) for v in value)
+    hash(value)
+    return value
+
+
+def _key(*parts):
+    try:
+        return _freeze(parts)
+    except TypeError:
+        return None
+
+
+def _device(name, *args, **kwargs):
+    key = _key(name, args, kwargs)
+    return _lookup(_devices, key, lambda: _originals["device"](name, *args, **kwargs))
+
+
+def _qnode(device, **kwargs):
+    def decorator(func):
+        code = getattr(func, "__code__", None)
+        key = None if code is None else _key(code, kwargs)
+        if key is not None:
+            # the cached QNode keeps its device alive, so the id cannot be reused
+            key = (id(device), key)
+
+        qnode = _lookup(_qnodes, key, lambda: qml.QNode(func, device, **kwargs))
+        return CachedQNode(qnode, func)
+
+    return decorator
+
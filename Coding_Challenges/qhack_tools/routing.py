@@ -0,0 +1,485 @@
+#! /usr/bin/python3
+"""Whole-circuit qubit routing on a coupling map.
+
+``adapting_topology.n_swaps`` (algorithms_200) prices a single CNOT in isolation. A
+circuit moves qubits around as it goes, so the sum of those per-gate minimums is not the
+cost of running it. :func:`route_circuit` routes a whole operation list:
+
+    - it tracks the logical-to-physical qubit mapping gate by gate
+    - it runs every gate whose qubits are adjacent as soon as its predecessors have run
+    - when all remaining two-qubit gates are blocked, it inserts the SWAP that most
+      reduces the hop distance of those gates and of the next ``lookahead`` two-qubit
+      gates, the latter weighted by ``lookahead_weight`` (the SABRE heuristic, with its
+      decay factor against swapping the same qubits back and forth)
+
+Every candidate SWAP is scored at once: the distance change of each gate end is read from
+the distance rows of its qubit's neighbours and summed per coupling. The blocked and
+lookahead gates are only recomputed when gates run, and a SWAP is only followed by a
+search for runnable gates when it brings one of its qubits' gates together.
+
+Coupling maps are ``{qubit: [neighbours]}`` dictionaries, like ``adapting_topology.graph``,
+or :class:`.coupling.CouplingMap` instances loaded from a file. Their distance and next-hop
+tables come from :func:`.coupling.distance_tables`, so they are computed once per map.
+
+The report routes random circuits on the 9-qubit challenge map and on square lattices,
+and compares the SWAP count with the sum of the per-gate ``n_swaps`` estimates.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.routing
+    python -m qhack_tools.routing --gates 5000 --seed 3
+    python -m qhack_tools.routing --coupling-map heavy_hex.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from qhack_tools import challenges as ch
+from qhack_tools import coupling
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+RoutedCircuit = namedtuple(
+    "RoutedCircuit", ["operations", "swaps", "initial_layout", "final_layout"]
+)
+
+DEFAULT_LOOKAHEAD = 20
+DEFAULT_LOOKAHEAD_WEIGHT = 0.5
+DECAY = 0.001
+DECAY_RESET = 5
+
+
+def hop_distances(graph):
+    """All-pairs hop distances of a coupling map.
+
+    Args:
+        - graph (dict or CouplingMap): ``{qubit: [neighbours]}``, edges are undirected
+
+    Returns:
+        - (list): the qubits, in the order of the table
+        - (np.ndarray): integer table of shape ``(qubits, qubits)``, -1 for disconnected pairs
+    """
+
+    coupling_map = _coupling_map(graph)
+    return coupling_map.nodes, coupling.distance_tables(coupling_map).distances
+
+
+def _coupling_map(graph):
+    if isinstance(graph, coupling.CouplingMap):
+        return graph
+    return coupling.CouplingMap.from_dict(graph)
+
+
+def grid_graph(rows, columns):
+    """Coupling map of a square lattice, with qubits numbered row by row."""
+
+    graph = {}
+    for row in range(rows):
+        for column in range(columns):
+            node = row * columns + column
+            graph[node] = [
+                r * columns + c
+                for r, c in ((row - 1, column), (row + 1, column), (row, column - 1), (row, column + 1))
+                if 0 <= r < rows and 0 <= c < columns
+            ]
+    return graph
+
+
+def random_circuit(wires, n_gates, rng, two_qubit_fraction=0.5):
+    """Random circuit of CNOTs and single-qubit rotations.
+
+    Args:
+        - wires (list): wire labels
+        - n_gates (int): number of gates
+        - rng (random.Random): source of randomness
+        - two_qubit_fraction (float): probability that a gate is a CNOT
+
+    Returns:
+        - (list(qml.operation.Operation)): the gates, not queued on any tape
+    """
+
+    operations = []
+    for _ in range(n_gates):
+        if rng.random() < two_qubit_fraction:
+            operations.append(qml.CNOT(wires=rng.sample(wires, 2), do_queue=False))
+        else:
+            operations.append(qml.RZ(rng.uniform(0, 6.28), wires=rng.choice(wires), do_queue=False))
+    return operations
+
+
+def route_circuit(
+    operations,
+    graph,
+    initial_layout=None,
+    lookahead=DEFAULT_LOOKAHEAD,
+    lookahead_weight=DEFAULT_LOOKAHEAD_WEIGHT,
+):
+    """Inserts the SWAPs a circuit needs to run on a coupling map.
+
+    Args:
+        - operations (list(qml.operation.Operation) or qml.tape.QuantumTape): gates on at
+          most two wires each; measurements of a tape are not routed
+        - graph (dict or CouplingMap): coupling map ``{qubit: [neighbours]}``
+        - initial_layout (dict): ``{wire: qubit}`` placement of the circuit's wires; by
+          default each wire goes to the qubit with the same label, or else the first free one
+        - lookahead (int): number of upcoming two-qubit gates the SWAP choice considers
+        - lookahead_weight (float): weight of those gates against the blocked ones
+
+    Returns:
+        - (RoutedCircuit): the routed operations on the coupling map's qubits, the number
+          of inserted SWAPs, and the initial and final ``{wire: qubit}`` layouts
+    """
+
+    operations = list(getattr(operations, "operations", operations))
+    coupling_map = _coupling_map(graph)
+    router = _Router(
+        operations, coupling_map, coupling.distance_tables(coupling_map), initial_layout
+    )
+    router.run(lookahead, lookahead_weight)
+
+    return RoutedCircuit(
+        router.routed,
+        router.swaps,
+        router.layout(router.initial_positions),
+        router.layout(router.positions),
+    )
+
+
+class _Router:
+    """State of one routing pass; logical and physical qubits are integer indices."""
+
+    def __init__(self, operations, coupling_map, tables, initial_layout):
+        self.operations = operations
+        self.nodes = coupling_map.nodes
+        self.distances = tables.distances.tolist()
+        self.next_hop = tables.next_hop.tolist()
+        distances = self.distances
+
+        # SWAP candidates are scored as arrays: neighbour_table[q] lists the neighbours of
+        # qubit q and coupling_table[q] the numbers of those couplings (sorted pairs in
+        # sorted order), both padded with q itself and the dummy coupling len(couplings)
+        self.distance_array = tables.distances
+        degrees = np.diff(coupling_map.indptr)
+        rows = np.repeat(np.arange(len(self.nodes)), degrees)
+        self.couplings, edges = np.unique(
+            np.sort(np.stack([rows, coupling_map.indices], axis=1), axis=1),
+            axis=0,
+            return_inverse=True,
+        )
+        columns = np.arange(len(rows)) - np.repeat(coupling_map.indptr[:-1], degrees)
+        width = max(degrees.max(initial=0), 1)
+        self.neighbour_table = np.repeat(np.arange(len(self.nodes))[:, None], width, axis=1)
+        self.neighbour_table[rows, columns] = coupling_map.indices
+        self.coupling_table = np.full((len(self.nodes), width), len(self.couplings))
+        self.coupling_table[rows, columns] = edges.ravel()
+
+        self.wires = []
+        index = {}
+        self.gate_wires = []
+        for operation in operations:
+            if len(operation.wires) > 2:
+                raise ValueError(
+                    f"{operation.name} acts on {len(operation.wires)} wires; "
+                    "decompose it into one- and two-qubit gates first"
+                )
+            for wire in operation.wires:
+                if wire not in index:
+                    index[wire] = len(self.wires)
+                    self.wires.append(wire)
+            self.gate_wires.append([index[wire] for wire in operation.wires])
+        self.pairs = np.array(
+            [wires if len(wires) == 2 else [-1, -1] for wires in self.gate_wires], dtype=np.int64
+        ).reshape(-1, 2)
+
+        if len(self.wires) > len(self.nodes):
+            raise ValueError(f"{len(self.wires)} wires do not fit on {len(self.nodes)} qubits")
+
+        self.positions = self._place(initial_layout or {})
+        self.initial_positions = list(self.positions)
+        self.position_array = np.array(self.positions, dtype=np.int64)
+        self.occupant = [None] * len(self.nodes)
+        for logical, physical in enumerate(self.positions):
+            self.occupant[physical] = logical
+
+        # dependency graph: a gate waits for the previous gate on each of its wires
+        self.waiting = [0] * len(operations)
+        self.successors = [[] for _ in operations]
+        last = {}
+        for gate, wires in enumerate(self.gate_wires):
+            predecessors = {last[wire] for wire in wires if wire in last}
+            self.waiting[gate] = len(predecessors)
+            for predecessor in predecessors:
+                self.successors[predecessor].append(gate)
+            for wire in wires:
+                last[wire] = gate
+
+        # SWAPs never move a qubit to another connected component
+        for first, second in (wires for wires in self.gate_wires if len(wires) == 2):
+            if distances[self.positions[first]][self.positions[second]] < 0:
+                raise ValueError(
+                    f"wires {self.wires[first]} and {self.wires[second]} are not connected"
+                )
+
+        self.front = [gate for gate, count in enumerate(self.waiting) if count == 0]
+        self.front_gate = {}
+        self.routed = []
+        self.swaps = 0
+        self.decay = np.ones(len(self.nodes))
+
+    def _place(self, initial_layout):
+        node_index = {node: i for i, node in enumerate(self.nodes)}
+        positions = [None] * len(self.wires)
+        for logical, wire in enumerate(self.wires):
+            if wire in initial_layout:
+                positions[logical] = node_index[initial_layout[wire]]
+            elif not initial_layout and wire in node_index:
+                positions[logical] = node_index[wire]
+
+        free = iter(sorted(set(range(len(self.nodes))) - set(positions)))
+        return [next(free) if position is None else position for position in positions]
+
+    def layout(self, positions):
+        return {wire: self.nodes[positions[logical]] for logical, wire in enumerate(self.wires)}
+
+    def distance(self, gate):
+        first, second = self.gate_wires[gate]
+        return self.distances[self.positions[first]][self.positions[second]]
+
+    def run(self, lookahead, lookahead_weight):
+        # past this many SWAPs without progress the heuristic is cycling
+        patience = 2 * len(self.nodes)
+        stalled = 0
+        progress, scored = True, None
+
+        while True:
+            if progress and self._run_ready():
+                self.decay[:] = 1.0
+                stalled = 0
+                # the blocked and lookahead gates only change when gates run
+                scored = None
+            if not self.front:
+                return
+
+            if stalled > patience:
+                self._bring_together(self.front[0])
+                progress = True
+                continue
+
+            if scored is None:
+                scored = self._scored_gates(self._extended_set(lookahead), lookahead_weight)
+            first, second = self._best_swap(*scored)
+            self._swap(first, second)
+            stalled += 1
+            self.decay[first] += DECAY
+            self.decay[second] += DECAY
+            if self.swaps % DECAY_RESET == 0:
+                self.decay[:] = 1.0
+
+            # a SWAP can only unblock the gates of the two qubits it exchanges
+            progress = any(
+                self.front_gate.get(self.occupant[physical]) is not None
+                and self.distance(self.front_gate[self.occupant[physical]]) == 1
+                for physical in (first, second)
+            )
+
+    def _run_ready(self):
+        """Runs every gate that can run now; returns whether any did."""
+
+        progress = False
+        ready = True
+        while ready:
+            ready = False
+            blocked = []
+            for gate in self.front:
+                if len(self.gate_wires[gate]) == 2 and self.distance(gate) > 1:
+                    blocked.append(gate)
+                    continue
+
+                self._emit(gate)
+                ready = progress = True
+                for successor in self.successors[gate]:
+                    self.waiting[successor] -= 1
+                    if self.waiting[successor] == 0:
+                        blocked.append(successor)
+            self.front = blocked
+
+        if progress:
+            # at most one gate per wire waits at the front
+            self.front_gate = {
+                logical: gate for gate in self.front for logical in self.gate_wires[gate]
+            }
+        return progress
+
+    def _extended_set(self, lookahead):
+        extended = []
+        seen = set(self.front)
+        queue = list(self.front)
+        for gate in queue:
+            if len(extended) >= lookahead:
+                break
+            for successor in self.successors[gate]:
+                if successor not in seen:
+                    seen.add(successor)
+                    queue.append(successor)
+                    if len(self.gate_wires[successor]) == 2:
+                        extended.append(successor)
+        return extended[:lookahead]
+
+    def _scored_gates(self, extended, lookahead_weight):
+        """Wires and weights of the blocked gates followed by the lookahead gates."""
+
+        weights = np.full(len(self.front) + len(extended), 1 / len(self.front))
+        weights[len(self.front) :] = lookahead_weight / max(len(extended), 1)
+        return self.pairs[self.front + extended], weights, len(self.front)
+
+    def _best_swap(self, pairs, weights, n_front):
+        # ends[g] holds the qubits of gate g; every end is listed once as moving, next to
+        # the other end, which it keeps
+        ends = self.position_array[pairs]
+        here, there = ends.ravel(), ends[:, ::-1].ravel()
+        cost = np.dot(weights, self.distance_array[ends[:, 0], ends[:, 1]])
+        weights = np.repeat(weights, 2)
+
+        # a SWAP moves an end to one of its neighbours: the distance changes are read from
+        # the distance rows of the neighbours and summed per coupling; the padding moves
+        # nothing, and swapping the two ends of a gate leaves its distance unchanged
+        moved = self.neighbour_table[here]
+        there = there[:, None]
+        distances = self.distance_array
+        before = distances[here, there[:, 0]][:, None]
+        change = weights[:, None] * (distances[moved, there] - before)
+        change[moved == there] = 0.0
+        couplings = self.coupling_table[here]
+        change = np.bincount(
+            couplings.ravel(), weights=change.ravel(), minlength=len(self.couplings) + 1
+        )
+
+        # candidates are the couplings of the blocked gates' qubits
+        candidate = np.zeros(len(self.couplings) + 1, dtype=bool)
+        candidate[couplings[: 2 * n_front]] = True
+        candidates = np.flatnonzero(candidate[:-1])
+        first, second = self.couplings[candidates].T
+        scores = (cost + change[candidates]) * np.maximum(self.decay[first], self.decay[second])
+
+        best = np.argmin(np.round(scores, 9))
+        return int(first[best]), int(second[best])
+
+    def _bring_together(self, gate):
+        """Moves the first qubit of a gate along a shortest path towards the second."""
+
+        first, second = self.gate_wires[gate]
+        while self.distance(gate) > 1:
+            here = self.positions[first]
+            self._swap(here, self.next_hop[here][self.positions[second]])
+
+    def _exchange(self, first, second):
+        a, b = self.occupant[first], self.occupant[second]
+        self.occupant[first], self.occupant[second] = b, a
+        if a is not None:
+            self.positions[a] = self.position_array[a] = second
+        if b is not None:
+            self.positions[b] = self.position_array[b] = first
+
+    def _swap(self, first, second):
+        self._exchange(first, second)
+        self.swaps += 1
+        self.routed.append(
+            qml.SWAP(wires=[self.nodes[first], self.nodes[second]], do_queue=False)
+        )
+
+    def _emit(self, gate):
+        operation = self.operations[gate]
+        wires = [self.nodes[self.positions[logical]] for logical in self.gate_wires[gate]]
+        routed = type(operation)(*operation.parameters, wires=wires, do_queue=False)
+        if getattr(operation, "inverse", False):
+            routed.inv()
+        self.routed.append(routed)
+
+
+def per_gate_swaps(operations, graph):
+    """Sum of the isolated ``n_swaps`` cost, ``2 * (distance - 1)``, of every two-qubit gate."""
+
+    nodes, distances = hop_distances(graph)
+    index = {node: i for i, node in enumerate(nodes)}
+    return sum(
+        2 * (int(distances[index[op.wires[0]], index[op.wires[1]]]) - 1)
+        for op in operations
+        if len(op.wires) == 2
+    )
+
+
+def challenge_graph():
+    """Coupling map of the algorithms_200 challenge, read from its solution script."""
+
+    solution = ch.load_solution(ch.get_challenge("algorithms_200_AdaptingTopology"))
+    return solution.module.graph
+
+
+def coupling_maps():
+    """Coupling maps the report and the benchmarks route on, as ``{label: graph}``."""
+
+    return {
+        "challenge_9q": challenge_graph(),
+        "grid_5x5": grid_graph(5, 5),
+        "grid_10x10": grid_graph(10, 10),
+        "grid_20x20": grid_graph(20, 20),
+    }
+
+
+def benchmark_workloads():
+    """Routing runs benchmarked by :mod:`.bench`, as ``(label, callable)`` pairs."""
+
+    def workload(graph, n_gates):
+        operations = random_circuit(list(graph), n_gates, random.Random(0))
+        return lambda: route_circuit(operations, graph)
+
+    maps = coupling_maps()
+    return [
+        ("challenge_9q_1000_gates", workload(maps["challenge_9q"], 1000)),
+        ("grid_10x10_1000_gates", workload(maps["grid_10x10"], 1000)),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gates", type=int, default=1000, help="gates per random circuit")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random circuits")
+    parser.add_argument("--lookahead", type=int, default=DEFAULT_LOOKAHEAD)
+    parser.add_argument("--lookahead-weight", type=float, default=DEFAULT_LOOKAHEAD_WEIGHT)
+    parser.add_argument(
+        "--coupling-map",
+        action="append",
+        help="route on this edge-list or JSON map instead of the built-in ones (repeatable)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.coupling_map:
+        maps = {os.path.basename(path): coupling.load(path) for path in args.coupling_map}
+    else:
+        maps = coupling_maps()
+
+    print(f"{'coupling map':15s} {'qubits':>6s} {'gates':>6s} {'swaps':>7s} {'per-gate':>9s} {'time':>8s}")
+    for label, graph in maps.items():
+        wires = list(getattr(graph, "nodes", graph))
+        operations = random_circuit(wires, args.gates, random.Random(args.seed))
+        start = time.perf_counter()
+        routed = route_circuit(
+            operations, graph, lookahead=args.lookahead, lookahead_weight=args.lookahead_weight
+        )
+        seconds = time.perf_counter() - start
+        print(
+            f"{label:15s} {len(graph):6d} {len(operations):6d} {routed.swaps:7d} "
+            f"{per_gate_swaps(operations, graph):9d} {seconds:7.3f}s"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#! /usr/bin/python3
+"""Deferred imports and a cold-start report for the solution entry points.
+
+:func:`lazy_import` returns a module whose code only runs on first attribute access, so
+the tools can name PennyLane at module level without paying for it until a circuit is
+actually built.
+
+The report runs every solution script the way the judge does, in a fresh interpreter
+with its first ``#.in`` on stdin, under ``python -X importtime``. For every entry point it
+lists the wall time, the time spent importing, and the heaviest top-level imports, next
+to a NumPy-only interpreter as the reference floor.
+
+Usage (from the ``Coding_Challenges`` directory)::
+
+    python -m qhack_tools.startup
+    python -m qhack_tools.startup qchem_300_Universality_Givens --top 5
+"""
+import argparse
+import importlib.util
+import re
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+from qhack_tools import challenges as ch
+
+Startup = namedtuple("Startup", ["name", "seconds", "import_seconds", "imports"])
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def lazy_import(name):
+    """Imports a module lazily.
+
+    Args:
+        - name (str): absolute module name; parent packages are imported eagerly
+
+    Returns:
+        - (module): the module, executed on first attribute access
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    return module
+
+
+def parse_importtime(stderr):
+    """Extracts the top-level imports from ``-X importtime`` output.
+
+    Args:
+        - stderr (str): captured standard error of the interpreter
+
+    Returns:
+        - (float): total import time in seconds
+        - (list(tuple(str, float))): top-level modules and their cumulative seconds,
+          slowest first
+    """
+
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match and not match.group(3):
+            imports.append((match.group(4), int(match.group(2)) / 1e6))
+
+    imports.sort(key=lambda item: -item[1])
+    return sum(seconds for _, seconds in imports), imports
+
+
+def _run(name, command, payload="", cwd=None):
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime"] + command,
+        input=payload,
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        check=False,
+    )
+    seconds = time.perf_counter() - start
+
+    import_seconds, imports = parse_importtime(process.stderr)
+    return Startup(name, seconds, import_seconds, imports)
+
+
+def numpy_reference():
+    """Cold start of an interpreter that only imports NumPy."""
+
+    return _run("numpy only", ["-c", "import numpy"])
+
+
+def measure_startup(challenge):
+    """Runs a solution script in a fresh interpreter on its first sample input.
+
+    Args:
+        - challenge (Challenge): the challenge
+
+    Returns:
+        - (Startup): wall time, import time and top-level imports of the run
+    """
+
+    payload = ch.read_case(challenge.cases[0])[0] if challenge.cases else ""
+    return _run(challenge.name, [challenge.script], payload, cwd=challenge.directory)
+
+
+def _print_startup(startup, top):
+    heaviest = ", ".join(f"{module} {seconds:.3f}s" for module, seconds in startup.imports[:top])
+    print(
+        f"{startup.name:45s} {startup.seconds:7.3f}s {startup.import_seconds:7.3f}s  {heaviest}",
+        flush=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("challenges", nargs="*", help="challenges to measure (default: all)")
+    parser.add_argument("--top", type=int, default=3, help="number of imports to list")
+    args = parser.parse_args(argv)
+
+    print(f"{'entry point':45s} {'wall':>8s} {'imports':>8s}  heaviest top-level imports")
+    _print_startup(numpy_reference(), args.top)
+    for challenge in ch.select_challenges(args.challenges):
+        _print_startup(measure_startup(challenge), args.top)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
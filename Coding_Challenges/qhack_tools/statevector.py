@@ -0,0 +1,444 @@
+#! /usr/bin/python3
+"""Vectorized statevector kernels and a light device built on them.
+
+The challenges run circuits on 1 to 8 wires, where ``default.qubit`` spends most of its
+time building gate matrices through PennyLane's generic machinery and evaluating
+Hamiltonians through sparse matrices rather than doing arithmetic. The kernels here
+work directly on states of shape ``(batch, 2, ..., 2)``:
+
+    - permutation gates (PauliX, CNOT, Toffoli, CSWAP, SWAP) gather amplitudes
+    - diagonal gates (PauliZ, S, T, RZ, PhaseShift / U1, CZ) multiply them
+    - the other gates (Hadamard, PauliY, RX, RY, Rot, CRX / CRY / CRZ, QubitUnitary,
+      SingleExcitation, DoubleExcitation) are one matrix product on the moved axes
+    - QFT is an FFT over its wires
+
+The target wires are moved to the last axes and flattened, so every kernel is a single
+NumPy call. Everything goes through ``autograd.numpy``, so the kernels can be
+differentiated by backpropagation, and gate parameters may carry a leading batch
+dimension of their own. Gates without a kernel fall back to their PennyLane matrix.
+
+``StatevectorDevice`` (see :func:`device_class`) is a ``default.qubit.autograd`` device
+that applies operations and evaluates Hamiltonian expectation values with these kernels.
+:func:`install` makes ``qml.device("default.qubit", ...)`` return it, which the
+harness enables with ``--statevector``.
+
+Results agree with ``default.qubit`` up to rounding, not bit for bit. This matters for
+qml_100, whose optimizer starts at a stationary point and only leaves it through the
+rounding noise of the gradient, so its output differs from the ``#.ans`` files.
+"""
+import functools
+
+import autograd.numpy as anp
+import numpy as onp
+from autograd.extend import defvjp, primitive
+
+from qhack_tools.startup import lazy_import
+
+qml = lazy_import("pennylane")
+
+# Devices replaced by StatevectorDevice once installed.
+REPLACED_DEVICES = ("default.qubit", "default.qubit.autograd")
+
+_HADAMARD = onp.array([[1, 1], [1, -1]], dtype=complex) / onp.sqrt(2)
+_PAULI_Y = onp.array([[0, -1j], [1j, 0]])
+
+_PERMUTATIONS = {
+    "PauliX": [1, 0],
+    "CNOT": [0, 1, 3, 2],
+    "SWAP": [0, 2, 1, 3],
+    "Toffoli": [0, 1, 2, 3, 4, 5, 7, 6],
+    "CSWAP": [0, 1, 2, 3, 4, 6, 5, 7],
+}
+
+_DIAGONALS = {
+    "PauliZ": onp.array([1, -1], dtype=complex),
+    "S": onp.array([1, 1j]),
+    "T": onp.array([1, onp.exp(0.25j * onp.pi)]),
+    "CZ": onp.array([1, 1, 1, -1], dtype=complex),
+}
+
+_MATRICES = {
+    "Hadamard": _HADAMARD,
+    "PauliY": _PAULI_Y,
+}
+
+
+def _moved(state, axes):
+    """Moves the target axes last and flattens them.
+
+    Returns:
+        - (array): state of shape ``(batch, rest, 2**len(axes))``
+        - (callable): maps an array of that shape (any batch size) back to the
+          original axis order
+    """
+
+    n_wires = state.ndim - 1
+    source = [1 + axis for axis in axes]
+    destination = list(range(n_wires + 1 - len(axes), n_wires + 1))
+
+    moved = anp.moveaxis(state, source, destination)
+    shape = moved.shape
+    flat = anp.reshape(moved, (shape[0], -1, 2 ** len(axes)))
+
+    def restore(result):
+        result = anp.reshape(result, (result.shape[0],) + shape[1:])
+        return anp.moveaxis(result, destination, source)
+
+    return flat, restore
+
+
+def apply_permutation(state, permutation, axes):
+    """Applies a gate that permutes computational basis states.
+
+    Args:
+        - state (array): state of shape ``(batch, 2, ..., 2)``
+        - permutation (list(int)): ``permutation[i]`` is the input index of output index ``i``
+        - axes (list(int)): target wire indices, most significant first
+
+    Returns:
+        - (array): the new state
+    """
+
+    flat, restore = _moved(state, axes)
+    return restore(flat[..., permutation])
+
+
+def apply_diagonal(state, diagonal, axes):
+    """Applies a gate that is diagonal in the computational basis.
+
+    Args:
+        - state (array): state of shape ``(batch, 2, ..., 2)``
+        - diagonal (array): diagonal of shape ``(2**k,)`` or ``(batch, 2**k)``
+        - axes (list(int)): target wire indices, most significant first
+
+    Returns:
+        - (array): the new state
+    """
+
+    flat, restore = _moved(state, axes)
+    if anp.ndim(diagonal) == 2:
+        diagonal = anp.reshape(diagonal, (diagonal.shape[0], 1, -1))
+
+    return restore(flat * diagonal)
+
+
+def apply_matrix(state, matrix, axes):
+    """Applies a dense gate.
+
+    Args:
+        - state (array): state of shape ``(batch, 2, ..., 2)``
+        - matrix (array): matrix of shape ``(2**k, 2**k)`` or ``(batch, 2**k, 2**k)``
+        - axes (list(int)): target wire indices, most significant first
+
+    Returns:
+        - (array): the new state
+    """
+
+    flat, restore = _moved(state, axes)
+    return restore(anp.matmul(flat, anp.swapaxes(matrix, -1, -2)))
+
+
+def apply_qft(state, axes, inverse=False):
+    """Applies the quantum Fourier transform (or its inverse) to the given wires."""
+
+    flat, restore = _moved(state, axes)
+    scale = onp.sqrt(flat.shape[-1])
+    if inverse:
+        return restore(anp.fft.fft(flat, axis=-1) / scale)
+
+    return restore(anp.fft.ifft(flat, axis=-1) * scale)
+
+
+@primitive
+def plain(value):
+    """Views a parameter as a plain NumPy value (a scalar if it is 0-dimensional).
+
+    PennyLane's ``tensor`` subclass routes every ufunc through Python-level wrappers,
+    which dominates the cost of building small gate matrices. Gradients pass through
+    unchanged.
+    """
+
+    value = onp.asarray(value)
+    return value[()] if value.ndim == 0 else value
+
+
+defvjp(plain, lambda ans, value: lambda g: g)
+
+
+def _stack(rows):
+    return anp.stack([anp.stack(row, axis=-1) for row in rows], axis=-2)
+
+
+def _rx(theta):
+    c, s = anp.cos(theta / 2), anp.sin(theta / 2)
+    return _stack([[c + 0j, -1j * s], [-1j * s, c + 0j]])
+
+
+def _ry(theta):
+    c, s = anp.cos(theta / 2), anp.sin(theta / 2)
+    return _stack([[c + 0j, -s + 0j], [s + 0j, c + 0j]])
+
+
+def _rz_diagonal(theta):
+    return anp.stack([anp.exp(-0.5j * theta), anp.exp(0.5j * theta)], axis=-1)
+
+
+def _rz_matrix(theta):
+    diagonal = _rz_diagonal(theta)
+    zero = 0 * diagonal[..., 0]
+    return _stack([[diagonal[..., 0], zero], [zero, diagonal[..., 1]]])
+
+
+def _phase_diagonal(phi):
+    return anp.stack([anp.exp(0j * phi), anp.exp(1j * phi)], axis=-1)
+
+
+def _rot(phi, theta, omega):
+    c, s = anp.cos(theta / 2), anp.sin(theta / 2)
+    return _stack(
+        [
+            [anp.exp(-0.5j * (phi + omega)) * c, -anp.exp(0.5j * (phi - omega)) * s],
+            [anp.exp(-0.5j * (phi - omega)) * s, anp.exp(0.5j * (phi + omega)) * c],
+        ]
+    )
+
+
+def _controlled(matrix):
+    zero = 0 * matrix[..., 0, 0]
+    one = zero + 1
+    return _stack(
+        [
+            [one, zero, zero, zero],
+            [zero, one, zero, zero],
+            [zero, zero, matrix[..., 0, 0], matrix[..., 0, 1]],
+            [zero, zero, matrix[..., 1, 0], matrix[..., 1, 1]],
+        ]
+    )
+
+
+def _givens(phi, dimension, first, second):
+    """Rotation by ``phi / 2`` in the plane of two basis states, identity elsewhere."""
+
+    projector = onp.zeros((dimension, dimension))
+    projector[first, first] = projector[second, second] = 1
+    generator = onp.zeros((dimension, dimension))
+    generator[second, first], generator[first, second] = 1, -1
+
+    c = anp.reshape(anp.cos(phi / 2) - 1, anp.shape(phi) + (1, 1))
+    s = anp.reshape(anp.sin(phi / 2), anp.shape(phi) + (1, 1))
+    return (onp.eye(dimension) + c * projector + s * generator) + 0j
+
+
+_PARAMETRIC_MATRICES = {
+    "RX": _rx,
+    "RY": _ry,
+    "Rot": _rot,
+    "CRX": lambda theta: _controlled(_rx(theta)),
+    "CRY": lambda theta: _controlled(_ry(theta)),
+    "CRZ": lambda theta: _controlled(_rz_matrix(theta)),
+    "SingleExcitation": lambda phi: _givens(phi, 4, 1, 2),
+    "DoubleExcitation": lambda phi: _givens(phi, 16, 3, 12),
+    "QubitUnitary": lambda matrix: matrix,
+}
+
+_PARAMETRIC_DIAGONALS = {
+    "RZ": _rz_diagonal,
+    "PhaseShift": _phase_diagonal,
+    "U1": _phase_diagonal,
+}
+
+
+def _dagger(matrix):
+    return anp.conj(anp.swapaxes(matrix, -1, -2))
+
+
+def has_kernel(name):
+    """Whether an operation is applied by a kernel rather than through its matrix.
+
+    Args:
+        - name (str): base name of the operation
+
+    Returns:
+        - (bool): ``True`` if the kernel accepts parameters with a batch dimension
+    """
+
+    return name in ("Identity", "QFT") or any(
+        name in table
+        for table in (
+            _PERMUTATIONS,
+            _DIAGONALS,
+            _PARAMETRIC_DIAGONALS,
+            _MATRICES,
+            _PARAMETRIC_MATRICES,
+        )
+    )
+
+
+def apply_operation(state, operation, axes, params=None):
+    """Applies a PennyLane operation with the matching kernel.
+
+    Args:
+        - state (array): state of shape ``(batch, 2, ..., 2)``
+        - operation (qml.operation.Operation): the operation, possibly inverted
+        - axes (list(int)): indices of its wires on the device
+        - params (list): parameters to use instead of ``operation.parameters``, e.g.
+          stacked along a leading batch dimension (only for gates with a kernel)
+
+    Returns:
+        - (array): the new state
+    """
+
+    name = getattr(operation, "base_name", operation.name)
+    inverse = getattr(operation, "inverse", False)
+    if params is None:
+        params = operation.parameters
+    params = [plain(param) for param in params]
+
+    if name == "Identity":
+        return state
+
+    if name in _PERMUTATIONS:
+        return apply_permutation(state, _PERMUTATIONS[name], axes)
+
+    if name in _DIAGONALS:
+        diagonal = _DIAGONALS[name]
+        return apply_diagonal(state, onp.conj(diagonal) if inverse else diagonal, axes)
+
+    if name in _PARAMETRIC_DIAGONALS:
+        diagonal = _PARAMETRIC_DIAGONALS[name](*params)
+        return apply_diagonal(state, anp.conj(diagonal) if inverse else diagonal, axes)
+
+    if name in _MATRICES:
+        matrix = _MATRICES[name]
+        return apply_matrix(state, _dagger(matrix) if inverse else matrix, axes)
+
+    if name in _PARAMETRIC_MATRICES:
+        matrix = _PARAMETRIC_MATRICES[name](*params)
+        return apply_matrix(state, _dagger(matrix) if inverse else matrix, axes)
+
+    if name == "QFT":
+        return apply_qft(state, axes, inverse)
+
+    return apply_matrix(state, operation.matrix, axes)
+
+
+def inner_products(bra, ket):
+    """``<bra|ket>`` for every batch entry.
+
+    Args:
+        - bra (array): states of shape ``(batch, 2, ..., 2)``
+        - ket (array): states of the same shape (the batch may broadcast)
+
+    Returns:
+        - (array): complex array of shape ``(batch,)``
+    """
+
+    product = anp.conj(bra) * ket
+    return anp.sum(anp.reshape(product, (product.shape[0], -1)), axis=1)
+
+
+def observable_expvals(state, observable, wires):
+    """Exact expectation values of an observable for every batch entry.
+
+    Args:
+        - state (array): states of shape ``(batch, 2, ..., 2)``
+        - observable (qml.operation.Observable): single observable, tensor product or
+          Hamiltonian
+        - wires (qml.wires.Wires): wires of the device the state lives on
+
+    Returns:
+        - (array): real array of shape ``(batch,)``
+    """
+
+    if observable.name == "Hamiltonian":
+        total = 0.0
+        for coeff, term in zip(observable.data, observable.ops):
+            total = total + coeff * observable_expvals(state, term, wires)
+        return anp.real(total)
+
+    factors = observable.obs if isinstance(observable, qml.operation.Tensor) else [observable]
+    applied = state
+    for factor in factors:
+        applied = apply_operation(applied, factor, wires.indices(factor.wires))
+
+    return anp.real(inner_products(state, applied))
+
+
+@functools.lru_cache(maxsize=None)
+def device_class():
+    """The :class:`StatevectorDevice` class, created on first use to keep PennyLane lazy."""
+
+    from pennylane.devices.default_qubit_autograd import (  # pylint: disable=import-outside-toplevel
+        DefaultQubitAutograd as base,
+    )
+
+    class StatevectorDevice(base):
+        """``default.qubit.autograd`` applying operations with the statevector kernels.
+
+        Args:
+            - wires (int or Iterable): number or labels of the wires
+            - shots (int): number of shots, ``None`` for exact results
+        """
+
+        name = "QHack statevector kernel device"
+        short_name = "qhack.statevector"
+        operations = base.operations | {"U1"}
+
+        def apply(self, operations, rotations=None, **kwargs):
+            state = anp.expand_dims(self._state, 0)
+
+            for i, operation in enumerate(operations):
+                if isinstance(operation, (qml.QubitStateVector, qml.BasisState)):
+                    if i > 0:
+                        raise qml.DeviceError(
+                            f"Operation {operation.name} cannot be used after other Operations "
+                            f"have already been applied on a {self.short_name} device."
+                        )
+                    if isinstance(operation, qml.QubitStateVector):
+                        self._apply_state_vector(operation.parameters[0], operation.wires)
+                    else:
+                        self._apply_basis_state(operation.parameters[0], operation.wires)
+                    state = anp.expand_dims(self._state, 0)
+                    continue
+
+                state = apply_operation(state, operation, self.wires.indices(operation.wires))
+
+            self._pre_rotated_state = state[0]
+            for operation in rotations or []:
+                state = apply_operation(state, operation, self.wires.indices(operation.wires))
+            self._state = state[0]
+
+        def expval(self, observable, shot_range=None, bin_size=None):
+            if observable.name == "Hamiltonian" and self.shots is None:
+                state = anp.expand_dims(self._pre_rotated_state, 0)
+                return observable_expvals(state, observable, self.wires)[0]
+
+            return super().expval(observable, shot_range=shot_range, bin_size=bin_size)
+
+    return StatevectorDevice
+
+
+_original_device = []
+
+
+def install():
+    """Makes ``qml.device`` return a :class:`StatevectorDevice` for ``default.qubit``."""
+
+    if _original_device:
+        return
+
+    _original_device.append(qml.device)
+
+    def device(name, *args, **kwargs):
+        if name in REPLACED_DEVICES:
+            return device_class()(*args, **kwargs)
+        return _original_device[0](name, *args, **kwargs)
+
+    qml.device = device
+
+
+def uninstall():
+    """Restores ``qml.device``."""
+
+    if _original_device:
+        qml.device = _original_device.pop()
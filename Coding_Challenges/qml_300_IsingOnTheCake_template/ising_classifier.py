@@ -92,13 +92,28 @@ def classify_ising_data(ising_configs, labels):
     def variational_classifier(weights, bias, x):
         return circuit(weights, x) + bias
 
+    # every configuration is a basis state, so the classifier of a whole batch is read off
+    # one unitary of the layers: <Z_0> of row x is the weight of column x on the states
+    # whose wire 0 (the most significant bit) is 0, minus the rest
+    def layers(weights):
+        for W in weights:
+            layer(W)
+
+    unitary = qml.transforms.get_unitary_matrix(layers, wire_order=list(range(num_wires)))
+    z0 = 1 - 2 * ((np.arange(2 ** num_wires) >> (num_wires - 1)) & 1)
+    powers = 2 ** np.arange(num_wires - 1, -1, -1)
+
+    def batched_classifier(weights, bias, X):
+        columns = unitary(weights)[:, np.dot(X, powers)]
+        return np.dot(z0, np.real(columns * np.conj(columns))) + bias
+
     # Define a cost function below with your needed arguments
     def cost(weights, bias, X, Y):
 
         # QHACK #
         
         # Insert an expression for your model predictions here
-        predictions = [variational_classifier(weights, bias, x) for x in X]
+        predictions = batched_classifier(weights, bias, X)
 
         # QHACK #
         return square_loss(Y, predictions) # DO NOT MODIFY this line
@@ -130,7 +145,7 @@ def classify_ising_data(ising_configs, labels):
         weights, bias, _, _ = opt.step(cost, weights, bias, X_batch, Y_batch)
         
         # compute accuracy
-        predictions = [np.sign(variational_classifier(weights, bias, x)) for x in ising_configs]
+        predictions = np.sign(batched_classifier(weights, bias, ising_configs))
         acc = accuracy(labels, predictions)
         #print([i, acc])
         
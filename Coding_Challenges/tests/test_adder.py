@@ -0,0 +1,111 @@
+"""Compiled forms of the QFT adder and the batched engine of :mod:`qhack_tools.adder`."""
+import numpy as np
+import pennylane as qml
+import pytest
+
+from qhack_tools import adder
+from qhack_tools import challenges as ch
+
+
+def unitary(qfunc, m, n_wires):
+    return qml.transforms.get_unitary_matrix(qfunc, wire_order=list(range(n_wires)))(
+        m, range(n_wires)
+    )
+
+
+def shift(m, n_wires):
+    """Permutation matrix of ``|k> -> |k + m mod 2**n_wires>``."""
+
+    size = 2 ** n_wires
+    matrix = np.zeros((size, size))
+    matrix[(np.arange(size) + m) % size, np.arange(size)] = 1
+    return matrix
+
+
+@pytest.fixture(scope="module")
+def solution():
+    return ch.load_solution(ch.get_challenge("algorithms_300_AdderQFT")).module
+
+
+@pytest.mark.parametrize("mode", adder.MODES)
+@pytest.mark.parametrize("m, n_wires", [(0, 1), (1, 1), (5, 3), (13, 3), (-3, 4), (22, 4)])
+def test_modes_are_modular_addition(mode, m, n_wires):
+    def qfunc(m, wires):
+        adder.qfunc_adder(m, wires, mode=mode)
+
+    assert np.allclose(unitary(qfunc, m, n_wires), shift(m, n_wires), atol=1e-9)
+
+
+@pytest.mark.parametrize("m, n_wires", [(3, 2), (11, 4), (40, 5)])
+def test_solution_is_modular_addition(solution, m, n_wires):
+    assert np.allclose(unitary(solution.qfunc_adder, m, n_wires), shift(m, n_wires), atol=1e-9)
+
+
+def test_one_rotation_per_wire(solution):
+    with qml.tape.QuantumTape() as tape:
+        solution.qfunc_adder(2 ** 5 - 1, range(5))
+
+    assert [op.name for op in tape.operations] == ["QFT"] + ["U1"] * 5 + ["QFT.inv"]
+
+
+def test_phase_angles_and_diagonal():
+    angles = adder.phase_angles(6, 3)
+    assert np.allclose(angles, [0, np.pi, 3 * np.pi / 2])
+
+    # the diagonal multiplies the phases of the wires set in each basis state
+    diagonal = adder.phase_diagonal(6, 3)
+    assert np.allclose(diagonal[0b101], np.exp(1j * (angles[0] + angles[2])))
+    assert np.allclose(np.abs(diagonal), 1)
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError, match="unknown mode"):
+        with qml.tape.QuantumTape():
+            adder.qfunc_adder(1, [0], mode="fast")
+
+
+def test_add_basis_state():
+    assert adder.add_basis_state([1, 1, 0], 3) == [0, 0, 1]
+    assert adder.add_basis_state([0, 0, 1], -2) == [1, 1, 1]
+    assert adder.to_bits(5, 4) == [0, 1, 0, 1]
+
+
+def test_batched_adder_matches_modular_arithmetic():
+    m = np.arange(-20, 21).reshape(-1, 1)
+    inputs = np.arange(16)
+    outputs = adder.batched_adder(m, inputs, 4)
+
+    assert outputs.shape == (41, 16)
+    assert outputs.tolist() == [[(k + int(mm)) % 16 for k in inputs] for mm in m[:, 0]]
+
+
+def test_batched_adder_does_not_overflow():
+    big = 2 ** 62 - 1
+    assert adder.batched_adder(big, big, 62).tolist() == (2 * big) % 2 ** 62
+
+
+def test_batched_adder_beyond_62_wires():
+    inputs = np.array([0, 1, 2 ** 70 - 1], dtype=object)
+    outputs = adder.batched_adder(5, inputs, 70)
+
+    assert outputs.dtype == object
+    assert outputs.tolist() == [5, 6, 4]
+
+
+def test_output_bits_match_to_bits():
+    values = np.arange(32).reshape(4, 8)
+    bits = adder.output_bits(values, 5)
+
+    assert bits.shape == (4, 8, 5)
+    assert bits.reshape(-1, 5).tolist() == [adder.to_bits(v, 5) for v in range(32)]
+
+
+def test_output_bits_of_python_integers():
+    values = np.array([2 ** 69 + 3, 12], dtype=object)
+    bits = adder.output_bits(values, 70)
+
+    assert bits.tolist() == [adder.to_bits(int(v), 70) for v in values]
+
+
+def test_engine_agrees_with_the_sampled_solution(solution):
+    assert adder.validate(solution.qfunc_adder, cases=20, max_wires=5) == []
@@ -0,0 +1,63 @@
+"""Many stdin cases per process with :mod:`qhack_tools.batch`."""
+import io
+import os
+import subprocess
+import sys
+
+from qhack_tools import batch
+from qhack_tools import challenges as ch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_payloads(name):
+    challenge = ch.get_challenge(name)
+    return challenge, [ch.read_case(case) for case in challenge.cases]
+
+
+def test_outputs_match_single_runs():
+    challenge, cases = sample_payloads("games_200_CHSH")
+    solution = ch.load_solution(challenge)
+    payloads = [payload for payload, _ in cases]
+
+    for jobs in (1, 2):
+        results = list(batch.run_batch(solution, iter(payloads), jobs))
+        assert [ok for ok, _ in results] == [True] * len(cases)
+        assert [output for _, output in results] == [
+            ch.run_solution(solution, payload) for payload in payloads
+        ]
+
+
+def test_failing_case_keeps_its_place():
+    challenge, cases = sample_payloads("games_200_CHSH")
+    solution = ch.load_solution(challenge)
+    payloads = [cases[0][0], "not,numbers", cases[1][0]]
+
+    results = list(batch.run_batch(solution, iter(payloads), 2))
+    assert [ok for ok, _ in results] == [True, False, True]
+    assert "Traceback" in results[1][1]
+
+
+def test_read_cases_skips_blank_lines():
+    assert list(batch._read_cases(io.StringIO("1,1\n\n  \n1,2"))) == ["1,1", "1,2"]
+
+
+def test_command_line():
+    challenge, cases = sample_payloads("games_200_CHSH")
+    stdin = "".join(payload.strip() + "\n" for payload, _ in cases) + "bad\n"
+    result = subprocess.run(
+        [sys.executable, "-m", "qhack_tools.batch", "CHSH_game", "-j", "2"],
+        cwd=ROOT,
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert result.returncode == 1
+    assert "case 3:" in result.stderr
+    lines = result.stdout.splitlines()
+    assert len(lines) == len(cases) + 1
+    for line, (_, expected) in zip(lines, cases):
+        assert ch.compare_output(challenge, line, expected)[0]
+    assert lines[-1] == ""
@@ -0,0 +1,125 @@
+"""Batched execution of :mod:`qhack_tools.broadcast`, checked against PennyLane QNodes."""
+import numpy as np
+import pennylane as qml
+import pytest
+
+from qhack_tools import broadcast
+
+
+def classifier(weights, x):
+    qml.BasisState(x, wires=[0, 1, 2])
+    for w in weights:
+        qml.Rot(*w, wires=0)
+        qml.RY(w[0], wires=1)
+        qml.CRX(w[1], wires=[1, 2])
+        qml.CNOT(wires=[0, 1])
+        qml.IsingXX(w[2], wires=[2, 0])
+    return qml.expval(qml.PauliZ(0))
+
+
+def probabilities(theta):
+    qml.RX(theta[0], wires=0)
+    qml.RY(theta[1], wires=1)
+    qml.CNOT(wires=[0, 1])
+    return qml.probs(wires=[0, 1])
+
+
+def variances(theta):
+    qml.RX(theta[0], wires=0)
+    qml.RY(theta[1], wires=1)
+    qml.CNOT(wires=[0, 1])
+    return qml.var(qml.PauliX(1)), qml.var(qml.PauliZ(0))
+
+
+def amplitudes(theta):
+    qml.RX(theta[0], wires=0)
+    qml.CRY(theta[1], wires=[0, 1])
+    return qml.state()
+
+
+def test_batched_inputs_match_single_qnodes():
+    rng = np.random.default_rng(0)
+    weights = rng.normal(size=(2, 3))
+    configs = rng.integers(0, 2, size=(16, 3))
+    qnode = qml.QNode(classifier, qml.device("default.qubit", wires=3))
+
+    results = broadcast.BroadcastQNode(qnode, batch_argnums=(1,))(weights, configs)
+    assert results.shape == (16,)
+    assert np.allclose(results, [qnode(weights, x) for x in configs])
+
+
+@pytest.mark.parametrize("func", [probabilities, variances, amplitudes])
+def test_measurements(func):
+    thetas = np.random.default_rng(1).normal(size=(5, 2))
+    qnode = qml.QNode(func, qml.device("default.qubit", wires=2))
+
+    results = broadcast.BroadcastQNode(func, wires=2)(thetas)
+    assert np.allclose(results, [qnode(theta) for theta in thetas])
+
+
+def test_batch_sizes_must_agree():
+    with pytest.raises(ValueError, match="different lengths"):
+        broadcast.BroadcastQNode(classifier, wires=3, batch_argnums=(0, 1))(
+            np.zeros((2, 1, 3)), np.zeros((3, 3), dtype=int)
+        )
+
+
+def hamiltonian_tape(coeffs, wire, angle):
+    with qml.tape.QuantumTape() as tape:
+        qml.RX(angle, wires=0)
+        qml.CNOT(wires=[0, 1])
+        qml.expval(qml.Hamiltonian(coeffs, [qml.PauliZ(0) @ qml.PauliZ(1), qml.PauliX(wire)]))
+    return tape
+
+
+def test_tapes_with_different_observables():
+    # the same structure up to the Hamiltonian's coefficients or wires: these must not be
+    # stacked as if the observable were shared
+    cases = [
+        ([1.0, 0.5], 0, 0.3),
+        ([-2.0, 0.1], 0, 0.3),
+        ([1.0, 0.5], 1, 0.7),
+        ([1.0, 0.5], 0, 1.1),
+    ]
+    tapes = [hamiltonian_tape(*case) for case in cases]
+    results = broadcast.execute_tapes(tapes, 2)
+
+    for (coeffs, wire, angle), result in zip(cases, results):
+
+        @qml.qnode(qml.device("default.qubit", wires=2))
+        def expected():
+            qml.RX(angle, wires=0)
+            qml.CNOT(wires=[0, 1])
+            return qml.expval(
+                qml.Hamiltonian(coeffs, [qml.PauliZ(0) @ qml.PauliZ(1), qml.PauliX(wire)])
+            )
+
+        assert np.allclose(result, expected())
+
+
+def test_param_shift_jacobian():
+    params = qml.numpy.array([0.4, -0.8, 1.3], requires_grad=True)
+
+    def circuit(params):
+        qml.RX(params[0], wires=0)
+        qml.CRY(params[1], wires=[0, 1])
+        qml.Rot(params[2], 0.3, -0.2, wires=1)
+        return qml.expval(qml.PauliZ(0) @ qml.PauliZ(1)), qml.expval(qml.PauliZ(1))
+
+    qnode = qml.QNode(circuit, qml.device("default.qubit", wires=2))
+    qnode.construct([params], {})
+    tape = qnode.qtape
+
+    jacobian = broadcast.param_shift_jacobian(tape, 2)
+    assert np.allclose(jacobian, qml.jacobian(qnode)(params))
+
+
+def test_backpropagation_through_the_batch():
+    weights = qml.numpy.array(np.random.default_rng(2).normal(size=(1, 3)), requires_grad=True)
+    configs = np.array([[0, 0, 0], [1, 0, 1], [1, 1, 0]])
+    qnode = qml.QNode(classifier, qml.device("default.qubit", wires=3))
+    batched = broadcast.BroadcastQNode(classifier, wires=3, batch_argnums=(1,))
+
+    grad = qml.grad(lambda w: qml.math.sum(batched(w, configs)))(weights)
+    expected = qml.grad(lambda w: sum(qnode(w, x) for x in configs))(weights)
+    assert np.allclose(grad, expected)
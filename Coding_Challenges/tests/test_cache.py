@@ -0,0 +1,101 @@
+"""Argument canonicalisation and the on-disk store of :mod:`qhack_tools.cache`."""
+import functools
+
+import numpy as np
+import pennylane as qml
+import pytest
+
+from qhack_tools import cache
+from qhack_tools import challenges as ch
+
+
+def test_float_noise_below_significant_digits():
+    assert cache.canonicalize(0.1 + 0.2) == cache.canonicalize(0.3)
+    assert cache.canonicalize(1e-12) == cache.canonicalize(0.0)
+    assert cache.canonicalize(0.3) != cache.canonicalize(0.3 + 1e-6)
+
+
+def test_types_are_kept_apart():
+    assert cache.canonicalize([1, 2]) != cache.canonicalize((1, 2))
+    assert cache.canonicalize(1) != cache.canonicalize(1.0)
+    assert cache.canonicalize(True) != cache.canonicalize(1)
+    assert cache.canonicalize("1") != cache.canonicalize(1)
+
+
+def test_dict_order_is_irrelevant():
+    assert cache.canonicalize({"a": 1, "b": [2.0]}) == cache.canonicalize({"b": [2.0], "a": 1})
+
+
+def test_arrays():
+    a = np.array([[0.1 + 0.2, 1.0], [2.0, 3.0]])
+    assert cache.canonicalize(a) == cache.canonicalize(np.array([[0.3, 1.0], [2.0, 3.0]]))
+    assert cache.canonicalize(a) != cache.canonicalize(a.reshape(4))
+    assert cache.canonicalize(a) != cache.canonicalize(a.astype(np.float32))
+    assert cache.canonicalize(np.arange(3)) != cache.canonicalize(np.arange(1, 4))
+    assert cache.canonicalize(np.array([1, "a"], dtype=object)).startswith("array:object(2,)")
+
+
+def test_pennylane_operators():
+    h = qml.Hamiltonian([0.5, 1.0], [qml.PauliZ(0) @ qml.PauliZ(1), qml.PauliX(0)])
+    same = qml.Hamiltonian([0.5, 1.0], [qml.PauliZ(0) @ qml.PauliZ(1), qml.PauliX(0)])
+    other = qml.Hamiltonian([0.5, 1.0], [qml.PauliZ(0) @ qml.PauliZ(1), qml.PauliX(1)])
+    assert cache.canonicalize(h) == cache.canonicalize(same)
+    assert cache.canonicalize(h) != cache.canonicalize(other)
+    assert cache.canonicalize(qml.RX(0.1, wires=0)) != cache.canonicalize(qml.RX(0.2, wires=0))
+
+
+def test_uncacheable_values():
+    with pytest.raises(cache.Uncacheable):
+        cache.canonicalize(object())
+    with pytest.raises(cache.Uncacheable):
+        cache.canonicalize([1, {"f": lambda: None}])
+
+
+def test_cache_key():
+    key = cache.cache_key("ns", "f", (0.3, [1]), {"b": 2, "a": 1})
+    assert key == cache.cache_key("ns", "f", (0.1 + 0.2, [1]), {"a": 1, "b": 2})
+    assert key != cache.cache_key("ns", "g", (0.3, [1]), {"a": 1, "b": 2})
+    assert key != cache.cache_key("other", "f", (0.3, [1]), {"a": 1, "b": 2})
+
+
+def test_store_round_trip_and_eviction(tmp_path):
+    store = cache.ResultCache(str(tmp_path), max_bytes=2000)
+    assert store.get("ab" * 32) == (False, None)
+
+    store.put("ab" * 32, {"value": [1, 2]})
+    assert store.get("ab" * 32) == (True, {"value": [1, 2]})
+
+    # entries of about 1 kB each: only the most recently used ones fit
+    for i in range(4):
+        store.put(f"{i:02d}" * 32, b"x" * 1000)
+    assert len(store.entries()) == 1
+    assert store.get("03" * 32)[0]
+
+    store.clear()
+    assert store.entries() == []
+
+
+def test_installed_solution_replays_its_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("QHACK_CACHE_DIR", str(tmp_path))
+    solution = ch.load_solution(ch.get_challenge("games_200_CHSH"))
+
+    calls = []
+    optimize = solution.module.optimize
+
+    @functools.wraps(optimize)
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return optimize(*args, **kwargs)
+
+    solution.module.optimize = counted
+    assert "optimize" in cache.install(solution)
+
+    payload, expected = ch.read_case(solution.challenge.cases[0])
+    first = ch.run_solution(solution, payload)
+    assert ch.compare_output(solution.challenge, first, expected)[0]
+    assert len(calls) == 1
+
+    # a hit returns the stored value without running the function
+    assert ch.run_solution(solution, payload) == first
+    assert len(calls) == 1
+    assert cache.ResultCache().entries()
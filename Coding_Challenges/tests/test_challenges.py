@@ -0,0 +1,51 @@
+"""Output comparison of :mod:`qhack_tools.challenges`."""
+from qhack_tools import challenges as ch
+
+
+def challenge(name):
+    return ch.Challenge(name, None, None, [])
+
+
+def test_exact_match_without_tolerance():
+    exact = challenge("algorithms_100_DeutschJozsa")
+    assert ch.compare_output(exact, "4 balanced\n", "4,balanced")[0]
+    assert not ch.compare_output(exact, "4 constant", "4 balanced")[0]
+    assert not ch.compare_output(exact, "1.0000001", "1.0")[0]
+
+
+def test_relative_tolerance():
+    chsh = challenge("games_200_CHSH")
+    assert ch.compare_output(chsh, "0.8535530844909454\n", "0.85355")[0]
+    passed, detail = ch.compare_output(chsh, "0.8537", "0.85355")
+    assert not passed
+    assert detail == "value 0: expected 0.85355, got 0.8537"
+
+
+def test_tolerance_of_zero_answer_is_absolute():
+    chsh = challenge("games_200_CHSH")
+    assert ch.compare_output(chsh, "5e-05", "0")[0]
+    assert not ch.compare_output(chsh, "2e-04", "0")[0]
+
+
+def test_value_count_mismatch():
+    passed, detail = ch.compare_output(challenge("games_200_CHSH"), "0.5 0.5", "0.5")
+    assert not passed
+    assert detail == "expected 1 values, got 2"
+
+
+def test_accuracy_threshold():
+    ising = challenge("qml_300_IsingOnTheCake")
+    expected = " ".join(["1"] * 10)
+    assert ch.compare_output(ising, " ".join(["1"] * 9 + ["-1"]), expected) == (
+        True,
+        "accuracy 0.900",
+    )
+    assert not ch.compare_output(ising, " ".join(["1"] * 8 + ["-1"] * 2), expected)[0]
+
+
+def test_solution_runs_every_payload():
+    solution = ch.load_solution(ch.get_challenge("games_200_CHSH"))
+    for case in solution.challenge.cases:
+        payload, expected = ch.read_case(case)
+        output = ch.run_solution(solution, payload)
+        assert ch.compare_output(solution.challenge, output, expected)[0]
@@ -0,0 +1,94 @@
+"""Closed-form CHSH winning probability of :mod:`qhack_tools.chsh`."""
+import numpy as np
+import pytest
+
+from qhack_tools import challenges as ch
+from qhack_tools import chsh
+
+
+@pytest.fixture(scope="module")
+def solution():
+    return ch.load_solution(ch.get_challenge("games_200_CHSH")).module
+
+
+@pytest.mark.parametrize("alpha, beta", [(1.0, 1.0), (0.6, 0.8), (1.0, 0.0)])
+def test_value_matches_circuit(solution, alpha, beta):
+    params = np.random.default_rng(0).normal(0, np.pi, 4)
+    value, _ = chsh.value_and_grad(params, alpha, beta)
+
+    assert value == pytest.approx(chsh.circuit_winning_prob(solution, params, alpha, beta))
+
+
+def test_gradient_matches_finite_differences(solution):
+    params, alpha, beta = np.array([0.3, -1.2, 2.0, 0.7]), 0.6, 0.8
+    _, grad = chsh.value_and_grad(params, alpha, beta)
+
+    h = 1e-4
+    shifts = np.eye(4) * h
+    numeric = [
+        float(
+            chsh.circuit_winning_prob(solution, params + shift, alpha, beta)
+            - chsh.circuit_winning_prob(solution, params - shift, alpha, beta)
+        )
+        / (2 * h)
+        for shift in shifts
+    ]
+    assert grad == pytest.approx(numeric, abs=1e-6)
+
+
+def test_batch_matches_single_calls():
+    batch = np.random.default_rng(1).normal(0, np.pi, (5, 4))
+    values, grads = chsh.value_and_grad(batch, 0.6, 0.8)
+
+    assert values.shape == (5,)
+    assert grads.shape == (5, 4)
+    for params, value, grad in zip(batch, values, grads):
+        single_value, single_grad = chsh.value_and_grad(params, 0.6, 0.8)
+        assert value == pytest.approx(single_value)
+        assert grad == pytest.approx(single_grad)
+
+
+@pytest.mark.parametrize("alpha, beta", [(1.0, 1.0), (0.6, 0.8)])
+def test_solution_winning_prob_matches_circuit(solution, alpha, beta):
+    batch = np.random.default_rng(2).normal(0, np.pi, (3, 4))
+    values = solution.winning_prob(batch, alpha, beta)
+
+    assert values.shape == (3,)
+    for params, value in zip(batch, values):
+        expected = chsh.circuit_winning_prob(solution, params, alpha, beta)
+        assert float(solution.winning_prob(params, alpha, beta)) == pytest.approx(float(expected))
+        assert float(value) == pytest.approx(float(expected))
+
+
+def test_maximally_entangled_state_reaches_tsirelson_bound():
+    assert chsh.optimal_winning_prob(1.0, 1.0) == pytest.approx(0.5 + np.sqrt(2) / 4)
+    assert chsh.optimal_winning_prob(1.0, 0.0) == pytest.approx(0.75)
+
+
+def test_multistart_reaches_optimum():
+    value, params, _ = chsh.multistart(0.6, 0.8, n_starts=4, steps=300)
+
+    assert value == pytest.approx(chsh.optimal_winning_prob(0.6, 0.8), abs=1e-5)
+    assert value == pytest.approx(chsh.value_and_grad(params, 0.6, 0.8)[0])
+
+
+@pytest.mark.parametrize("alpha, beta", [(1.0, 1.0), (1.0, 0.0)])
+def test_solution_optimize_reaches_optimum(solution, alpha, beta):
+    value = float(solution.optimize(alpha, beta))
+    assert value == pytest.approx(chsh.optimal_winning_prob(alpha, beta), abs=1e-4)
+
+
+@pytest.mark.parametrize("alpha, beta", [(1.0, 1.0), (0.6, 0.8), (1.0, 0.0)])
+def test_optimal_params(alpha, beta):
+    value, grad = chsh.value_and_grad(chsh.optimal_params(alpha, beta), alpha, beta)
+
+    assert value == pytest.approx(chsh.optimal_winning_prob(alpha, beta))
+    assert grad == pytest.approx(np.zeros(4), abs=1e-9)
+
+
+def test_optimal_params_beat_random_params():
+    batch = np.random.default_rng(3).normal(0, np.pi, (50, 4))
+    values, _ = chsh.value_and_grad(batch, 0.6, 0.8)
+    best, _ = chsh.value_and_grad(chsh.optimal_params(0.6, 0.8), 0.6, 0.8)
+
+    assert np.all(values <= best + 1e-12)
@@ -0,0 +1,90 @@
+"""Matrix-free and analytic quantum counting of :mod:`qhack_tools.counting`."""
+import numpy as np
+import pytest
+
+from qhack_tools import challenges as ch
+from qhack_tools import counting
+
+
+@pytest.fixture(scope="module")
+def solution():
+    return ch.load_solution(ch.get_challenge("algorithms_400_QuantumCounting")).module
+
+
+def test_oracle_matrix(solution):
+    expected = np.where(counting.marked_mask([0, 3, 15], 4), -1.0, 1.0)
+    assert np.array_equal(solution.oracle_matrix([0, 3, 3, 15]), np.diag(expected))
+
+
+def test_apply_grover_matches_the_dense_operator(solution):
+    indices = [1, 4, 9]
+    states = np.random.default_rng(0).normal(size=(3, 16))
+
+    dense = states @ np.asarray(solution.grover_operator(indices)).T
+    assert np.allclose(counting.apply_grover(states, counting.marked_mask(indices, 4)), dense)
+
+
+@pytest.mark.parametrize("n_solutions", range(17))
+def test_closed_form_matches_the_solution_circuit(solution, n_solutions):
+    indices = list(range(n_solutions))
+    expected = counting.counting_distribution(n_solutions, 4, 4)
+
+    assert np.allclose(solution.circuit(indices), expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("indices, n_search", [([], 5), ([3], 5), ([0, 7, 8, 30], 5), ([5, 6], 6)])
+def test_matrix_free_simulation(indices, n_search):
+    mask = counting.marked_mask(indices, n_search)
+    simulated = counting.simulate_counting(mask, 4, chunk=8)
+
+    assert np.isclose(np.sum(simulated), 1)
+    assert np.allclose(simulated, counting.counting_distribution(len(indices), n_search, 4))
+
+
+@pytest.mark.parametrize("n_search, n_estimation", [(2, 3), (3, 5), (5, 3)])
+def test_circuit_for_any_register_sizes(n_search, n_estimation):
+    indices = [0, 2 ** n_search - 1]
+    probabilities = counting.circuit_distribution(indices, n_search, n_estimation)
+
+    assert probabilities.shape == (2 ** n_estimation,)
+    assert np.allclose(probabilities, counting.counting_distribution(2, n_search, n_estimation))
+    # one QNode per register size
+    assert counting.counting_qnode(n_search, n_estimation) is counting.counting_qnode(
+        n_search, n_estimation
+    )
+
+
+@pytest.mark.parametrize(
+    "n_solutions, n_search, n_estimation",
+    [(0, 4, 4), (3, 4, 4), (16, 4, 3), (777, 12, 6), (12345, 24, 8), (2 ** 20 + 7, 32, 12)],
+)
+def test_ml_estimate_is_exact(n_solutions, n_search, n_estimation):
+    probabilities = counting.counting_distribution(n_solutions, n_search, n_estimation)
+
+    assert counting.ml_estimate(probabilities, n_search) == n_solutions
+
+
+def test_ml_estimate_on_40_search_wires():
+    # double precision no longer resolves single solutions out of 2**40
+    probabilities = counting.counting_distribution(2 ** 30 + 7, 40, 12)
+
+    assert abs(counting.ml_estimate(probabilities, 40) - (2 ** 30 + 7)) <= 4
+
+
+def test_ml_estimate_of_sampled_frequencies():
+    rng = np.random.default_rng(0)
+    probabilities = counting.counting_distribution(300, 10, 7)
+    frequencies = np.bincount(rng.choice(128, 20000, p=probabilities), minlength=128) / 20000
+
+    assert abs(counting.ml_estimate(frequencies, 10) - 300) <= 3
+
+
+def test_count_solutions():
+    indices = [1, 5, 6]
+
+    assert counting.count_solutions(indices, 4, 4) == pytest.approx(
+        counting.estimate_solutions(counting.counting_distribution(3, 4, 4), 4)
+    )
+    assert counting.count_solutions(indices, 4, 4, method="ml") == 3
+    with pytest.raises(ValueError, match="unknown method"):
+        counting.count_solutions(indices, 4, 4, method="mean")
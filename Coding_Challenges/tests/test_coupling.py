@@ -0,0 +1,106 @@
+"""Coupling-map loading and persisted distance tables of :mod:`qhack_tools.coupling`."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from qhack_tools import coupling
+
+RING = {0: [1, 3], 1: [0, 2], 2: [1, 3], 3: [2, 0]}
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("QHACK_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(coupling, "_tables", {})
+    return tmp_path / "cache"
+
+
+def test_csr_round_trip():
+    ring = coupling.CouplingMap.from_dict(RING)
+
+    assert ring.nodes == [0, 1, 2, 3]
+    assert ring.neighbours(0).tolist() == [1, 3]
+    assert {node: sorted(n) for node, n in ring.to_dict().items()} == {
+        node: sorted(n) for node, n in RING.items()
+    }
+    # the direction and repetition of the edges do not change the map
+    edges = [(1, 0), (0, 1), (2, 1), (3, 2), (0, 3)]
+    same = coupling.CouplingMap.from_edges(edges, nodes=[0, 1, 2, 3])
+    assert same.key == ring.key
+
+
+@pytest.mark.parametrize(
+    "name, text",
+    [
+        ("ring.txt", "# a ring\n0 1\n1,2\n\n2 3  # last but one\n3 0\n"),
+        ("ring.json", json.dumps({str(k): v for k, v in RING.items()})),
+        ("pairs.json", json.dumps([[0, 1], [1, 2], [2, 3], [3, 0]])),
+        ("edges.json", json.dumps({"edges": [[0, 1], [1, 2], [2, 3], [3, 0]]})),
+    ],
+)
+def test_load_formats(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+
+    assert coupling.load(str(path)).key == coupling.CouplingMap.from_dict(RING).key
+
+
+def test_load_rejects_malformed_lines(tmp_path):
+    path = tmp_path / "bad.txt"
+    path.write_text("0 1 2\n")
+
+    with pytest.raises(ValueError, match="expected two qubits"):
+        coupling.load(str(path))
+
+
+def test_string_labels(tmp_path):
+    path = tmp_path / "labels.txt"
+    path.write_text("q0 q1\nq1 7\n")
+
+    assert coupling.load(str(path)).nodes == ["q0", "q1", 7]
+
+
+def test_tables():
+    line = coupling.CouplingMap.from_edges([("a", "b"), ("b", "c")], nodes=["a", "b", "c", "x"])
+    tables = coupling.compute_tables(line)
+
+    assert tables.distances.tolist() == [
+        [0, 1, 2, -1],
+        [1, 0, 1, -1],
+        [2, 1, 0, -1],
+        [-1, -1, -1, 0],
+    ]
+    assert tables.next_hop[0, 2] == 1
+    assert tables.next_hop[2, 0] == 1
+    assert tables.next_hop[0, 3] == -1
+    assert tables.next_hop[1, 1] == -1
+
+
+def test_tables_are_persisted(cache_dir, monkeypatch):
+    ring = coupling.CouplingMap.from_dict(RING)
+    tables = coupling.distance_tables(ring)
+    path = coupling.tables_path(ring)
+
+    assert path.startswith(str(cache_dir))
+    assert os.path.exists(path)
+
+    # a fresh process reads the stored tables instead of computing them
+    monkeypatch.setattr(coupling, "_tables", {})
+    monkeypatch.setattr(coupling, "compute_tables", None)
+    stored = coupling.distance_tables(RING)
+    assert np.array_equal(stored.distances, tables.distances)
+    assert np.array_equal(stored.next_hop, tables.next_hop)
+
+
+def test_corrupt_table_is_recomputed(cache_dir):
+    ring = coupling.CouplingMap.from_dict(RING)
+    path = coupling.tables_path(ring)
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"not a table")
+
+    assert coupling.distance_tables(ring).distances[0, 2] == 2
+    with np.load(path) as stored:
+        assert stored["distances"][0, 2] == 2
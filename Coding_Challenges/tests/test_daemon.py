@@ -0,0 +1,77 @@
+"""Request handling of :mod:`qhack_tools.daemon` and the socket round trip of the client."""
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from qhack_tools import challenges as ch
+from qhack_tools import client, daemon
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def solutions():
+    return daemon.load_solutions([ch.get_challenge("games_200_CHSH")])
+
+
+def test_solutions_are_indexed_by_every_alias(solutions):
+    assert solutions["games_200_CHSH"] is solutions["games_200_CHSH_template"]
+    assert solutions["games_200_CHSH"] is solutions["CHSH_game"]
+
+
+def test_request_returns_the_script_output(solutions):
+    challenge = ch.get_challenge("games_200_CHSH")
+    for case in challenge.cases:
+        payload, expected = ch.read_case(case)
+        response = daemon.handle_request(solutions, f"games_200_CHSH\n{payload}".encode())
+
+        assert response[:1] == daemon.STATUS_OK
+        assert ch.compare_output(challenge, response[1:].decode(), expected)[0]
+
+
+def test_repeated_requests_give_the_same_answer(solutions):
+    payload, _ = ch.read_case(ch.get_challenge("games_200_CHSH").cases[0])
+    request = f"CHSH_game\n{payload}".encode()
+
+    assert daemon.handle_request(solutions, request) == daemon.handle_request(solutions, request)
+
+
+def test_errors(solutions):
+    response = daemon.handle_request(solutions, b"no_such_challenge\n1\n")
+    assert response == daemon.STATUS_ERROR + b"Unknown challenge 'no_such_challenge'\n"
+
+    response = daemon.handle_request(solutions, b"games_200_CHSH\nnot,numbers\n")
+    assert response[:1] == daemon.STATUS_ERROR
+    assert b"Traceback" in response
+
+
+def test_client_round_trip(tmp_path):
+    socket_path = str(tmp_path / "qhack.sock")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "qhack_tools.daemon", "games_200_CHSH", "--socket", socket_path],
+        cwd=ROOT,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while not os.path.exists(socket_path):
+            assert server.poll() is None, server.stderr.read().decode()
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        payload, expected = ch.read_case(ch.get_challenge("games_200_CHSH").cases[0])
+        ok, output = client.request("games_200_CHSH", payload, socket_path)
+        assert ok
+        assert ch.compare_output(ch.get_challenge("games_200_CHSH"), output.decode(), expected)[0]
+
+        ok, output = client.request("no_such_challenge", "", socket_path)
+        assert not ok
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=30)
+
+    assert not os.path.exists(socket_path)
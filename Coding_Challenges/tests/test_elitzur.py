@@ -0,0 +1,133 @@
+"""Monte Carlo engine of the bomb tester, in :mod:`qhack_tools.elitzur`."""
+import numpy as np
+import pytest
+
+from qhack_tools import challenges as ch
+from qhack_tools import elitzur
+
+
+@pytest.fixture(scope="module")
+def solution():
+    return ch.load_solution(ch.get_challenge("games_300_Elitzur_Vaidman")).module
+
+
+def test_stage_probabilities(solution):
+    angle = 0.3
+    probabilities = elitzur.stage_probabilities(angle, solution)
+    assert probabilities.p_explode == pytest.approx(np.cos(angle) ** 2)
+    assert probabilities.p_beep == pytest.approx(np.sin(angle) ** 2)
+
+
+def test_probability_of_one(solution):
+    assert elitzur.probability_of_one(solution.is_bomb, 0.0) == pytest.approx(1.0)
+    assert elitzur.probability_of_one(solution.bomb_tester, 0.0) == pytest.approx(0.0)
+    assert elitzur.probability_of_one(solution.is_bomb, np.pi / 4) == pytest.approx(0.5)
+
+
+def test_sample_counts():
+    probabilities = elitzur.StageProbabilities(0.2, 0.7)
+    counts = elitzur.sample_counts(probabilities, 3, 10 ** 6, seed=0)
+    assert sum(counts) == 10 ** 6
+    assert counts == elitzur.sample_counts(probabilities, 3, 10 ** 6, seed=0)
+
+    survival = 0.8 ** 3
+    assert counts.explosions / 10 ** 6 == pytest.approx(1 - survival, abs=5e-3)
+    assert elitzur.ratio(counts) == pytest.approx(0.7, abs=5e-3)
+
+
+def test_sample_trials():
+    probabilities = elitzur.StageProbabilities(0.2, 0.7)
+    outcomes = elitzur.sample_trials(probabilities, 3, 10 ** 6, seed=0)
+    assert outcomes.dtype == np.int8
+    assert set(np.unique(outcomes)) <= {elitzur.EXPLOSION, elitzur.D_BEEP, elitzur.C_BEEP}
+
+    survival = 0.8 ** 3
+    frequencies = np.bincount(outcomes, minlength=3) / 10 ** 6
+    expected = [1 - survival, survival * 0.7, survival * 0.3]
+    assert np.allclose(frequencies, expected, atol=5e-3)
+
+
+def test_certain_outcomes():
+    assert elitzur.sample_counts(elitzur.StageProbabilities(1.0, 0.5), 2, 100, 0) == (100, 0, 0)
+    assert elitzur.sample_counts(elitzur.StageProbabilities(0.0, 1.0), 2, 100, 0) == (0, 100, 0)
+    assert np.isnan(elitzur.ratio(elitzur.Counts(100, 0, 0)))
+
+
+def test_one_shot_counts_agree_with_the_engine(solution):
+    angle, n, trials = 1.256637, 2, 300
+    counts = elitzur.one_shot_counts(solution, angle, n, trials)
+    assert sum(counts) == trials
+
+    probabilities = elitzur.stage_probabilities(angle, solution)
+    survival = (1 - probabilities.p_explode) ** n
+    expected = trials * np.array([1 - survival, survival * probabilities.p_beep])
+    sigma = np.sqrt(expected * (1 - expected / trials))
+    assert np.all(np.abs(np.array(counts[:2]) - expected) <= 5 * sigma + 1)
+
+
+def test_solution_matches_the_expected_answers(solution):
+    assert solution.simulate(0.78539, 1) == pytest.approx(0.5, abs=0.05)
+    assert solution.simulate(1.256637, 5) == pytest.approx(0.9, abs=0.05)
+
+
+def test_simulate_matches_the_solution(solution):
+    # both draw the same two binomials from a generator seeded with 0
+    assert elitzur.simulate(1.256637, 5, seed=0, module=solution) == pytest.approx(
+        float(solution.simulate(1.256637, 5))
+    )
+
+
+def test_exact_ratio():
+    assert elitzur.exact_ratio(elitzur.StageProbabilities(0.2, 0.7), 3) == 0.7
+    assert np.isnan(elitzur.exact_ratio(elitzur.StageProbabilities(1.0, 0.7), 3))
+
+
+def test_ratio_std_matches_the_spread_of_samples():
+    probabilities = elitzur.StageProbabilities(0.5, 0.3)
+    rng = np.random.default_rng(1)
+    ratios = [elitzur.ratio(elitzur.sample_counts(probabilities, 2, 400, rng)) for _ in range(4000)]
+    std = elitzur.ratio_std(probabilities, 2, 400)
+    assert std == pytest.approx(np.std(ratios), rel=0.05)
+    assert std > np.sqrt(0.3 * 0.7 / 100)
+
+
+def test_confidence_interval():
+    low, high = elitzur.confidence_interval(elitzur.Counts(0, 30, 70))
+    assert low < 0.3 < high
+    assert (low, high) == pytest.approx((0.2189, 0.3958), abs=1e-4)
+
+    narrow = elitzur.confidence_interval(elitzur.Counts(0, 3000, 7000))
+    assert narrow[1] - narrow[0] < high - low
+    assert all(np.isnan(elitzur.confidence_interval(elitzur.Counts(10, 0, 0))))
+
+
+def test_confidence_interval_coverage():
+    probabilities = elitzur.StageProbabilities(0.1, 0.2)
+    rng = np.random.default_rng(2)
+    covered = 0
+    for _ in range(2000):
+        low, high = elitzur.confidence_interval(elitzur.sample_counts(probabilities, 1, 200, rng))
+        covered += low <= 0.2 <= high
+    assert covered / 2000 == pytest.approx(0.95, abs=0.02)
+
+
+def test_adaptive_estimate():
+    probabilities = elitzur.StageProbabilities(0.3, 0.6)
+    estimate = elitzur.adaptive_estimate(probabilities, 4, 1e-3, seed=0)
+    assert (estimate.high - estimate.low) / 2 <= 1e-3
+    assert estimate.low <= estimate.ratio <= estimate.high
+    assert estimate.ratio == pytest.approx(0.6, abs=3e-3)
+    assert estimate.trials >= 1000
+
+    capped = elitzur.adaptive_estimate(probabilities, 4, 1e-9, seed=0, max_trials=10 ** 5)
+    assert capped.trials == 10 ** 5
+
+
+def test_simulate_modes(solution):
+    angle = 1.256637
+    p_beep = np.sin(angle) ** 2
+    assert elitzur.simulate(angle, 5, module=solution, mode="exact") == pytest.approx(p_beep)
+    adaptive = elitzur.simulate(angle, 5, seed=0, module=solution, mode="adaptive")
+    assert adaptive == pytest.approx(p_beep, abs=3e-3)
+    with pytest.raises(ValueError, match="unknown mode"):
+        elitzur.simulate(angle, 5, module=solution, mode="fast")
@@ -0,0 +1,33 @@
+"""End-to-end grader runs, one per hook option.
+
+Each run is a subprocess, since the options patch PennyLane for the whole process.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHALLENGES = [
+    "algorithms_100_DeutschJozsa",
+    "algorithms_200_AdaptingTopology",
+    "games_200_CHSH",
+    "games_300_Elitzur_Vaidman",
+]
+
+
+@pytest.mark.parametrize("options", [[], ["--reuse-qnodes"], ["--statevector"]])
+def test_grader_passes(options):
+    result = subprocess.run(
+        [sys.executable, "-m", "qhack_tools.grader", *CHALLENGES, "-j", "2", *options],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "FAIL" not in result.stdout
+    assert result.stdout.splitlines()[-1].startswith("8/8 cases passed")
@@ -0,0 +1,165 @@
+"""Truth tables and Deutsch-Jozsa types of oracles in :mod:`qhack_tools.oracles`."""
+import numpy as np
+import pennylane as qml
+import pytest
+
+from qhack_tools import challenges as ch
+from qhack_tools import oracles
+
+
+def test_constant_oracles():
+    assert oracles.truth_table(oracles.trace(lambda: None), [0, 1], 2) == 0
+    assert oracles.truth_table(oracles.trace(lambda: qml.PauliX(wires=2)), [0, 1], 2) == 0b1111
+
+
+def test_balanced_oracles():
+    # f(x) = x0, the most significant bit: true for x = 2, 3
+    assert oracles.truth_table(oracles.trace(lambda: qml.CNOT(wires=[0, 2])), [0, 1], 2) == 0b1100
+
+    # f(x) = x0 XOR x1: true for x = 1, 2
+    def parity():
+        qml.CNOT(wires=[0, 2])
+        qml.CNOT(wires=[1, 2])
+
+    assert oracles.truth_table(oracles.trace(parity), [0, 1], 2) == 0b0110
+
+
+def test_toffoli_with_ancilla():
+    def oracle():
+        qml.Toffoli(wires=[0, 1, "a"])
+        qml.CNOT(wires=["a", 2])
+        qml.Toffoli(wires=[0, 1, "a"])
+
+    assert oracles.truth_table(oracles.trace(oracle), [0, 1], 2) == 0b1000
+
+
+def test_non_oracles():
+    # a gate outside the X family
+    assert oracles.truth_table(oracles.trace(lambda: qml.Hadamard(wires=2)), [0, 1], 2) is None
+    # an input wire is changed
+    assert oracles.truth_table(oracles.trace(lambda: qml.PauliX(wires=0)), [0, 1], 2) is None
+    # the ancilla is left dirty
+    assert oracles.truth_table(oracles.trace(lambda: qml.CNOT(wires=[0, "a"])), [0, 1], 2) is None
+
+
+def test_classify():
+    assert oracles.classify(0, 2) == "constant"
+    assert oracles.classify(0b1111, 2) == "constant"
+    assert oracles.classify(0b0110, 2) == "balanced"
+    assert oracles.classify(0b1000, 2) == "neither"
+
+
+def test_truth_tables_agree_with_the_statevector():
+    def oracle(controls, flip):
+        for control in controls:
+            qml.CNOT(wires=[control, 2])
+        if flip:
+            qml.PauliX(wires=2)
+        qml.Toffoli(wires=[0, 1, "a"])
+        qml.Toffoli(wires=[0, 1, "a"])
+
+    for controls in ([], [0], [1], [0, 1]):
+        for flip in (False, True):
+            operations = oracles.trace(oracle, controls, flip)
+            table = oracles.truth_table(operations, [0, 1], 2)
+            assert oracles.classify(table, 2) == oracles.statevector_type(operations, [0, 1], 2)
+
+
+def constant(wires):
+    qml.PauliX(wires=wires[2])
+
+
+def balanced(wires):
+    qml.CNOT(wires=[wires[0], wires[2]])
+
+
+def test_deutsch_jozsa_falls_back_to_the_statevector():
+    def phase_oracle(wires):
+        # a controlled-Z on the output after its Hadamards: not built from X-type gates
+        qml.Hadamard(wires=wires[2])
+        qml.CZ(wires=[wires[0], wires[2]])
+        qml.Hadamard(wires=wires[2])
+
+    assert oracles.deutsch_jozsa(phase_oracle, [0, 1], 2, [0, 1, 2]) == "balanced"
+    assert oracles.deutsch_jozsa(constant, [0, 1], 2, [0, 1, 2]) == "constant"
+
+
+def test_compare_oracles():
+    assert oracles.compare_oracles([constant] * 4) == "4 same"
+    assert oracles.compare_oracles([balanced] * 4) == "4 same"
+    assert oracles.compare_oracles([constant, balanced, balanced, constant]) == "2 and 2"
+    assert oracles.compare_oracles([constant, balanced, balanced, balanced]) == "bad input"
+
+
+def parity_oracle(controls, flip=False):
+    def oracle(wires):
+        for control in controls:
+            qml.CNOT(wires=[wires[control], wires[-1]])
+        if flip:
+            qml.PauliX(wires=wires[-1])
+
+    return oracle
+
+
+def phase_balanced(wires):
+    qml.Hadamard(wires=wires[-1])
+    qml.CZ(wires=[wires[0], wires[-1]])
+    qml.Hadamard(wires=wires[-1])
+
+
+@pytest.mark.parametrize("layout", oracles.LAYOUTS)
+def test_oracle_types_of_many_oracles(layout):
+    fs = [
+        parity_oracle([]),
+        parity_oracle([0, 2]),
+        parity_oracle([], flip=True),
+        parity_oracle([1], flip=True),
+        phase_balanced,
+        parity_oracle([2, 2], flip=True),
+    ]
+    expected = ["constant", "balanced", "constant", "balanced", "balanced", "constant"]
+
+    assert oracles.oracle_types(fs, 3, layout=layout, seed=0) == expected
+
+
+def test_layout_wires():
+    assert oracles.layout_wires(6, 3, "ancillas") == 10
+    assert oracles.layout_wires(6, 3, "reset") == 5
+    with pytest.raises(ValueError, match="unknown layout"):
+        oracles.layout_wires(6, 3, "qram")
+
+
+@pytest.mark.parametrize(
+    "fs, expected",
+    [
+        ([constant, balanced, phase_balanced, constant], "2 and 2"),
+        ([phase_balanced, balanced, balanced, phase_balanced], "4 same"),
+    ],
+)
+def test_solution_circuit_path(fs, expected):
+    # phase_balanced is not made of X-type gates, so the solution runs its circuit
+    solution = ch.load_solution(ch.get_challenge("algorithms_500_DeutschJozsaStrikesAgain"))
+
+    assert solution.module.deutsch_jozsa(fs) == expected
+    assert oracles.compare_oracles(fs) == expected
+
+
+def test_classify_oracles_matches_the_truth_tables():
+    specs = [[], [0], [1, 1], [0, 1, 0], [2, 0, 2], [1, 0, 1, 0]]
+    expected = [
+        oracles.deutsch_jozsa(parity_oracle(spec), [0, 1, 2], 3, [0, 1, 2, 3]) for spec in specs
+    ]
+
+    assert oracles.classify_oracles(specs, n_inputs=3) == expected
+    assert oracles.classify_oracles([",".join(map(str, spec)) for spec in specs], 3) == expected
+
+
+def test_classify_oracles_of_an_array():
+    specs = np.array([[0, 0], [0, 1], [1, 1], [1, 0]])
+
+    assert oracles.classify_oracles(specs) == ["constant", "balanced", "constant", "balanced"]
+
+
+def test_classify_oracles_rejects_other_wires():
+    with pytest.raises(ValueError, match="input wires 0..1"):
+        oracles.classify_oracles(["0,2"])
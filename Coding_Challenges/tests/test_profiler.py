@@ -0,0 +1,62 @@
+"""QNode counters of :mod:`qhack_tools.profiler`."""
+import os
+import subprocess
+import sys
+
+import pennylane as qml
+import pytest
+from pennylane import numpy as np
+
+from qhack_tools.profiler import Profiler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def circuit(x):
+    qml.RX(x, wires=0)
+    return qml.expval(qml.PauliZ(0))
+
+
+def test_calls_and_gradient_executions():
+    qnode = qml.QNode(circuit, qml.device("default.qubit", wires=1), diff_method="parameter-shift")
+    with Profiler() as profiler:
+        qnode(0.1)
+        qml.grad(qnode)(np.array(0.2, requires_grad=True))
+
+    (stats,) = profiler.stats.values()
+    assert stats.name.endswith("test_profiler.circuit")
+    assert (stats.calls, stats.gradient_calls, stats.executions) == (2, 1, 2)
+    assert stats.gradient_executions == 2
+    assert profiler.executions == 4
+
+
+def test_merge_adds_statistics_by_name():
+    qnode = qml.QNode(circuit, qml.device("default.qubit", wires=1))
+    with Profiler() as first:
+        qnode(0.1)
+    with Profiler() as second:
+        qnode(0.1)
+        qnode(0.2)
+
+    first.merge(second.snapshot())
+    (stats,) = first.stats.values()
+    assert stats.calls == 3
+    assert first.executions == 3
+    assert sum(first.stacks.values()) == pytest.approx(stats.seconds)
+
+
+def test_env_variable_under_grader_pool(tmp_path):
+    target = tmp_path / "profile.txt"
+    subprocess.run(
+        [sys.executable, "-m", "qhack_tools.grader", "games_300_Elitzur_Vaidman", "-j", "2"],
+        cwd=ROOT,
+        env=dict(os.environ, QHACK_PROFILE=str(target)),
+        capture_output=True,
+        check=True,
+    )
+
+    # the cases ran in the pool's workers, whose statistics reach the parent's summary
+    lines = target.read_text().splitlines()
+    assert "total circuit executions: 4" in lines
+    row = next(line for line in lines if line.startswith("Elitzur_Vaidman.simulate"))
+    assert row.split()[3] == "4"
@@ -0,0 +1,69 @@
+"""Shared devices and QNodes of :mod:`qhack_tools.qnode_cache`."""
+import numpy as np
+import pennylane as qml
+import pytest
+
+from qhack_tools import qnode_cache
+
+
+@pytest.fixture(autouse=True)
+def installed():
+    qnode_cache.install()
+    yield
+    qnode_cache.uninstall()
+
+
+def circuit_for(angle, wires=1):
+    @qml.qnode(qml.device("default.qubit", wires=wires))
+    def circuit(scale):
+        qml.RX(scale * angle, wires=0)
+        return qml.expval(qml.PauliZ(0))
+
+    return circuit
+
+
+def test_devices_are_shared_by_configuration():
+    assert qml.device("default.qubit", wires=2) is qml.device("default.qubit", wires=2)
+    assert qml.device("default.qubit", wires=2) is not qml.device("default.qubit", wires=3)
+    assert qml.device("default.qubit", wires=2) is not qml.device(
+        "default.qubit", wires=2, shots=10
+    )
+
+
+def test_structurally_identical_qnodes_are_shared():
+    first, second = circuit_for(0.1), circuit_for(0.2)
+
+    assert first._qnode is second._qnode
+    assert circuit_for(0.1, wires=2)._qnode is not first._qnode
+
+
+def test_each_instance_runs_its_own_closure():
+    first, second = circuit_for(0.1), circuit_for(0.2)
+
+    assert second(2.0) == pytest.approx(np.cos(0.4))
+    assert first(1.0) == pytest.approx(np.cos(0.1))
+    assert second.qtape.operations[0].data[0] == pytest.approx(0.4)
+    assert first.qtape.operations[0].data[0] == pytest.approx(0.1)
+
+
+def test_construct_sets_the_tape_of_its_instance():
+    first, second = circuit_for(0.1), circuit_for(0.2)
+
+    first.construct([1.0], {})
+    second(2.0)
+    assert first.qtape.operations[0].data[0] == pytest.approx(0.1)
+    assert first.tape is first.qtape
+
+
+def test_gradients_go_through_the_cached_qnode():
+    circuit = circuit_for(0.5)
+    grad = qml.grad(circuit)(qml.numpy.array(1.0, requires_grad=True))
+
+    assert grad == pytest.approx(-0.5 * np.sin(0.5))
+
+
+def test_uninstall_restores_pennylane():
+    qnode_cache.uninstall()
+
+    assert qml.device("default.qubit", wires=1) is not qml.device("default.qubit", wires=1)
+    assert isinstance(circuit_for(0.1), qml.QNode)
@@ -0,0 +1,88 @@
+"""Whole-circuit routing of :mod:`qhack_tools.routing`."""
+import random
+
+import numpy as np
+import pennylane as qml
+import pytest
+
+from qhack_tools import routing
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # the distance tables are persisted; keep them out of the user's cache
+    monkeypatch.setenv("QHACK_CACHE_DIR", str(tmp_path))
+
+
+def final_state(operations, wires):
+    dev = qml.device("default.qubit", wires=wires)
+
+    @qml.qnode(dev)
+    def circuit():
+        for op in operations:
+            qml.apply(op)
+        return qml.state()
+
+    return np.reshape(circuit(), (2,) * len(wires))
+
+
+def assert_routed(operations, graph, routed):
+    # every two-qubit gate acts on a coupling
+    assert all(len(op.wires) < 2 or op.wires[1] in graph[op.wires[0]] for op in routed.operations)
+    assert routed.swaps == sum(op.name == "SWAP" for op in routed.operations)
+
+    # the routed circuit prepares the same state, with wire w on qubit final_layout[w]
+    wires = list(graph)
+    state = final_state(routed.operations, wires)
+    state = np.transpose(state, [wires.index(routed.final_layout[w]) for w in wires])
+    assert np.allclose(state, final_state(operations, wires))
+
+
+@pytest.mark.parametrize(
+    "graph", [routing.challenge_graph(), routing.grid_graph(3, 3)], ids=["challenge", "grid"]
+)
+def test_random_circuit_is_equivalent(graph):
+    wires = list(graph)
+    operations = [qml.Hadamard(wires=w, do_queue=False) for w in wires]
+    operations += [qml.RY(0.3 * w + 0.1, wires=w, do_queue=False) for w in wires]
+    operations += routing.random_circuit(wires, 150, random.Random(1))
+
+    assert_routed(operations, graph, routing.route_circuit(operations, graph))
+
+
+def test_adjacent_gates_need_no_swap():
+    graph = routing.grid_graph(2, 2)
+    operations = [qml.CNOT(wires=[a, b], do_queue=False) for a in graph for b in graph[a]]
+    routed = routing.route_circuit(operations, graph)
+
+    assert routed.swaps == 0
+    assert [op.wires.tolist() for op in routed.operations] == [
+        op.wires.tolist() for op in operations
+    ]
+    assert routed.final_layout == routed.initial_layout
+
+
+def test_swap_count_on_a_line():
+    line = {0: [1], 1: [0, 2], 2: [1, 3], 3: [2]}
+    operations = [qml.Hadamard(wires=w, do_queue=False) for w in line]
+    operations += [qml.CNOT(wires=[0, 3], do_queue=False), qml.CNOT(wires=[0, 3], do_queue=False)]
+    routed = routing.route_circuit(operations, line)
+
+    # two SWAPs bring the ends together once, and the repeated gate needs none
+    assert routed.swaps == 2
+    assert routing.per_gate_swaps(operations, line) == 8
+    assert_routed(operations, line, routed)
+
+
+def test_initial_layout_and_tapes():
+    line = {"a": ["b"], "b": ["a", "c"], "c": ["b"]}
+    with qml.tape.QuantumTape() as tape:
+        qml.RX(0.3, wires=0)
+        qml.Hadamard(wires=1)
+        qml.CNOT(wires=[0, 1])
+        qml.expval(qml.PauliZ(0))
+
+    routed = routing.route_circuit(tape, line, initial_layout={0: "a", 1: "c"})
+    assert routed.initial_layout == {0: "a", 1: "c"}
+    assert routed.swaps == 1
+    assert all(set(op.wires) <= set(line) for op in routed.operations)
@@ -0,0 +1,136 @@
+"""Kernels and the kernel-backed device of :mod:`qhack_tools.statevector`."""
+import numpy as np
+import pennylane as qml
+import pytest
+from scipy.stats import unitary_group
+
+from qhack_tools import statevector
+
+N_WIRES = 4
+
+OPERATIONS = [
+    qml.PauliX(wires=2),
+    qml.CNOT(wires=[3, 0]),
+    qml.SWAP(wires=[1, 3]),
+    qml.Toffoli(wires=[2, 0, 1]),
+    qml.CSWAP(wires=[0, 3, 1]),
+    qml.PauliZ(wires=1),
+    qml.S(wires=0),
+    qml.T(wires=3),
+    qml.CZ(wires=[2, 1]),
+    qml.RZ(0.3, wires=1),
+    qml.PhaseShift(-0.7, wires=2),
+    qml.U1(1.1, wires=0),
+    qml.Hadamard(wires=3),
+    qml.PauliY(wires=0),
+    qml.RX(0.4, wires=2),
+    qml.RY(-1.3, wires=1),
+    qml.Rot(0.1, 0.2, 0.3, wires=3),
+    qml.CRX(0.5, wires=[1, 2]),
+    qml.CRY(0.6, wires=[3, 1]),
+    qml.CRZ(0.7, wires=[0, 2]),
+    qml.SingleExcitation(0.8, wires=[2, 0]),
+    qml.DoubleExcitation(0.9, wires=[3, 1, 0, 2]),
+    qml.QubitUnitary(unitary_group.rvs(4, random_state=1), wires=[1, 3]),
+    qml.QFT(wires=[2, 0, 3]),
+    qml.IsingXX(0.2, wires=[0, 1]),
+]
+
+
+def random_state(batch=2, seed=0):
+    rng = np.random.default_rng(seed)
+    state = rng.normal(size=(batch, 2 ** N_WIRES)) + 1j * rng.normal(size=(batch, 2 ** N_WIRES))
+    state /= np.linalg.norm(state, axis=1, keepdims=True)
+    return state.reshape((batch,) + (2,) * N_WIRES)
+
+
+def reference(state, matrix, axes):
+    """Applies a matrix to the given axes of every batch entry, the slow way."""
+
+    k = len(axes)
+    tensor = np.reshape(matrix, (2,) * 2 * k)
+    result = np.tensordot(tensor, state, axes=(list(range(k, 2 * k)), [1 + a for a in axes]))
+    # the new axes come first: put them back in place
+    return np.moveaxis(result, list(range(k + 1)), [1 + a for a in axes] + [0])
+
+
+@pytest.mark.parametrize("inverse", [False, True])
+@pytest.mark.parametrize("operation", OPERATIONS, ids=lambda op: op.name)
+def test_kernels_match_matrices(operation, inverse):
+    operation = operation.__copy__()
+    if inverse:
+        operation.inv()
+    state = random_state()
+    axes = list(operation.wires)
+
+    result = statevector.apply_operation(state, operation, axes)
+    assert np.allclose(result, reference(state, operation.matrix, axes), atol=1e-12)
+
+
+def test_batched_parameters():
+    state = random_state(batch=1)
+    angles = np.array([0.1, 0.2, 0.3])
+    result = statevector.apply_operation(state, qml.RY(0.0, wires=1), [1], params=[angles])
+
+    assert result.shape == (3,) + (2,) * N_WIRES
+    for angle, entry in zip(angles, result):
+        assert np.allclose(entry, reference(state, qml.RY(angle, wires=1).matrix, [1])[0])
+
+
+def test_observable_expvals():
+    state = random_state()
+    wires = qml.wires.Wires(range(N_WIRES))
+    hamiltonian = qml.Hamiltonian(
+        [0.5, -1.5, 2.0],
+        [qml.PauliZ(0) @ qml.PauliX(2), qml.PauliY(1), qml.Hermitian(np.diag([1, 2]), wires=3)],
+    )
+
+    matrix = qml.utils.sparse_hamiltonian(hamiltonian, wires).toarray()
+    flat = state.reshape(len(state), -1)
+    expected = np.einsum("bi,ij,bj->b", flat.conj(), matrix, flat).real
+    assert np.allclose(statevector.observable_expvals(state, hamiltonian, wires), expected)
+
+
+def circuit(params):
+    qml.BasisState(np.array([1, 0, 1]), wires=[0, 1, 2])
+    qml.RX(params[0], wires=0)
+    qml.CRY(params[1], wires=[0, 2])
+    qml.Rot(*params, wires=1)
+    qml.DoubleExcitation(params[2], wires=[0, 1, 2, 3])
+    qml.QFT(wires=[1, 3])
+    qml.IsingXX(params[0], wires=[2, 3])
+
+
+def test_device_matches_default_qubit():
+    hamiltonian = qml.Hamiltonian([0.3, 0.7], [qml.PauliZ(0) @ qml.PauliZ(3), qml.PauliX(1)])
+    params = qml.numpy.array([0.4, -0.9, 1.7], requires_grad=True)
+
+    def qnodes(device):
+        def energy(params):
+            circuit(params)
+            return qml.expval(hamiltonian)
+
+        def probs(params):
+            circuit(params)
+            return qml.probs(wires=[0, 2])
+
+        return qml.QNode(energy, device), qml.QNode(probs, device)
+
+    kernel = qnodes(statevector.device_class()(wires=N_WIRES))
+    default = qnodes(qml.device("default.qubit", wires=N_WIRES))
+
+    for ours, theirs in zip(kernel, default):
+        assert np.allclose(ours(params), theirs(params))
+    assert np.allclose(qml.grad(kernel[0])(params), qml.grad(default[0])(params))
+
+
+def test_install_replaces_default_qubit():
+    statevector.install()
+    try:
+        device = qml.device("default.qubit", wires=2)
+        assert device.short_name == "qhack.statevector"
+        assert qml.device("default.mixed", wires=2).short_name == "default.mixed"
+    finally:
+        statevector.uninstall()
+
+    assert qml.device("default.qubit", wires=2).short_name == "default.qubit"